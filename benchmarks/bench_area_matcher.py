@@ -0,0 +1,78 @@
+"""
+Micro-benchmark: area extraction with the AreaMatcher trie vs. the old
+per-area substring loop.
+
+Usage:
+    python benchmarks/bench_area_matcher.py [--areas 10 100 1000 5000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot_api.area_matcher import AreaMatcher
+
+WORDS = [
+    "Viman", "Nagar", "Koregaon", "Park", "Baner", "Aundh", "Wakad", "Hinjewadi",
+    "Kharadi", "Magarpatta", "Hadapsar", "Pimpri", "Chinchwad", "Ambegaon", "Budruk",
+    "Khurd", "Road", "Gaon", "Phase", "East", "West", "North", "South", "Camp",
+]
+
+
+def make_areas(n, rng):
+    areas = set()
+    while len(areas) < n:
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+        areas.add(f"{name} {len(areas)}" if len(areas) >= len(WORDS) else name)
+    return list(areas)
+
+
+def make_queries(areas, n, rng):
+    templates = ["analyze {0}", "compare {0} and {1}", "show price trend for {0}", "{0} demand last 3 years"]
+    return [rng.choice(templates).format(rng.choice(areas), rng.choice(areas)).lower() for _ in range(n)]
+
+
+def substring_loop(all_areas, query):
+    # The extraction loop process_query used before AreaMatcher
+    areas = []
+    for area in all_areas:
+        if isinstance(area, str) and area.lower() in query:
+            areas.append(area)
+    return areas
+
+
+def run(area_count, query_count, seed=0):
+    rng = random.Random(seed)
+    areas = make_areas(area_count, rng)
+    queries = make_queries(areas, query_count, rng)
+
+    start = time.perf_counter()
+    matcher = AreaMatcher(areas)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for query in queries:
+        substring_loop(areas, query)
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for query in queries:
+        matcher.find(query)
+    trie = time.perf_counter() - start
+
+    print(f"{area_count:>6} areas | build {build * 1000:8.2f} ms | "
+          f"substring {loop / query_count * 1e6:9.1f} us/query | "
+          f"trie {trie / query_count * 1e6:7.1f} us/query | "
+          f"speedup {loop / trie:6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--areas", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    for count in args.areas:
+        run(count, args.queries)
@@ -0,0 +1,115 @@
+"""
+Load test: concurrent queries through the sync ChatbotQueryView vs. the
+AsyncChatbotQueryView, with the OpenAI clients replaced by stubs that take
+a fixed time to answer.
+
+The sync path is driven the way a sync gunicorn deployment serves it: each
+worker handles one request at a time. The async path runs every request on
+one event loop, as a single ASGI worker would.
+
+Usage:
+    python benchmarks/bench_async_concurrency.py [--requests 50] [--workers 4] [--llm-latency 0.5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'realestate_project.settings')
+
+import django
+
+django.setup()
+
+from django.test import AsyncClient, Client
+
+from chatbot_api import llm_service
+from chatbot_api.summary_cache import summary_cache
+
+
+def completion(text):
+    message = types.SimpleNamespace(content=text)
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+def stub_reply(kwargs):
+    # Batched prompts list their requests as JSON and expect a JSON reply
+    if kwargs.get('response_format'):
+        prompt = kwargs['messages'][-1]['content']
+        requests = json.loads(prompt.split("Requests:", 1)[1])
+        return json.dumps({"summaries": [{"id": r['id'], "summary": "Stub summary."} for r in requests]})
+    return "Stub summary."
+
+
+def install_stub_clients(latency):
+    class SyncCompletions:
+        def __init__(self):
+            self.calls = 0
+
+        def create(self, **kwargs):
+            self.calls += 1
+            time.sleep(latency)
+            return completion(stub_reply(kwargs))
+
+    class AsyncCompletions:
+        async def create(self, **kwargs):
+            await asyncio.sleep(latency)
+            return completion("Stub summary.")
+
+    llm_service.client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=SyncCompletions()))
+    llm_service.async_client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=AsyncCompletions()))
+
+
+def queries(count, run):
+    # Distinct wording defeats the response cache; the summary cache is disabled
+    return [f"analyze wakad request {run}-{i}" for i in range(count)]
+
+
+def run_sync(count, workers):
+    client = Client()
+
+    def send(query):
+        return client.post('/api/query/', {'query': query}, content_type='application/json').status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        statuses = list(pool.map(send, queries(count, 'sync')))
+    return time.perf_counter() - start, statuses
+
+
+async def run_async(count):
+    client = AsyncClient()
+    start = time.perf_counter()
+    responses = await asyncio.gather(*[
+        client.post('/api/query/async/', {'query': query}, content_type='application/json')
+        for query in queries(count, 'async')
+    ])
+    return time.perf_counter() - start, [r.status_code for r in responses]
+
+
+def report(name, elapsed, statuses):
+    ok = sum(1 for code in statuses if code == 200)
+    print(f"{name:<28} {len(statuses):>4} requests | {elapsed:7.2f} s | "
+          f"{len(statuses) / elapsed:7.1f} req/s | {ok} ok")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4, help="simulated sync gunicorn workers")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    install_stub_clients(args.llm_latency)
+    summary_cache.max_entries = 0
+
+    elapsed, statuses = run_sync(args.requests, args.workers)
+    report(f"sync ({args.workers} workers)", elapsed, statuses)
+
+    elapsed, statuses = asyncio.run(run_async(args.requests))
+    report("async (1 event loop)", elapsed, statuses)
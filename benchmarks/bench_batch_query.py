@@ -0,0 +1,80 @@
+"""
+Benchmark: a page of dashboard cards answered with one /api/query/ request
+per card vs. a single /api/query/batch/ request, with the OpenAI client
+replaced by a stub that takes a fixed time to answer.
+
+Both the response cache and the summary cache are cleared before each run,
+so every card pays for its LLM call.
+
+Usage:
+    python benchmarks/bench_batch_query.py [--cards 20] [--llm-latency 0.5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'realestate_project.settings')
+
+import django
+
+django.setup()
+
+from django.test import Client
+
+from bench_async_concurrency import install_stub_clients
+from chatbot_api.dataset_store import dataset_store
+from chatbot_api.response_cache import get_response_cache
+from chatbot_api.summary_cache import summary_cache
+
+
+def page_queries(count):
+    # A mix of single-area trends, comparisons and the top areas card
+    snapshot = dataset_store.get()
+    areas = [area.lower() for area in snapshot.df[snapshot.schema.location_column].unique()]
+    cards = ["top areas"]
+    for i in range(count - 1):
+        if i % 2:
+            cards.append(f"compare {areas[i % len(areas)]} and {areas[(i + 1) % len(areas)]} demand")
+        else:
+            cards.append(f"analyze {areas[i % len(areas)]}")
+    return cards
+
+
+def reset_caches():
+    get_response_cache().clear()
+    summary_cache.max_entries = 0
+
+
+def run_singles(client, cards):
+    reset_caches()
+    start = time.perf_counter()
+    results = [client.post('/api/query/', {'query': card}, content_type='application/json').json() for card in cards]
+    return time.perf_counter() - start, results
+
+
+def run_batch(client, cards):
+    reset_caches()
+    start = time.perf_counter()
+    response = client.post('/api/query/batch/', {'queries': cards}, content_type='application/json')
+    return time.perf_counter() - start, response.json()['results']
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cards", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    install_stub_clients(args.llm_latency)
+    client = Client()
+    cards = page_queries(args.cards)
+
+    single_time, single_results = run_singles(client, cards)
+    batch_time, batch_results = run_batch(client, cards)
+
+    same = "identical" if single_results == batch_results else "DIFFERENT"
+    print(f"{len(cards)} cards, LLM latency {args.llm_latency:.2f} s")
+    print(f"  one request per card : {single_time:7.2f} s")
+    print(f"  one batch request    : {batch_time:7.2f} s | results {same}")
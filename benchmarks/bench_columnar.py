@@ -0,0 +1,82 @@
+"""
+Benchmark: serialization time and payload size of comparison answers as JSON
+records (handle_nan_values + FastJSONRenderer) vs. the columnar encodings
+(columnar_values + columnar JSON, MessagePack and Arrow IPC renderers).
+
+The dataset comes from generate_sample_data.py; each comparison covers
+--compare areas, so its table has --compare x --years rows.
+
+Usage:
+    python benchmarks/bench_columnar.py [--areas 200] [--years 50] [--compare 2 10 50] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'realestate_project.settings')
+os.environ.setdefault('CHATBOT_TIMING_LOG', 'False')
+
+import django
+
+django.setup()
+
+from chatbot_api.api import handle_nan_values
+from chatbot_api.dataset_store import DatasetSnapshot
+from chatbot_api.query_engine import analyze_query
+from chatbot_api.serialization import COLUMNAR_FORMATS, COLUMNAR_RENDERERS, FastJSONRenderer, columnar_values
+from generate_sample_data import area_names, generate_frame
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1000, result
+
+
+def renderers():
+    # One renderer per format (msgpack is served under two media types)
+    unique = {}
+    for renderer in COLUMNAR_RENDERERS:
+        unique.setdefault(renderer.format, renderer)
+    return unique
+
+
+def run(snapshot, areas, args):
+    query = "compare " + ", ".join(areas[:-1]) + f" and {areas[-1]}"
+    response, _ = analyze_query(query, snapshot)
+    rows = len(response['table_data'])
+
+    encodings = [('records', handle_nan_values, FastJSONRenderer())]
+    encodings += [(format, columnar_values, renderer()) for format, renderer in renderers().items()]
+    baseline = None
+    for name, encode, renderer in encodings:
+        elapsed, body = timed(lambda: renderer.render(encode(response)), args.repeat)
+        if baseline is None:
+            baseline = (elapsed, len(body))
+        print(f"{len(areas):>4} areas {rows:>6} rows | {name:<9} | {elapsed:8.2f} ms ({baseline[0] / elapsed:4.1f}x) "
+              f"| {len(body) / 1e3:9.1f} kB ({len(body) / baseline[1] * 100:5.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--areas", type=int, default=200)
+    parser.add_argument("--years", type=int, default=50)
+    parser.add_argument("--compare", type=int, nargs="+", default=[2, 10, 50])
+    parser.add_argument("--nan-density", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    df = generate_frame(args.areas, args.years, start_year=1970, nan_density=args.nan_density, variant='igr', seed=0)
+    snapshot = DatasetSnapshot.from_frame(df)
+    names = [name.lower() for name in area_names(args.areas)]
+    print(f"Renderers: {', '.join(COLUMNAR_FORMATS)}")
+    for count in args.compare:
+        run(snapshot, names[:count], args)
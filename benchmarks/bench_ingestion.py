@@ -0,0 +1,79 @@
+"""
+Benchmark: dataset load time from the XLSX workbook vs. CSV vs. Parquet vs.
+the memory-mapped column store that queries are served from.
+
+Writing a 1M-row workbook with openpyxl takes many minutes, so workbooks
+above --max-xlsx-rows are skipped unless the limit is raised.
+
+Usage:
+    python benchmarks/bench_ingestion.py [--rows 10000 100000 1000000] [--max-xlsx-rows 100000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot_api.column_store import MANIFEST_NAME, read_column_store, write_column_store
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'final location': rng.choice([f"Area {i}" for i in range(max(rows // 20, 1))], rows),
+        'year': rng.integers(2015, 2025, rows),
+        'city': 'Pune',
+        'total_sales - igr': rng.normal(1e9, 2e8, rows),
+        'total sold - igr': rng.integers(0, 5000, rows),
+        'flat - weighted average rate': rng.normal(8000, 1500, rows),
+        'office - weighted average rate': rng.normal(12000, 2500, rows),
+        'flat - most prevailing rate - range': rng.choice(['6000-7000', '7000-8000', '8000-9000'], rows),
+        'total units': rng.integers(0, 10000, rows),
+    })
+    df.loc[rng.random(rows) < 0.05, 'flat - weighted average rate'] = np.nan
+    return df
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(rows, max_xlsx_rows, workdir):
+    df = make_frame(rows)
+    paths = {fmt: os.path.join(workdir, f"data_{rows}.{fmt}") for fmt in ('xlsx', 'csv', 'parquet')}
+    manifest = os.path.join(workdir, f"columns_{rows}", MANIFEST_NAME)
+
+    df.to_csv(paths['csv'], index=False)
+    df.to_parquet(paths['parquet'], index=False)
+    write_column_store(df, manifest)
+    results = {
+        'csv': timed(lambda: pd.read_csv(paths['csv'])),
+        'parquet': timed(lambda: pd.read_parquet(paths['parquet'])),
+        'columns': timed(lambda: read_column_store(manifest)),
+    }
+    if rows <= max_xlsx_rows:
+        df.to_excel(paths['xlsx'], index=False)
+        results['xlsx'] = timed(lambda: pd.read_excel(paths['xlsx']))
+
+    parts = [f"{fmt} {results[fmt] * 1000:9.1f} ms" if fmt in results else f"{fmt}   skipped   "
+             for fmt in ('xlsx', 'csv', 'parquet', 'columns')]
+    speedup = f" | columns vs xlsx {results['xlsx'] / results['columns']:6.1f}x" if 'xlsx' in results else ""
+    sizes = ", ".join(f"{fmt} {os.path.getsize(path) / 1e6:.1f} MB" for fmt, path in paths.items() if os.path.exists(path))
+    print(f"{rows:>8} rows | " + " | ".join(parts) + speedup + f" | {sizes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--max-xlsx-rows", type=int, default=100000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            run(rows, args.max_xlsx_rows, workdir)
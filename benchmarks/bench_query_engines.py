@@ -0,0 +1,92 @@
+"""
+Benchmark: the pandas query engine (in-memory AreaIndex) vs. the sqlite
+engine (SQLAreaIndex over an indexed table) on a synthetic dataset.
+
+Reports the index build time per dataset version, per-query latency
+of analyze_query for top-areas, single-area trend and multi-area comparison
+queries, and checks that both engines return identical responses. Runs
+against a throwaway SQLite database, not db.sqlite3.
+
+Usage:
+    python benchmarks/bench_query_engines.py [--rows 10000 100000 1000000] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'realestate_project.settings')
+
+import django
+from django.conf import settings
+
+django.setup()
+
+from bench_ingestion import make_frame
+from chatbot_api.api import handle_nan_values
+from chatbot_api.column_store import MANIFEST_NAME, read_column_store, write_column_store
+from chatbot_api.dataset_store import DatasetSnapshot
+from chatbot_api.query_engine import analyze_query
+
+
+def build_snapshot(manifest, engine):
+    settings.CHATBOT_QUERY_ENGINE = engine
+    stat = os.stat(manifest)
+    df = read_column_store(manifest)
+    start = time.perf_counter()
+    snapshot = DatasetSnapshot(df, manifest, stat.st_mtime_ns, stat.st_size, 0.0)
+    return snapshot, time.perf_counter() - start
+
+
+def answer(query, snapshot):
+    response, _ = analyze_query(query, snapshot)
+    return handle_nan_values(response)
+
+
+def run(rows, repeat, workdir):
+    manifest = os.path.join(workdir, f"columns_{rows}", MANIFEST_NAME)
+    write_column_store(make_frame(rows), manifest)
+
+    snapshots = {}
+    builds = {}
+    for engine in ('pandas', 'sqlite'):
+        snapshots[engine], builds[engine] = build_snapshot(manifest, engine)
+    # Every other worker finds the table already loaded
+    _, reuse = build_snapshot(manifest, 'sqlite')
+
+    areas = snapshots['pandas'].df['final location'].unique()[:3]
+    queries = {
+        'top areas': "top areas",
+        'single area': f"analyze {areas[0].lower()}",
+        'comparison': f"compare {areas[0].lower()}, {areas[1].lower()} and {areas[2].lower()} demand",
+    }
+
+    print(f"{rows:>8} rows | index build: pandas {builds['pandas'] * 1000:8.1f} ms, "
+          f"sqlite {builds['sqlite'] * 1000:8.1f} ms (next workers {reuse * 1000:.1f} ms)")
+    for name, query in queries.items():
+        results = {}
+        timings = {}
+        for engine, snapshot in snapshots.items():
+            results[engine] = json.dumps(answer(query, snapshot), sort_keys=True, default=str)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                analyze_query(query, snapshot)
+            timings[engine] = (time.perf_counter() - start) / repeat
+        same = "identical" if results['pandas'] == results['sqlite'] else "DIFFERENT"
+        print(f"{'':>8}      | {name:<12} pandas {timings['pandas'] * 1000:7.3f} ms | "
+              f"sqlite {timings['sqlite'] * 1000:7.3f} ms | {same}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        settings.DATABASES['default']['NAME'] = os.path.join(workdir, 'bench.sqlite3')
+        for rows in args.rows:
+            run(rows, args.repeat, workdir)
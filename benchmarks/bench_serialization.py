@@ -0,0 +1,96 @@
+"""
+Benchmark: serializing table_data with the old recursive handle_nan_values
+vs. the column-wise cleaning in serialization.frame_records, and the JSON
+rendering step with DRF's JSONRenderer vs. FastJSONRenderer.
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 1000 10000 100000] [--nan-density 0.1]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'realestate_project.settings')
+
+import django
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer
+
+from chatbot_api.serialization import FastJSONRenderer, frame_records, orjson
+
+
+def legacy_handle_nan_values(data):
+    # The recursive cleaner api.handle_nan_values used before frame_records
+    if isinstance(data, dict):
+        return {k: legacy_handle_nan_values(v) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [legacy_handle_nan_values(item) for item in data]
+    elif isinstance(data, (pd.DataFrame, pd.Series)):
+        return legacy_handle_nan_values(data.to_dict('records') if isinstance(data, pd.DataFrame) else data.to_dict())
+    elif isinstance(data, np.ndarray):
+        return legacy_handle_nan_values(data.tolist())
+    elif isinstance(data, np.number):
+        return None if np.isnan(data) or np.isinf(data) else float(data)
+    elif pd.isna(data) or (isinstance(data, float) and (np.isnan(data) or np.isinf(data))):
+        return None
+    return data
+
+
+def make_frame(rows, nan_density, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'final location': rng.choice(['Wakad', 'Aundh', 'Baner', 'Viman Nagar'], rows),
+        'year': rng.integers(2015, 2025, rows),
+        'city': 'Pune',
+    })
+    for i in range(12):
+        values = rng.normal(5000, 1500, rows)
+        values[rng.random(rows) < nan_density] = np.nan
+        df[f'metric_{i} - weighted average rate'] = values
+    for i in range(6):
+        df[f'units_{i} - igr'] = rng.integers(0, 500, rows)
+    return df
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(rows, nan_density):
+    df = make_frame(rows, nan_density)
+
+    legacy_clean, legacy_records = timed(lambda: legacy_handle_nan_values(df.to_dict('records')))
+    new_clean, new_records = timed(lambda: frame_records(df))
+    assert legacy_records == new_records
+
+    payload = {'summary': '', 'chart_data': None, 'table_data': new_records}
+    drf_render, body = timed(lambda: JSONRenderer().render(payload))
+    fast_render, fast_body = timed(lambda: FastJSONRenderer().render(payload))
+
+    print(f"{rows:>7} rows | clean: recursive {legacy_clean * 1000:8.1f} ms, column-wise {new_clean * 1000:8.1f} ms "
+          f"({legacy_clean / new_clean:4.1f}x) | render: DRF {drf_render * 1000:7.1f} ms, "
+          f"fast {fast_render * 1000:7.1f} ms ({drf_render / fast_render:4.1f}x) | {len(body) / 1e6:5.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--nan-density", type=float, default=0.1)
+    args = parser.parse_args()
+    if orjson is None:
+        print("orjson not installed: FastJSONRenderer falls back to DRF's JSONRenderer")
+    for rows in args.rows:
+        run(rows, args.nan_density)
@@ -0,0 +1,80 @@
+"""
+Benchmark: per-worker memory when several processes load the same dataset,
+private copies (pandas.read_csv) vs. the memory-mapped column store.
+
+Each worker loads the dataset, reads its numeric columns and reports its RSS
+and PSS growth. PSS splits shared pages between the processes mapping them,
+so with the column store the numeric columns' share shrinks as --workers
+grows; decoded text columns (one pointer per row) remain private. Linux only
+(reads /proc/self/smaps_rollup).
+
+Usage:
+    python benchmarks/bench_shared_memory.py [--rows 1000000] [--workers 1 4]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_ingestion import make_frame
+from chatbot_api.column_store import MANIFEST_NAME, read_column_store, write_column_store
+
+
+def memory_mb():
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0][:-1].lower()] = int(parts[1]) / 1024
+    return values
+
+
+def worker(loader, path, barrier, results):
+    before = memory_mb()
+    df = loader(path)
+    # Touch every page of every numeric column
+    df.select_dtypes('number').sum()
+    # Measure while all workers are alive, so shared pages are split evenly
+    barrier.wait()
+    after = memory_mb()
+    results.put({key: after[key] - before[key] for key in after})
+    barrier.wait()
+
+
+def run(name, loader, path, workers):
+    ctx = multiprocessing.get_context('fork')
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(loader, path, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    rss = sum(m['rss'] for m in measured) / workers
+    pss = sum(m['pss'] for m in measured) / workers
+    print(f"{name:<14} {workers} workers | per-worker RSS +{rss:8.1f} MB | per-worker PSS +{pss:8.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, 'data.csv')
+        manifest = os.path.join(workdir, 'columns', MANIFEST_NAME)
+        df.to_csv(csv_path, index=False)
+        write_column_store(df, manifest)
+        del df
+        for workers in args.workers:
+            run('private copy', pd.read_csv, csv_path, workers)
+            run('column store', read_column_store, manifest, workers)
@@ -0,0 +1,214 @@
+"""
+Benchmark suite: query paths, upload ingestion and NaN handling at several
+dataset scales, on data from generate_sample_data.py, saved as JSON so runs
+can be compared across commits.
+
+For each scale (--areas x --years rows) it times:
+  - ChatbotQueryView.process_query for every intent path (top areas, single
+    area, price trend, demand trend, last 3 years, comparison, demand
+    comparison), with the LLM disabled so only the data path is measured
+  - an upload through FileUploadView until its ingestion job has finished,
+    for each --formats file type
+  - handle_nan_values on the full dataset frame
+
+Everything runs against a throwaway database, media and dataset directory.
+
+Usage:
+    python benchmarks/bench_suite.py [--areas 100 1000 10000] [--years 10] [--repeat 50]
+        [--formats csv parquet xlsx] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'realestate_project.settings')
+os.environ.setdefault('CHATBOT_TIMING_LOG', 'False')
+
+import django
+from django.conf import settings
+
+django.setup()
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client
+
+from chatbot_api import dataset_registry as registry_module
+from chatbot_api import llm_service
+from chatbot_api.api import ChatbotQueryView, handle_nan_values
+from chatbot_api.dataset_registry import dataset_registry
+from chatbot_api.models import UploadedFile
+from generate_sample_data import area_names, generate_frame, write_frame
+
+UPLOAD_TIMEOUT = 600
+
+
+def intent_queries(n_areas):
+    first, second, third = [name.lower() for name in area_names(max(n_areas, 3))[:3]]
+    return {
+        'top_areas': "top areas",
+        'single_area': f"analyze {first}",
+        'price_trend': f"{first} price trend",
+        'demand_trend': f"{first} demand",
+        'last_3_years': f"analyze {first} last 3 years",
+        'comparison': f"compare {first} and {second}",
+        'demand_comparison': f"compare {first}, {second} and {third} demand",
+    }
+
+
+def timings(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1000
+    return {
+        'median_ms': round(float(np.median(samples)), 4),
+        'p95_ms': round(float(np.percentile(samples, 95)), 4),
+        'repeat': repeat,
+    }
+
+
+def upload(client, path):
+    with open(path, 'rb') as f:
+        content = f.read()
+    start = time.perf_counter()
+    response = client.post('/api/upload/', {'file': SimpleUploadedFile(os.path.basename(path), content)})
+    accepted = time.perf_counter() - start
+    if response.status_code != 202:
+        raise RuntimeError(f"Upload of {path} failed: {response.content[:200]}")
+    upload_id = response.json()['upload_id']
+    while time.perf_counter() - start < UPLOAD_TIMEOUT:
+        job = UploadedFile.objects.get(pk=upload_id)
+        if job.status == UploadedFile.STATUS_SUCCEEDED:
+            return upload_id, accepted, time.perf_counter() - start
+        if job.status == UploadedFile.STATUS_FAILED:
+            raise RuntimeError(f"Ingestion of {path} failed: {job.error}")
+        time.sleep(0.01)
+    raise RuntimeError(f"Ingestion of {path} did not finish in {UPLOAD_TIMEOUT} s")
+
+
+def run_scale(n_areas, args, workdir, client):
+    df = generate_frame(n_areas, args.years, nan_density=args.nan_density, variant=args.variant, seed=args.seed)
+    rows = len(df)
+    results = []
+
+    def add(name, **values):
+        results.append(dict(name=name, areas=n_areas, years=args.years, rows=rows, **values))
+
+    # Upload each file type; queries then run on the last ingested dataset
+    formats = [fmt for fmt in args.formats if fmt != 'xlsx' or rows <= args.max_xlsx_rows]
+    base_path = os.path.join(workdir, f"data_{n_areas}x{args.years}")
+    upload_id = None
+    for path in write_frame(df, base_path, formats):
+        upload_id, accepted, total = upload(client, path)
+        fmt = os.path.splitext(path)[1][1:]
+        add(f"upload/{fmt}", accepted_ms=round(accepted * 1000, 2), ingested_ms=round(total * 1000, 2),
+            file_mb=round(os.path.getsize(path) / 1e6, 3))
+
+    snapshot = dataset_registry.get(upload_id)
+    view = ChatbotQueryView()
+    for intent, query in intent_queries(n_areas).items():
+        add(f"process_query/{intent}", **timings(lambda: view.process_query(query, snapshot), args.repeat))
+
+    frame = snapshot.df
+    add("handle_nan_values/frame", **timings(lambda: handle_nan_values({'table_data': frame}), max(args.repeat // 10, 3)))
+    return results
+
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True).strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                             cwd=ROOT, text=True).strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r['name'], r['rows']): r for r in baseline['results']}
+    print(f"\nCompared with {baseline_path} ({(baseline['meta']['commit'] or 'unknown')[:10]}):")
+    for result in results:
+        before = previous.get((result['name'], result['rows']))
+        if before is None:
+            continue
+        key = 'median_ms' if 'median_ms' in result else 'ingested_ms'
+        if before.get(key):
+            change = (result[key] - before[key]) / before[key] * 100
+            print(f"  {result['name']:<32} {result['rows']:>8} rows | {before[key]:10.3f} -> "
+                  f"{result[key]:10.3f} ms ({change:+6.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--areas", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--nan-density", type=float, default=0.05)
+    parser.add_argument("--variant", default='igr')
+    parser.add_argument("--formats", nargs="+", default=['csv', 'parquet', 'xlsx'])
+    parser.add_argument("--max-xlsx-rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/suite-<commit>-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    # Measure the data path only; the LLM is covered by the other benchmarks
+    llm_service.client = None
+    llm_service.async_client = None
+
+    commit, dirty = git_revision()
+    started = datetime.now(timezone.utc)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        settings.DATABASES['default']['NAME'] = os.path.join(workdir, 'bench.sqlite3')
+        settings.MEDIA_ROOT = os.path.join(workdir, 'media')
+        registry_module.DATASETS_DIR = os.path.join(workdir, 'datasets')
+        call_command('migrate', verbosity=0)
+        client = Client()
+        for n_areas in args.areas:
+            scale_results = run_scale(n_areas, args, workdir, client)
+            for result in scale_results:
+                stats = " | ".join(f"{key} {value}" for key, value in result.items()
+                                   if key not in ('name', 'areas', 'years', 'rows'))
+                print(f"{result['rows']:>8} rows | {result['name']:<32} | {stats}")
+            results += scale_results
+
+    report = {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'started_at': started.isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results', f"suite-{(commit or 'unknown')[:10]}-{started:%Y%m%dT%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,74 @@
+"""
+Benchmark: LLM summaries requested together, one completion per summary
+vs. batched completions, against a stub OpenAI client with a fixed latency.
+
+Each round requests --summaries distinct summaries at the same time, as a
+batch query or cache warmup does, and reports the number of completions
+sent and the wall time for several batch sizes.
+
+Usage:
+    python benchmarks/bench_summary_batching.py [--summaries 40] [--batch-sizes 1 4 8 16] [--llm-latency 0.5]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'realestate_project.settings')
+
+import django
+from django.conf import settings
+
+django.setup()
+
+from bench_async_concurrency import install_stub_clients
+from chatbot_api import llm_service
+from chatbot_api.summary_cache import summary_cache
+
+
+def contexts(count, run):
+    # Distinct areas give distinct summary cache keys
+    return [
+        {
+            'area_info': f"Area {run}-{i}",
+            'price_info': f"Average price is {1000 + i}",
+            'demand_info': f"Demand is {i}",
+            'trend_info': "Prices are rising",
+        }
+        for i in range(count)
+    ]
+
+
+def run(count, batch_size):
+    settings.CHATBOT_LLM_BATCH_SIZE = batch_size
+    llm_service.summary_batcher.max_batch = batch_size
+    completions = llm_service.client.chat.completions
+    completions.calls = 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        results = list(pool.map(
+            lambda context: llm_service.summarize(context, "analyze this area"),
+            contexts(count, batch_size),
+        ))
+    elapsed = time.perf_counter() - start
+    degraded = sum(1 for _, was_degraded in results if was_degraded)
+    return elapsed, completions.calls, degraded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--summaries", type=int, default=40)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    install_stub_clients(args.llm_latency)
+    summary_cache.max_entries = 0
+
+    for batch_size in args.batch_sizes:
+        elapsed, calls, degraded = run(args.summaries, batch_size)
+        print(f"batch size {batch_size:>3} | {args.summaries} summaries | {calls:>4} completions | "
+              f"{elapsed:6.2f} s | {degraded} fallbacks")
@@ -0,0 +1,226 @@
+"""
+Load test: replay a realistic query mix against the app under each worker
+model, with the LLM served by the local OpenAI stub (openai_stub.py).
+
+For every model in --models it starts gunicorn from the project root:
+  sync      - sync workers, one request at a time each, serving /api/query/
+  threaded  - gthread workers with --threads threads each, serving /api/query/
+  asgi      - uvicorn workers serving the non-blocking /api/query/async/
+then drives it with --concurrency client connections and reports p50, p95
+and p99 latency, throughput, HTTP errors and the share of answers whose
+summary came from the (stub) LLM rather than the fallback.
+
+--cold disables the summary cache and makes every query unique, so each
+request pays for an LLM call. Use --url to drive an already running server
+instead; it must point its OPENAI_BASE_URL at a stub itself.
+
+Usage:
+    python benchmarks/load_test.py [--models sync threaded asgi] [--workers 2] [--threads 8]
+        [--concurrency 32] [--requests 500] [--llm-latency 0.5] [--error-rate 0.0] [--cold]
+        [--output results.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chatbot_api.schema import detect_schema
+from openai_stub import STUB_MARKER, start_stub_server
+
+# Share of each intent in the replayed traffic
+QUERY_MIX = [
+    (0.10, "top areas"),
+    (0.35, "analyze {a}"),
+    (0.15, "{a} price trend"),
+    (0.10, "{a} demand"),
+    (0.10, "analyze {a} last 3 years"),
+    (0.20, "compare {a} and {b}"),
+]
+
+MODELS = {
+    'sync': (['realestate_project.wsgi:application'], '/api/query/'),
+    'threaded': (['realestate_project.wsgi:application', '-k', 'gthread'], '/api/query/'),
+    'asgi': (['realestate_project.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'], '/api/query/async/'),
+}
+
+
+def dataset_areas():
+    df = pd.read_excel(os.path.join(ROOT, 'Sample_data.xlsx'))
+    location_column = detect_schema(df).location_column
+    return [str(area).lower() for area in df[location_column].dropna().unique()]
+
+
+def make_queries(count, areas, cold, seed):
+    rng = random.Random(seed)
+    weights, templates = zip(*QUERY_MIX)
+    queries = []
+    for i in range(count):
+        first, second = rng.sample(areas, 2)
+        query = rng.choices(templates, weights)[0].format(a=first, b=second)
+        # A unique suffix defeats the response cache without changing the intent
+        queries.append(f"{query} #{seed}-{i}" if cold else query)
+    return queries
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_listening(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not start listening on port {port}")
+
+
+def start_server(model, args, openai_url):
+    app, path = MODELS[model]
+    port = free_port()
+    command = ['gunicorn', *app, '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+               '--timeout', '120', '--log-level', 'warning']
+    if model == 'threaded':
+        command += ['--threads', str(args.threads)]
+    env = dict(os.environ, OPENAI_BASE_URL=openai_url, OPENAI_API_KEY='stub', CHATBOT_TIMING_LOG='False')
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    if args.cold:
+        env['SUMMARY_CACHE_SIZE'] = '0'
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_listening(port, process)
+    except Exception:
+        process.kill()
+        raise
+    return process, f"http://127.0.0.1:{port}{path}"
+
+
+def drive(url, queries, concurrency):
+    """
+    Send every query once, from `concurrency` keep-alive connections
+
+    Returns:
+        tuple: (list of (seconds, status, llm_answer), wall seconds)
+    """
+    target = urlsplit(url)
+    pending = iter(queries)
+    lock = threading.Lock()
+    samples = []
+
+    def client():
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=120)
+        while True:
+            with lock:
+                query = next(pending, None)
+            if query is None:
+                break
+            body = json.dumps({'query': query})
+            start = time.perf_counter()
+            try:
+                connection.request('POST', target.path, body, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                payload = response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(target.hostname, target.port, timeout=120)
+                payload, status = b'', 0
+            elapsed = time.perf_counter() - start
+            llm_answer = STUB_MARKER.encode('utf-8') in payload
+            with lock:
+                samples.append((elapsed, status, llm_answer))
+        connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def summarize(model, samples, wall):
+    latencies = np.array([elapsed for elapsed, _, _ in samples]) * 1000
+    ok = [sample for sample in samples if sample[1] == 200]
+    return {
+        'model': model,
+        'requests': len(samples),
+        'wall_seconds': round(wall, 3),
+        'throughput_rps': round(len(samples) / wall, 2),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+        'errors': len(samples) - len(ok),
+        'llm_answers': sum(1 for sample in ok if sample[2]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--models", nargs="+", choices=sorted(MODELS), default=['sync', 'threaded', 'asgi'])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8, help="threads per gthread worker")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20, help="requests sent before measuring")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--cold", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="drive this running server instead of starting gunicorn")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    stub = start_stub_server(
+        latency=args.llm_latency, jitter=args.llm_jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, seed=args.seed,
+    )
+    openai_url = f"http://127.0.0.1:{stub.server_address[1]}/v1"
+    areas = dataset_areas()
+
+    results = []
+    targets = [('external', args.url)] if args.url else [(model, None) for model in args.models]
+    for model, url in targets:
+        process = None
+        if url is None:
+            process, url = start_server(model, args, openai_url)
+        try:
+            drive(url, make_queries(args.warmup, areas, args.cold, f"{model}-warmup"), args.concurrency)
+            samples, wall = drive(url, make_queries(args.requests, areas, args.cold, args.seed), args.concurrency)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+        result = summarize(model, samples, wall)
+        results.append(result)
+        print(f"{model:<9} | {result['requests']} requests | {result['throughput_rps']:7.1f} req/s | "
+              f"p50 {result['p50_ms']:8.1f} ms | p95 {result['p95_ms']:8.1f} ms | p99 {result['p99_ms']:8.1f} ms | "
+              f"{result['errors']} errors | {result['llm_answers']} LLM answers")
+
+    print(f"Stub OpenAI requests: {stub.RequestHandlerClass.config.counts}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+        print(f"Results saved to {args.output}")
@@ -0,0 +1,225 @@
+"""
+Local stand-in for the OpenAI chat-completions API, for load tests
+
+Answers POST /v1/chat/completions like the real API, including streamed
+(stream=true) and JSON-mode batched summary requests, after a configurable
+delay. A share of requests can fail with 500 errors or 429 rate-limit
+responses, and --rate-limit caps accepted requests per second the way an
+account quota does. Point the app at it with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=stub ./run.sh
+
+Every summary it returns contains STUB_MARKER, so a load test can tell LLM
+answers from fallback summaries.
+
+Usage:
+    python benchmarks/openai_stub.py [--port 8900] [--latency 0.5] [--jitter 0.1]
+        [--error-rate 0.0] [--rate-limit-rate 0.0] [--rate-limit 0] [--stream-chunks 8]
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_MARKER = "[stub]"
+
+
+class StubConfig:
+    def __init__(self, latency=0.5, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, rate_limit=0,
+                 stream_chunks=8, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rate_limit = rate_limit
+        self.stream_chunks = stream_chunks
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.counts = {'requests': 0, 'ok': 0, 'errors': 0, 'rate_limited': 0}
+
+    def delay(self):
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def outcome(self):
+        """Decide how to answer the next request: 'ok', 'error' or 'rate_limited'"""
+        with self.lock:
+            self.counts['requests'] += 1
+            now = time.monotonic()
+            if now - self.window_start >= 1.0:
+                self.window_start, self.window_count = now, 0
+            self.window_count += 1
+            if self.rate_limit and self.window_count > self.rate_limit:
+                result = 'rate_limited'
+            elif self.random.random() < self.rate_limit_rate:
+                result = 'rate_limited'
+            elif self.random.random() < self.error_rate:
+                result = 'error'
+            else:
+                result = 'ok'
+            self.counts['errors' if result == 'error' else result] += 1
+            return result
+
+
+def summary_text(prompt):
+    area = re.search(r"Area: (.*)", prompt)
+    area = area.group(1).strip() if area else "the selected area"
+    return f"{STUB_MARKER} {area} shows steady pricing with healthy demand, making it a reasonable investment."
+
+
+def reply_content(body):
+    prompt = body['messages'][-1]['content']
+    # Batched prompts list their requests as JSON and expect a JSON object back
+    if body.get('response_format', {}).get('type') == 'json_object' and "Requests:" in prompt:
+        requests = json.loads(prompt.split("Requests:", 1)[1])
+        return json.dumps({"summaries": [
+            {"id": r['id'], "summary": f"{STUB_MARKER} {r['area']} shows steady pricing with healthy demand."}
+            for r in requests
+        ]})
+    return summary_text(prompt)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = StubConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self.send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            return self.send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+        outcome = self.config.outcome()
+        if outcome == 'rate_limited':
+            return self.send_json(
+                429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                headers={'Retry-After': '1'},
+            )
+        delay = self.config.delay()
+        if outcome == 'error':
+            time.sleep(delay)
+            return self.send_json(500, {"error": {"message": "The server had an error", "type": "server_error"}})
+
+        content = reply_content(body)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        model = body.get('model', 'gpt-3.5-turbo')
+        if body.get('stream'):
+            return self.stream(content, completion_id, created, model, delay)
+
+        time.sleep(delay)
+        self.send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def stream(self, content, completion_id, created, model, delay):
+        # Half the delay before the first token, the rest spread over the chunks
+        words = content.split(" ")
+        chunks = max(1, min(self.config.stream_chunks, len(words)))
+        size = -(-len(words) // chunks)
+        pieces = [" ".join(words[i:i + size]) + (" " if i + size < len(words) else "") for i in range(0, len(words), size)]
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        time.sleep(delay / 2)
+        event({"role": "assistant", "content": ""})
+        for piece in pieces:
+            time.sleep(delay / 2 / len(pieces))
+            event({"content": piece})
+        event({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def send_json(self, code, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_stub_server(port=0, host='127.0.0.1', **options):
+    """
+    Run the stub in a background thread
+
+    Args:
+        port (int): Port to listen on; 0 picks a free one
+        host (str): Interface to bind
+        **options: StubConfig options (latency, jitter, error_rate, ...)
+
+    Returns:
+        ThreadingHTTPServer: The running server; its base URL is
+        f"http://{host}:{server.server_address[1]}/v1"
+    """
+    handler = type('ConfiguredStubHandler', (StubHandler,), {'config': StubConfig(**options)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='openai-stub', daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.1, help="+/- seconds of uniform noise")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--rate-limit", type=int, default=0, help="max accepted requests per second (0 = no limit)")
+    parser.add_argument("--stream-chunks", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = start_stub_server(
+        args.port, args.host, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, rate_limit=args.rate_limit, stream_chunks=args.stream_chunks,
+        seed=args.seed,
+    )
+    print(f"OpenAI stub listening on http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"Stub requests so far: {server.RequestHandlerClass.config.counts}")
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -3,10 +3,10 @@
 set -o errexit
 
 # Install essential dependencies only
-pip install django==5.2.1 django-cors-headers==4.3.1 djangorestframework==3.15.0 gunicorn==21.2.0 whitenoise==6.6.0
+pip install django==5.2.1 django-cors-headers==4.3.1 djangorestframework==3.15.0 gunicorn==21.2.0 uvicorn==0.29.0 whitenoise==6.6.0
 
 # Install data processing dependencies
-pip install pandas==2.2.0 numpy==1.26.0 python-dotenv==1.0.0 openai==1.10.0 openpyxl==3.1.2
+pip install pandas==2.2.0 numpy==1.26.0 python-dotenv==1.0.0 openai==1.10.0 httpx==0.27.2 openpyxl==3.1.2 orjson==3.9.15 pyarrow==15.0.2 prometheus-client==0.26.0 msgpack==1.2.3
 
 # Generate static files directory (without collecting)
 mkdir -p staticfiles
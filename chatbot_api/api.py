@@ -1,24 +1,56 @@
 import pandas as pd
+import hashlib
 import json
 import os
+import time
 import numpy as np
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.http import JsonResponse
-from .llm_service import generate_summary
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
+from .dataset_registry import DatasetNotFound, dataset_registry, parse_dataset_id
+from .ingest import SUPPORTED_UPLOAD_TYPES
+from .jobs import submit_ingestion, worker_id
+from .metrics import query_duration
+from .models import UploadedFile
+from .response_cache import get_response_cache, make_cache_key, normalize_query
+from .query_engine import (
+    analyze_query, aresolve_summary, process_query, query_intent, resolve_summaries, resolve_summary,
+    stream_resolve_summary,
+)
+from .warmup import cancel_warmup
+from .serialization import COLUMNAR_FORMATS, COLUMNAR_RENDERERS, clean_array, columnar_values, frame_records
+from .table_pages import parse_table_request, table_page, table_positions
+from .streaming import STREAM_FORMATS, EventStreamRenderer, NDJSONRenderer, encode_event, stream_response
+from .timing import stage
 
 # Custom JSON encoder function to handle NaN values
 def handle_nan_values(data):
-    """Process pandas dataframes to handle NaN values before JSON serialization"""
+    """
+    Process pandas dataframes to handle NaN values before JSON serialization
+
+    DataFrames, Series and 1-D arrays are cleaned column-wise in one vectorized
+    pass (see serialization.clean_array) instead of cell by cell.
+    """
     if isinstance(data, dict):
         return {k: handle_nan_values(v) for k, v in data.items()}
     elif isinstance(data, list):
         return [handle_nan_values(item) for item in data]
-    elif isinstance(data, (pd.DataFrame, pd.Series)):
-        return handle_nan_values(data.to_dict('records') if isinstance(data, pd.DataFrame) else data.to_dict())
+    elif isinstance(data, pd.DataFrame):
+        return frame_records(data)
+    elif isinstance(data, pd.Series):
+        return dict(zip(data.index, clean_array(data)))
     elif isinstance(data, np.ndarray):
+        if data.ndim == 1:
+            return clean_array(data)
         return handle_nan_values(data.tolist())
     elif isinstance(data, np.number):
         return None if np.isnan(data) or np.isinf(data) else float(data)
@@ -26,472 +58,331 @@ def handle_nan_values(data):
         return None
     return data
 
-# File path for the Excel data
-EXCEL_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Sample_data.xlsx')
+def observe_query(query, snapshot, cache, start):
+    """Record a query's end-to-end latency under its intent; cache is 'hit' or 'miss'"""
+    query_duration.labels(query_intent(query, snapshot), cache).observe(time.perf_counter() - start)
 
 class ChatbotQueryView(APIView):
+    # 'Accept: text/event-stream' / '?format=sse' (or ndjson) streams the answer;
+    # the columnar renderers (columnar JSON, MessagePack, Arrow) are opt-in too
+    renderer_classes = (
+        api_settings.DEFAULT_RENDERER_CLASSES + [EventStreamRenderer, NDJSONRenderer] + COLUMNAR_RENDERERS
+    )
+    
     def post(self, request):
-        query = request.data.get('query', '').lower()
+        start = time.perf_counter()
+        query = normalize_query(request.data.get('query', ''))
         
-        # Read the Excel file
+        # Get the parsed dataset (only re-read when the file changes)
         try:
-            df = pd.read_excel(EXCEL_FILE)
+            with stage('dataset'):
+                snapshot = dataset_registry.get(parse_dataset_id(request.data.get('dataset_id')))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except DatasetNotFound as e:
+            return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response(
                 {"error": f"Error reading Excel file: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
+        # Identical queries against the same dataset version are served from cache
+        response_cache = get_response_cache()
+        cache_key = make_cache_key(query, snapshot)
+        
+        # Streaming clients get the data as soon as it's ready, then the summary
+        stream_format = request.accepted_renderer.format
+        if stream_format in STREAM_FORMATS:
+            events = self.stream_query(query, snapshot, response_cache, cache_key, stream_format)
+            return stream_response(events, stream_format)
+        
+        # Columnar clients get one array per column, cached apart from the records
+        columnar = request.accepted_renderer.format in COLUMNAR_FORMATS
+        
+        # limit/offset/cursor/columns return one page of table_data
+        try:
+            table_request = parse_table_request(request.data, snapshot)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if table_request is not None:
+            return Response(
+                self.paged_query(query, snapshot, response_cache, cache_key, table_request, start, columnar)
+            )
+        
+        encode = handle_nan_values
+        if columnar:
+            cache_key = f"{cache_key}:columnar"
+            encode = columnar_values
+        
+        with stage('cache'):
+            cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            observe_query(query, snapshot, 'hit', start)
+            return Response(cached_response)
+        
         # Process the query
-        response = self.process_query(query, df)
+        response, pending_summary = analyze_query(query, snapshot)
+        if pending_summary is not None:
+            response['summary'] = resolve_summary(pending_summary)
         # Process to handle NaN values
-        processed_response = handle_nan_values(response)
+        with stage('serialize'):
+            processed_response = encode(response)
+        # Don't pin a fallback answer from a missed LLM deadline in the cache
+        if pending_summary is None or not pending_summary.degraded:
+            response_cache.set(cache_key, processed_response)
+        observe_query(query, snapshot, 'miss', start)
         return Response(processed_response)
     
-    def process_query(self, query, df):
-        # Dynamically determine location column
-        # Look for common location column names in the DataFrame
-        possible_location_columns = ['final location', 'area', 'location', 'locality', 'region', 'zone']
-        location_column = None
-        for col in possible_location_columns:
-            if col in df.columns:
-                location_column = col
-                break
+    def paged_query(self, query, snapshot, response_cache, cache_key, table_request, start, columnar=False):
+        """
+        Answer with one page of table_data
+
+        The summary and chart are cached apart from the table's row positions,
+        so later pages only serialize the rows and columns they return.
+        """
+        with stage('cache'):
+            head = response_cache.get(f"{cache_key}:head")
+            positions = response_cache.get(f"{cache_key}:rows")
+        cache = 'hit'
+        if head is None or positions is None:
+            cache = 'miss'
+            response, pending_summary = analyze_query(query, snapshot)
+            if pending_summary is not None:
+                response['summary'] = resolve_summary(pending_summary)
+            positions = table_positions(response.pop('table_data'), snapshot)
+            with stage('serialize'):
+                head = handle_nan_values(response)
+            response_cache.set(f"{cache_key}:rows", positions)
+            if pending_summary is None or not pending_summary.degraded:
+                response_cache.set(f"{cache_key}:head", head)
         
-        # If none found, use the first string column as a fallback
-        if not location_column:
-            for col in df.columns:
-                if df[col].dtype == 'object' and df[col].nunique() > 5:
-                    location_column = col
-                    break
+        with stage('serialize'):
+            rows, page = table_page(snapshot, positions, table_request, columnar)
+        observe_query(query, snapshot, cache, start)
+        return {**head, 'table_data': rows, 'table_page': page}
+    
+    def process_query(self, query, snapshot):
+        return process_query(query, snapshot)
+    
+    def stream_query(self, query, snapshot, response_cache, cache_key, stream_format):
+        """
+        Yield the answer as encoded events: a 'data' event with chart_data and
+        table_data, 'summary_delta' events while the LLM is generating, and a
+        final 'summary' event with the complete (or fallback) summary
+        """
+        cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            data = {k: v for k, v in cached_response.items() if k != 'summary'}
+            yield encode_event(stream_format, 'data', data)
+            yield encode_event(stream_format, 'summary', {'summary': cached_response['summary']})
+            return
         
-        # Dynamically determine year column
-        year_column = None
-        for col in df.columns:
-            if col.lower() in ['year', 'yr']:
-                year_column = col
-                break
+        response, pending_summary = analyze_query(query, snapshot)
+        processed_response = handle_nan_values(response)
+        data = {k: v for k, v in processed_response.items() if k != 'summary'}
+        yield encode_event(stream_format, 'data', data)
         
-        # If no year column found, look for date-like columns
-        if not year_column:
-            for col in df.columns:
-                if 'year' in col.lower() or 'date' in col.lower():
-                    year_column = col
-                    break
+        summary = processed_response['summary']
+        if pending_summary is not None:
+            for event, text in stream_resolve_summary(pending_summary):
+                if event == 'delta':
+                    yield encode_event(stream_format, 'summary_delta', {'delta': text})
+                else:
+                    summary = text
         
-        # Find price and demand columns dynamically
-        price_column = None
-        demand_column = None
+        processed_response['summary'] = summary
+        if pending_summary is None or not pending_summary.degraded:
+            response_cache.set(cache_key, processed_response)
+        yield encode_event(stream_format, 'summary', {'summary': summary})
+
+
+class TableQueryView(APIView):
+    """
+    GET one page of a query's table_data, without its summary
+
+    Takes query, dataset_id, limit, offset or cursor, and columns as query
+    parameters. Row positions cached by a paged query are reused; otherwise
+    the query is analyzed without calling the LLM.
+    """
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + COLUMNAR_RENDERERS
+    
+    def get(self, request):
+        query = normalize_query(request.query_params.get('query', ''))
+        try:
+            with stage('dataset'):
+                snapshot = dataset_registry.get(parse_dataset_id(request.query_params.get('dataset_id')))
+            table_request = parse_table_request(request.query_params, snapshot)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except DatasetNotFound as e:
+            return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response(
+                {"error": f"Error reading Excel file: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        if table_request is None:
+            table_request = parse_table_request({'offset': 0}, snapshot)
         
-        for col in df.columns:
-            col_lower = col.lower()
-            if not price_column and ('price' in col_lower or 'rate' in col_lower) and pd.api.types.is_numeric_dtype(df[col]):
-                price_column = col
-            if not demand_column and ('sold' in col_lower or 'sales' in col_lower or 'demand' in col_lower or 'units' in col_lower) and pd.api.types.is_numeric_dtype(df[col]):
-                demand_column = col
-                
-        # Extract area names from the query
-        areas = []
-        if location_column:
-            all_areas = df[location_column].unique()
-            for area in all_areas:
-                if isinstance(area, str) and area.lower() in query:
-                    areas.append(area)
+        response_cache = get_response_cache()
+        rows_key = f"{make_cache_key(query, snapshot)}:rows"
+        with stage('cache'):
+            positions = response_cache.get(rows_key)
+        if positions is None:
+            response, _ = analyze_query(query, snapshot)
+            positions = table_positions(response['table_data'], snapshot)
+            response_cache.set(rows_key, positions)
         
-        # If no specific areas mentioned, try to determine intent
-        if not areas:
-            if 'top' in query or 'best' in query:
-                if year_column and location_column and demand_column:
-                    recent_year = df[year_column].max()
-                    top_areas = df[df[year_column] == recent_year].sort_values(demand_column, ascending=False).head(3)
-                    
-                    chart_data = {
-                        'type': 'bar',
-                        'labels': top_areas[location_column].tolist(),
-                        'datasets': [{
-                            'label': f'{demand_column}',
-                            'data': top_areas[demand_column].tolist()
-                        }]
-                    }
-                    
-                    return {
-                        'summary': f"Here are the top areas by demand for {recent_year}",
-                        'chart_data': chart_data,
-                        'table_data': top_areas.to_dict('records')
-                    }
-                else:
-                    # Fallback if columns not found
-                    return {
-                        'summary': "Could not analyze data due to missing required columns.",
-                        'chart_data': None,
-                        'table_data': None
-                    }
-            
-            # Default response if intent is unclear
-            return {
-                'summary': "I'm not sure what you're looking for. Please try specifying an area like 'Analyze Wakad' or 'Compare Aundh and Baner'.",
-                'chart_data': None,
-                'table_data': None
-            }
+        columnar = request.accepted_renderer.format in COLUMNAR_FORMATS
+        with stage('serialize'):
+            rows, page = table_page(snapshot, positions, table_request, columnar)
+        return Response({'table_data': rows, 'table_page': page})
+
+
+def answer_queries(queries, snapshot):
+    """
+    Answer several queries against one snapshot, sharing LLM work between them
+
+    Cached answers are reused, and identical queries are answered once. The
+    data part of every other query runs first, then all of their summaries
+    are generated concurrently. New answers go into the response cache unless
+    their summary fell back.
+
+    Args:
+        queries (list): Raw query strings
+        snapshot (DatasetSnapshot): Dataset to answer from
+
+    Returns:
+        list: JSON-ready responses, in the same order as queries
+    """
+    # Run the data part of each distinct, uncached query
+    response_cache = get_response_cache()
+    results = [None] * len(queries)
+    computed = {}
+    for i, raw_query in enumerate(queries):
+        query = normalize_query(raw_query)
+        cache_key = make_cache_key(query, snapshot)
+        if cache_key in computed:
+            computed[cache_key][2].append(i)
+            continue
+        with stage('cache'):
+            cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            results[i] = cached_response
+            continue
+        response, pending_summary = analyze_query(query, snapshot)
+        computed[cache_key] = (response, pending_summary, [i])
+    
+    # Then generate all the LLM summaries at once
+    pending = [(response, pending_summary) for response, pending_summary, _ in computed.values()
+               if pending_summary is not None]
+    summaries = resolve_summaries([pending_summary for _, pending_summary in pending])
+    for (response, _), summary in zip(pending, summaries):
+        response['summary'] = summary
+    
+    for cache_key, (response, pending_summary, positions) in computed.items():
+        with stage('serialize'):
+            processed_response = handle_nan_values(response)
+        if pending_summary is None or not pending_summary.degraded:
+            response_cache.set(cache_key, processed_response)
+        for i in positions:
+            results[i] = processed_response
+    
+    return results
+
+
+class BatchQueryView(APIView):
+    """
+    Answer a list of queries against one dataset snapshot in a single request
+
+    Cached answers are reused, every other query runs against the same
+    snapshot and per-area index, and all LLM summaries are generated
+    concurrently, so the batch takes about as long as its slowest query.
+    Results come back in the order of the queries.
+    """
+    
+    def post(self, request):
+        queries = request.data.get('queries')
+        if not isinstance(queries, list) or not all(isinstance(query, str) for query in queries):
+            return Response({"error": "'queries' must be a list of strings"}, status=status.HTTP_400_BAD_REQUEST)
+        max_queries = getattr(settings, 'CHATBOT_BATCH_MAX_QUERIES', 50)
+        if len(queries) > max_queries:
+            return Response(
+                {"error": f"A batch can contain at most {max_queries} queries"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Single area analysis
-        if len(areas) == 1:
-            area = areas[0]
-            area_data = df[df[location_column] == area]
-            
-            # Check for specific time frame
-            if 'last 3 years' in query or 'last three years' in query:
-                if year_column:
-                    max_year = df[year_column].max()
-                    year_filter = [max_year - 2, max_year - 1, max_year]
-                    area_data = area_data[area_data[year_column].isin(year_filter)]
-            
-            # Check if query is about price or demand specifically
-            if 'price' in query and price_column:
-                chart_data = {
-                    'type': 'line',
-                    'labels': area_data[year_column].tolist() if year_column else [],
-                    'datasets': [{
-                        'label': price_column,
-                        'data': area_data[price_column].tolist()
-                    }]
-                }
-                summary = f"Price trend analysis for {area}: "
-                
-                # Calculate price growth
-                if len(area_data) > 1 and price_column:
-                    area_data_sorted = area_data.sort_values(year_column) if year_column else area_data
-                    first_price = area_data_sorted.iloc[0][price_column]
-                    last_price = area_data_sorted.iloc[-1][price_column]
-                    
-                    # Handle NaN values
-                    if pd.isna(first_price) or pd.isna(last_price):
-                        growth = 0
-                    elif first_price > 0:
-                        growth = ((last_price - first_price) / first_price) * 100
-                    else:
-                        growth = 0
-                    
-                    # Use safe values for display
-                    first_price = 0 if pd.isna(first_price) else first_price
-                    last_price = 0 if pd.isna(last_price) else last_price
-                    
-                    summary += f"Prices have {'increased' if growth > 0 else 'decreased'} by {abs(growth):.1f}% "
-                    summary += f"from {first_price:.2f} to {last_price:.2f}."
-                
-            elif 'demand' in query and demand_column:
-                chart_data = {
-                    'type': 'line',
-                    'labels': area_data[year_column].tolist() if year_column else [],
-                    'datasets': [{
-                        'label': demand_column,
-                        'data': area_data[demand_column].tolist()
-                    }]
-                }
-                summary = f"Demand trend analysis for {area}: "
-                
-                if len(area_data) > 1 and demand_column:
-                    area_data_sorted = area_data.sort_values(year_column) if year_column else area_data
-                    first_demand = area_data_sorted.iloc[0][demand_column]
-                    last_demand = area_data_sorted.iloc[-1][demand_column]
-                    
-                    # Handle NaN values
-                    if pd.isna(first_demand) or pd.isna(last_demand):
-                        change = 0
-                    else:
-                        change = last_demand - first_demand
-                    
-                    # Use safe values for display
-                    first_demand = 0 if pd.isna(first_demand) else first_demand
-                    last_demand = 0 if pd.isna(last_demand) else last_demand
-                    
-                    summary += f"Demand has {'increased' if change > 0 else 'decreased'} by {abs(change)} units "
-                    summary += f"from {first_demand} to {last_demand} units sold."
-            
-            # Default to a general analysis
-            else:
-                # Initialize datasets for chart
-                datasets = []
-                
-                # Add price data if available
-                if price_column:
-                    datasets.append({
-                        'label': price_column,
-                        'data': area_data[price_column].tolist(),
-                        'yAxisID': 'y-price'
-                    })
-                
-                # Add demand data if available
-                if demand_column:
-                    datasets.append({
-                        'label': demand_column,
-                        'data': area_data[demand_column].tolist(),
-                        'yAxisID': 'y-demand'
-                    })
-                
-                chart_data = {
-                    'type': 'line',
-                    'labels': area_data[year_column].tolist() if year_column else [],
-                    'datasets': datasets,
-                    'options': {
-                        'scales': {
-                            'y-price': {
-                                'position': 'left',
-                                'title': 'Price'
-                            },
-                            'y-demand': {
-                                'position': 'right',
-                                'title': 'Demand'
-                            }
-                        }
-                    }
-                }
-                
-                # Calculate averages for summary
-                base_summary = f"Analysis of {area}: "
-                price_info = "No price data available"
-                demand_info = "No demand data available"
-                trend_info = "No trend data available"
-                
-                if price_column:
-                    avg_price = area_data[price_column].mean()
-                    if not pd.isna(avg_price):
-                        price_info = f"Average price is ₹{avg_price:.2f}"
-                
-                if demand_column:
-                    avg_demand = area_data[demand_column].mean()
-                    if not pd.isna(avg_demand):
-                        demand_info = f"Average of {avg_demand:.1f} units sold"
-                
-                # Add trend analysis if multiple data points
-                if len(area_data) > 1:
-                    area_data_sorted = area_data.sort_values(year_column) if year_column else area_data
-                    trend_parts = []
-                    
-                    if price_column:
-                        first_price = area_data_sorted.iloc[0][price_column]
-                        last_price = area_data_sorted.iloc[-1][price_column]
-                        
-                        if not (pd.isna(first_price) or pd.isna(last_price)) and first_price > 0:
-                            price_change = ((last_price - first_price) / first_price) * 100
-                            trend_parts.append(f"prices have {'increased' if price_change > 0 else 'decreased'} by {abs(price_change):.1f}%")
-                    
-                    if demand_column:
-                        first_demand = area_data_sorted.iloc[0][demand_column]
-                        last_demand = area_data_sorted.iloc[-1][demand_column]
-                        
-                        if not (pd.isna(first_demand) or pd.isna(last_demand)):
-                            demand_change = last_demand - first_demand
-                            trend_parts.append(f"units sold have {'increased' if demand_change > 0 else 'decreased'} by {abs(demand_change):.1f} units")
-                    
-                    if trend_parts:
-                        trend_info = "Over time, " + " and ".join(trend_parts)
-                
-                # Prepare data context for LLM service
-                data_context = {
-                    'area_info': area,
-                    'price_info': price_info,
-                    'demand_info': demand_info,
-                    'trend_info': trend_info
-                }
-                
-                # Generate intelligent summary using LLM service
-                try:
-                    summary = generate_summary(data_context, query)
-                except Exception as e:
-                    print(f"Error using LLM service: {str(e)}")
-                    # Fallback to basic summary
-                    summary = base_summary
-                    if price_info != "No price data available":
-                        summary += f"{price_info} "
-                    if demand_info != "No demand data available":
-                        summary += f"with {demand_info}. "
-                    if trend_info != "No trend data available":
-                        summary += f"{trend_info}."
-            
-            return {
-                'summary': summary,
-                'chart_data': chart_data,
-                'table_data': area_data.to_dict('records')
-            }
+        try:
+            with stage('dataset'):
+                snapshot = dataset_registry.get(parse_dataset_id(request.data.get('dataset_id')))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except DatasetNotFound as e:
+            return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response(
+                {"error": f"Error reading Excel file: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         
-        # Comparison between multiple areas
-        elif len(areas) > 1:
-            filtered_data = df[df[location_column].isin(areas)]
-            
-            if 'demand' in query and demand_column and year_column:
-                # Compare demand trends
-                pivot_data = filtered_data.pivot(index=year_column, columns=location_column, values=demand_column).reset_index()
-                chart_datasets = []
-                
-                for area in areas:
-                    if area in pivot_data:
-                        chart_datasets.append({
-                            'label': area,
-                            'data': pivot_data[area].tolist()
-                        })
-                    else:
-                        chart_datasets.append({
-                            'label': area,
-                            'data': []
-                        })
-                
-                chart_data = {
-                    'type': 'line',
-                    'labels': pivot_data[year_column].tolist(),
-                    'datasets': chart_datasets
-                }
-                
-                # Generate summary comparing latest demand scores
-                latest_year = filtered_data[year_column].max() if year_column in filtered_data.columns else None
-                base_summary = f"Comparing demand trends between {', '.join(areas)}. "
-                
-                area_info = ', '.join(areas)
-                demand_info = "No demand data available"
-                price_info = "No price data available"
-                trend_info = "No trend data available"
-                
-                if latest_year:
-                    latest_data = filtered_data[filtered_data[year_column] == latest_year]
-                    
-                    summary_parts = []
-                    for area in areas:
-                        area_demand = latest_data[latest_data[location_column] == area][demand_column].values
-                        if len(area_demand) > 0 and not pd.isna(area_demand[0]):
-                            summary_parts.append(f"{area}: {area_demand[0]} units")
-                    
-                    if summary_parts:
-                        demand_info = f"Latest demand figures ({latest_year}): {', '.join(summary_parts)}"
-                
-                # Calculate trends for each area
-                if len(areas) > 1 and year_column and len(filtered_data) > 0:
-                    trend_parts = []
-                    
-                    for area in areas:
-                        area_data = filtered_data[filtered_data[location_column] == area]
-                        if len(area_data) > 1:
-                            area_data_sorted = area_data.sort_values(year_column)
-                            first_demand = area_data_sorted.iloc[0][demand_column]
-                            last_demand = area_data_sorted.iloc[-1][demand_column]
-                            
-                            if not (pd.isna(first_demand) or pd.isna(last_demand)):
-                                demand_change = last_demand - first_demand
-                                change_pct = (demand_change / first_demand * 100) if first_demand > 0 else 0
-                                trend_parts.append(f"{area} has {'increased' if demand_change > 0 else 'decreased'} by {abs(change_pct):.1f}%")
-                    
-                    if trend_parts:
-                        trend_info = "Demand trends: " + ", ".join(trend_parts)
-                
-                # Prepare data context for LLM service
-                data_context = {
-                    'area_info': area_info,
-                    'price_info': price_info,
-                    'demand_info': demand_info,
-                    'trend_info': trend_info
-                }
-                
-                # Generate intelligent summary using LLM service
-                try:
-                    summary = generate_summary(data_context, query)
-                except Exception as e:
-                    print(f"Error using LLM service for comparison: {str(e)}")
-                    # Fallback to basic summary
-                    summary = base_summary
-                    if demand_info != "No demand data available":
-                        summary += f"{demand_info}. "
-                    if trend_info != "No trend data available":
-                        summary += f"{trend_info}."
-            
-            elif price_column and year_column:
-                # Default to price comparison
-                pivot_data = filtered_data.pivot(index=year_column, columns=location_column, values=price_column).reset_index()
-                chart_datasets = []
-                
-                for area in areas:
-                    if area in pivot_data:
-                        chart_datasets.append({
-                            'label': area,
-                            'data': pivot_data[area].tolist()
-                        })
-                    else:
-                        chart_datasets.append({
-                            'label': area,
-                            'data': []
-                        })
-                
-                chart_data = {
-                    'type': 'line',
-                    'labels': pivot_data[year_column].tolist(),
-                    'datasets': chart_datasets
-                }
-                
-                # Generate summary comparing latest prices
-                latest_year = filtered_data[year_column].max() if year_column in filtered_data.columns else None
-                base_summary = f"Comparing {', '.join(areas)}. "
-                
-                area_info = ', '.join(areas)
-                price_info = "No price data available"
-                demand_info = "No demand data available"
-                trend_info = "No trend data available"
-                
-                if latest_year:
-                    latest_data = filtered_data[filtered_data[year_column] == latest_year]
-                    
-                    summary_parts = []
-                    for area in areas:
-                        area_price = latest_data[latest_data[location_column] == area][price_column].values
-                        if len(area_price) > 0 and not pd.isna(area_price[0]):
-                            summary_parts.append(f"{area}: ₹{area_price[0]:.2f}")
-                    
-                    if summary_parts:
-                        price_info = f"Latest prices ({latest_year}): {', '.join(summary_parts)}"
-                
-                # Calculate trends for each area
-                if len(areas) > 1 and year_column and len(filtered_data) > 0:
-                    trend_parts = []
-                    
-                    for area in areas:
-                        area_data = filtered_data[filtered_data[location_column] == area]
-                        if len(area_data) > 1:
-                            area_data_sorted = area_data.sort_values(year_column)
-                            first_price = area_data_sorted.iloc[0][price_column]
-                            last_price = area_data_sorted.iloc[-1][price_column]
-                            
-                            if not (pd.isna(first_price) or pd.isna(last_price)) and first_price > 0:
-                                price_change = ((last_price - first_price) / first_price) * 100
-                                trend_parts.append(f"{area} has {'increased' if price_change > 0 else 'decreased'} by {abs(price_change):.1f}%")
-                    
-                    if trend_parts:
-                        trend_info = "Price trends: " + ", ".join(trend_parts)
-                
-                # Prepare data context for LLM service
-                data_context = {
-                    'area_info': area_info,
-                    'price_info': price_info,
-                    'demand_info': demand_info,
-                    'trend_info': trend_info
-                }
-                
-                # Generate intelligent summary using LLM service
-                try:
-                    summary = generate_summary(data_context, query)
-                except Exception as e:
-                    print(f"Error using LLM service for comparison: {str(e)}")
-                    # Fallback to basic summary
-                    summary = base_summary
-                    if price_info != "No price data available":
-                        summary += f"{price_info}. "
-                    if trend_info != "No trend data available":
-                        summary += f"{trend_info}."
-            else:
-                chart_data = None
-                summary = f"Comparing {', '.join(areas)}, but could not find suitable data for comparison."
-            
-            return {
-                'summary': summary,
-                'chart_data': chart_data,
-                'table_data': filtered_data.to_dict('records')
-            }
+        return Response({"results": answer_queries(queries, snapshot)})
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncChatbotQueryView(View):
+    """
+    Async variant of ChatbotQueryView for ASGI servers
+
+    The pandas work runs in a thread pool and the LLM call goes through the
+    async OpenAI client, so one process can hold many LLM round-trips in
+    flight. Query handling is shared with ChatbotQueryView via query_engine.
+    """
+
+    async def post(self, request):
+        start = time.perf_counter()
+        try:
+            data = json.loads(request.body or b'{}') if request.content_type == 'application/json' else request.POST
+        except ValueError as e:
+            return JsonResponse({"error": f"JSON parse error - {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+        query = normalize_query(data.get('query', ''))
+        
+        try:
+            dataset_id = parse_dataset_id(data.get('dataset_id'))
+            with stage('dataset'):
+                snapshot = await sync_to_async(dataset_registry.get, thread_sensitive=False)(dataset_id)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except DatasetNotFound as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return JsonResponse(
+                {"error": f"Error reading Excel file: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        response_cache = get_response_cache()
+        cache_key = make_cache_key(query, snapshot)
+        with stage('cache'):
+            cached_response = await sync_to_async(response_cache.get, thread_sensitive=False)(cache_key)
+        if cached_response is not None:
+            observe_query(query, snapshot, 'hit', start)
+            return self.render(cached_response)
+        
+        # Data work in the thread pool, then await the LLM without holding a thread
+        response, pending_summary = await sync_to_async(analyze_query, thread_sensitive=False)(query, snapshot)
+        if pending_summary is not None:
+            response['summary'] = await aresolve_summary(pending_summary)
+        with stage('serialize'):
+            processed_response = await sync_to_async(handle_nan_values, thread_sensitive=False)(response)
+        if pending_summary is None or not pending_summary.degraded:
+            await sync_to_async(response_cache.set, thread_sensitive=False)(cache_key, processed_response)
+        observe_query(query, snapshot, 'miss', start)
+        return self.render(processed_response)
+    
+    def render(self, data):
+        with stage('render'):
+            return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
 
 
 class FileUploadView(APIView):
@@ -502,30 +393,113 @@ class FileUploadView(APIView):
         if not file_obj:
             return Response({"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST)
             
+        ext = os.path.splitext(file_obj.name)[1].lower()
+        if ext not in SUPPORTED_UPLOAD_TYPES:
+            return Response({
+                "error": f"Unsupported file type '{ext}'. Upload one of: {', '.join(SUPPORTED_UPLOAD_TYPES)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+            
         try:
-            # Save the file temporarily
-            file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Sample_data.xlsx')
-            with open(file_path, 'wb+') as destination:
-                for chunk in file_obj.chunks():
-                    destination.write(chunk)
-                    
-            # Try to read the file to verify it's a valid Excel file
-            df = pd.read_excel(file_path)
-            row_count = len(df)
+            # Hash the content so identical uploads share one column store
+            content_hash = hashlib.sha256()
+            for chunk in file_obj.chunks():
+                content_hash.update(chunk)
             
-            # Get column info for feedback
-            column_info = []
-            for col in df.columns:
-                col_type = "numeric" if pd.api.types.is_numeric_dtype(df[col]) else "text"
-                column_info.append({"name": col, "type": col_type})
+            # Store the file and hand it to the ingestion queue. The upload
+            # becomes a new dataset; queries select it with its dataset_id
+            upload = UploadedFile.objects.create(
+                file=file_obj,
+                original_name=file_obj.name,
+                name=request.data.get('name') or os.path.splitext(file_obj.name)[0],
+                content_hash=content_hash.hexdigest(),
+                worker=worker_id(),
+            )
+            submit_ingestion(upload.pk)
             
             return Response({
-                "message": f"File uploaded successfully with {row_count} records",
+                "message": "File queued for ingestion",
+                "upload_id": upload.pk,
+                "dataset_id": upload.pk,
+                "name": upload.name,
+                "content_hash": upload.content_hash,
                 "filename": file_obj.name,
-                "columns": column_info
-            })
+                "status": upload.status,
+                "status_url": reverse('file-upload-status', args=[upload.pk]),
+            }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
             return Response({
                 "error": str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
+
+
+def upload_status(upload):
+    """Describe an UploadedFile's ingestion job for the status endpoint"""
+    data = {
+        "upload_id": upload.pk,
+        "dataset_id": upload.pk,
+        "name": upload.name,
+        "content_hash": upload.content_hash,
+        "filename": upload.original_name,
+        "status": upload.status,
+        "rows": upload.rows,
+        "chunks": upload.chunks,
+        "uploaded_at": upload.uploaded_at,
+        "started_at": upload.started_at,
+        "finished_at": upload.finished_at,
+        "duration_seconds": upload.duration_seconds,
+    }
+    if upload.status == UploadedFile.STATUS_SUCCEEDED:
+        data["message"] = f"File uploaded successfully with {upload.rows} records"
+        data["columns"] = upload.columns
+        data["detected_columns"] = upload.detected_columns
+    elif upload.status == UploadedFile.STATUS_FAILED:
+        data["error"] = upload.error
+    if upload.warmup_status:
+        data["warmup"] = {
+            "status": upload.warmup_status,
+            "total": upload.warmup_total,
+            "done": upload.warmup_done,
+        }
+    return data
+
+
+class UploadStatusView(APIView):
+    def get(self, request, upload_id):
+        try:
+            upload = UploadedFile.objects.get(pk=upload_id)
+        except UploadedFile.DoesNotExist:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(upload_status(upload))
+
+
+class WarmupCancelView(APIView):
+    def post(self, request, upload_id):
+        if not UploadedFile.objects.filter(pk=upload_id).exists():
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        if not cancel_warmup(upload_id):
+            return Response({"error": "No warmup is queued or running for this upload"}, status=status.HTTP_409_CONFLICT)
+        return Response({"message": "Warmup cancelled", "upload_id": upload_id})
+
+
+class DatasetListView(APIView):
+    """Datasets that queries can select with dataset_id, newest first"""
+
+    def get(self, request):
+        uploads = UploadedFile.objects.filter(status=UploadedFile.STATUS_SUCCEEDED).order_by('-uploaded_at', '-pk')
+        name = request.query_params.get('name')
+        if name:
+            uploads = uploads.filter(name=name)
+        return Response({
+            "datasets": [
+                {
+                    "dataset_id": upload.pk,
+                    "name": upload.name,
+                    "filename": upload.original_name,
+                    "content_hash": upload.content_hash,
+                    "rows": upload.rows,
+                    "uploaded_at": upload.uploaded_at,
+                }
+                for upload in uploads
+            ]
+        })
@@ -0,0 +1,186 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+
+class SeriesStats:
+    """First/last/mean/growth of one year-sorted value series"""
+
+    def __init__(self, raw):
+        # Values in the column's own dtype, so they display the same as before
+        self.raw = raw
+
+    @cached_property
+    def values(self):
+        return pd.to_numeric(pd.Series(self.raw), errors='coerce').to_numpy(dtype=float)
+
+    @property
+    def first(self):
+        return self.raw[0] if len(self.raw) else np.nan
+
+    @property
+    def last(self):
+        return self.raw[-1] if len(self.raw) else np.nan
+
+    @cached_property
+    def mean(self):
+        values = self.values[~np.isnan(self.values)]
+        return values.mean() if len(values) else np.nan
+
+    @cached_property
+    def change(self):
+        """Last minus first value, or None if either end is missing"""
+        if len(self.raw) < 2 or pd.isna(self.first) or pd.isna(self.last):
+            return None
+        return self.last - self.first
+
+    @cached_property
+    def growth(self):
+        """Percentage change from the first value, or None if it can't be computed"""
+        if self.change is None or not self.first > 0:
+            return None
+        return ((self.last - self.first) / self.first) * 100
+
+
+class AreaSeries:
+    """Row positions and year-sorted value arrays for one area"""
+
+    def __init__(self, positions, years, prices, demands):
+        self.positions = positions
+        self.years = years
+        self.price = SeriesStats(prices) if prices is not None else None
+        self.demand = SeriesStats(demands) if demands is not None else None
+
+    def __len__(self):
+        return len(self.positions)
+
+    def in_years(self, years):
+        """Return the subset of this series whose year is in the given list"""
+        if self.years is None:
+            return self
+        mask = np.isin(self.years, years)
+        return AreaSeries(
+            self.positions[mask],
+            self.years[mask],
+            self.price.raw[mask] if self.price else None,
+            self.demand.raw[mask] if self.demand else None,
+        )
+
+    def in_frame_order(self):
+        """Return the same rows in the frame's original order"""
+        order = np.argsort(self.positions, kind='stable')
+        return AreaSeries(
+            self.positions[order],
+            self.years[order] if self.years is not None else None,
+            self.price.raw[order] if self.price else None,
+            self.demand.raw[order] if self.demand else None,
+        )
+
+    def value_in_year(self, role, year):
+        """Return the first 'price' or 'demand' value recorded for a year, or None"""
+        matches = np.flatnonzero(self.years == year)
+        return getattr(self, role).raw[matches[0]] if len(matches) else None
+
+
+class AreaIndex:
+    """
+    Per-area, per-year index over one dataset version
+
+    Built once at load time so that single-area, comparison and "top areas"
+    queries read pre-sorted arrays instead of boolean-masking the full frame.
+    """
+
+    def __init__(self, df, schema):
+        self.schema = schema
+        self.max_year = None
+        self.top_positions = np.array([], dtype=np.intp)
+        self._areas = {}
+
+        location_column = schema.location_column
+        year_column = schema.year_column
+        if not location_column:
+            return
+
+        years = df[year_column].to_numpy() if year_column else None
+        prices = df[schema.price_column].to_numpy() if schema.price_column else None
+        demands = df[schema.demand_column].to_numpy() if schema.demand_column else None
+
+        # groupby().indices keeps each area's rows in their original order;
+        # a stable sort by year then matches sort_values on the filtered frame
+        for area, positions in df.groupby(location_column, sort=False, observed=True).indices.items():
+            if years is not None:
+                positions = positions[np.argsort(years[positions], kind='stable')]
+            self._areas[area] = AreaSeries(
+                positions,
+                years[positions] if years is not None else None,
+                prices[positions] if prices is not None else None,
+                demands[positions] if demands is not None else None,
+            )
+
+        # Rows of the most recent year, ranked by demand for "top areas"
+        if year_column and len(df):
+            # From the values: a dictionary-encoded column is an unordered Categorical
+            self.max_year = pd.Series(years).max()
+            if demands is not None:
+                recent = np.flatnonzero(years == self.max_year)
+                recent_demand = pd.to_numeric(pd.Series(demands[recent]), errors='coerce').to_numpy(dtype=float)
+                self.top_positions = recent[np.argsort(-recent_demand, kind='stable')]
+
+    def __contains__(self, area):
+        return area in self._areas
+
+    def get(self, area):
+        return self._areas[area]
+
+    def positions(self, areas):
+        """Row positions of all given areas, in the frame's original order"""
+        parts = [self._areas[area].positions for area in areas if area in self._areas]
+        if not parts:
+            return np.array([], dtype=np.intp)
+        return np.sort(np.concatenate(parts))
+
+    def pivot(self, areas, role):
+        """
+        Align the price or demand series of several areas on a shared year axis
+
+        Args:
+            areas (list): Area names to include
+            role (str): 'price' or 'demand'
+
+        Returns:
+            tuple: (sorted list of years, dict of area -> list of values with NaN gaps)
+        """
+        return pivot_series({area: self._areas[area] for area in areas if area in self._areas}, role)
+
+
+def pivot_series(series, role):
+    """
+    Align several areas' year-sorted series on a shared year axis
+
+    Args:
+        series (dict): Area name -> AreaSeries
+        role (str): 'price' or 'demand'
+
+    Returns:
+        tuple: (sorted list of years, dict of area -> array of values with NaN gaps)
+    """
+    if not series:
+        return [], {}
+    years = np.unique(np.concatenate([s.years for s in series.values()]))
+
+    # Like pivot(), fall back to float with NaN gaps if any area misses a year
+    slots = {area: np.searchsorted(years, s.years) for area, s in series.items()}
+    complete = all(len(np.unique(area_slots)) == len(years) for area_slots in slots.values())
+
+    columns = {}
+    for area, s in series.items():
+        raw = getattr(s, role).raw
+        if complete:
+            values = np.empty(len(years), dtype=raw.dtype)
+        else:
+            values = np.full(len(years), np.nan)
+        values[slots[area]] = raw
+        # Kept as arrays: serializers clean or encode them column-wise
+        columns[area] = values
+    return years.tolist(), columns
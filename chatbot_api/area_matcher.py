@@ -0,0 +1,100 @@
+import re
+
+# Queries and area names are compared word by word, ignoring case and punctuation
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class AreaMatcher:
+    """
+    Token trie over the area names of one dataset version
+
+    Finds every area mentioned in a query in a single left-to-right pass over
+    the query's words. Matches must start and end on word boundaries, and the
+    longest area name wins, so "Viman Nagar" is matched instead of "Nagar".
+    """
+
+    # Key under which a trie node stores the areas that end at that node
+    _END = object()
+
+    def __init__(self, areas):
+        self._root = {}
+        self._order = {}
+        for area in areas:
+            if not isinstance(area, str):
+                continue
+            tokens = tokenize(area)
+            if not tokens or area in self._order:
+                continue
+            self._order[area] = len(self._order)
+            node = self._root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node.setdefault(self._END, []).append(area)
+
+    def __len__(self):
+        return len(self._order)
+
+    def find(self, query):
+        """
+        Find the areas mentioned in a query
+
+        Args:
+            query (str): User's query
+
+        Returns:
+            list: Matched area names, in the order they appear in the dataset
+        """
+        found = set()
+        for _, _, areas in self._scan(query.lower()):
+            found.update(areas)
+        return sorted(found, key=self._order.__getitem__)
+
+    def canonicalize(self, query):
+        """
+        Replace each area mention in a lowercase query with a placeholder
+
+        Two queries that only differ in which order they name the same areas
+        map to the same template and area list.
+
+        Args:
+            query (str): Lowercase user query
+
+        Returns:
+            tuple: (query template, matched areas in dataset order)
+        """
+        parts = []
+        found = set()
+        last = 0
+        for start, end, areas in self._scan(query):
+            parts.append(query[last:start])
+            parts.append("{area}")
+            found.update(areas)
+            last = end
+        parts.append(query[last:])
+        return "".join(parts), sorted(found, key=self._order.__getitem__)
+
+    def _scan(self, text):
+        """Yield (start, end, areas) character spans of the longest matches"""
+        tokens = list(TOKEN_PATTERN.finditer(text))
+        i = 0
+        while i < len(tokens):
+            node = self._root
+            longest_end = None
+            longest_areas = None
+            j = i
+            while j < len(tokens) and tokens[j].group() in node:
+                node = node[tokens[j].group()]
+                j += 1
+                if self._END in node:
+                    longest_end = j
+                    longest_areas = node[self._END]
+            if longest_areas:
+                yield tokens[i].start(), tokens[longest_end - 1].end(), longest_areas
+                i = longest_end
+            else:
+                i += 1
@@ -0,0 +1,289 @@
+import datetime
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+# File inside the store directory that names the current version
+MANIFEST_NAME = 'manifest.json'
+
+# Version directories kept besides the current one, so a worker that read the
+# previous manifest a moment ago can still open its column files
+KEEP_PREVIOUS_VERSIONS = 1
+
+# Non-text values a dictionary-encoded column can hold, as (type tag, Python
+# types, to text, from text), checked in order (bool is an int, Timestamp a
+# datetime, datetime a date). Any other value is stored as str(value)
+VALUE_TYPES = [
+    ('bool', (bool, np.bool_), str, lambda text: text == 'True'),
+    ('int', (int, np.integer), str, int),
+    ('float', (float, np.floating), lambda value: repr(float(value)), float),
+    ('timestamp', pd.Timestamp, pd.Timestamp.isoformat, pd.Timestamp),
+    ('datetime', datetime.datetime, datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+    ('date', datetime.date, datetime.date.isoformat, datetime.date.fromisoformat),
+    ('time', datetime.time, datetime.time.isoformat, datetime.time.fromisoformat),
+]
+_DECODERS = {tag: decode for tag, _, _, decode in VALUE_TYPES}
+
+
+class ColumnStoreWriter:
+    """
+    Builds a new column store version from a stream of DataFrame chunks
+
+    Each chunk is written to disk as soon as it is appended, so memory use is
+    bounded by the chunk size rather than the dataset size. Numeric, boolean
+    and datetime columns are stored as-is; every other column is
+    dictionary-encoded as a code per row plus its distinct values.
+    Distinct values are kept as text with a type tag (see VALUE_TYPES), so a
+    mixed column such as [1, 'x', 3] reads back with the same Python types,
+    as pd.read_excel returns it. A column whose chunks disagree on type is
+    promoted on commit: numeric types to their common type, anything else to
+    a dictionary column keeping each chunk's values and types.
+
+    Nothing is visible to readers until commit() swaps the manifest with
+    os.replace. Used as a context manager, an uncommitted version is removed
+    on exit.
+
+    Args:
+        manifest_path (str): Path of the store's manifest file
+    """
+
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.root = os.path.dirname(manifest_path)
+        self.version = f"{time.time_ns():x}-{os.getpid()}"
+        self.version_dir = os.path.join(self.root, self.version)
+        self.names = None
+        self.rows = 0
+        self.chunks = 0
+        self.committed = False
+        self._parts = []
+        self._dictionaries = []
+        os.makedirs(self.version_dir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.committed:
+            self.abort()
+
+    def append(self, df):
+        """Write one chunk of rows; its columns must match the first chunk's"""
+        names = [str(col) for col in df.columns]
+        if self.names is None:
+            self.names = names
+            self._parts = [[] for _ in names]
+            self._dictionaries = [{} for _ in names]
+        elif names != self.names:
+            raise ValueError(f"Rows {self.rows + 1}-{self.rows + len(df)} have different columns than the header")
+
+        for i in range(len(names)):
+            series = df.iloc[:, i]
+            dtype = series.dtype
+            file_name = f"{i}.part{self.chunks}.npy"
+            if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+                kind, values = 'plain', series.to_numpy()
+            else:
+                kind, values = 'text', self._encode(i, series.to_numpy(dtype=object))
+            np.save(os.path.join(self.version_dir, file_name), values)
+            self._parts[i].append((kind, file_name, values.dtype, len(values)))
+
+        self.rows += len(df)
+        self.chunks += 1
+
+    def commit(self):
+        """Merge each column's chunks into one file and make this version current"""
+        if self.names is None:
+            raise ValueError("No header row found in the uploaded file")
+
+        columns = []
+        for i, name in enumerate(self.names):
+            parts = self._parts[i]
+            entry = {'name': name, 'file': f"{i}.npy"}
+            dtype = self._plain_dtype(parts)
+            if dtype is not None:
+                entry['encoding'] = 'plain'
+                self._merge(parts, entry['file'], dtype, lambda values: values)
+            else:
+                entry['encoding'] = 'dictionary'
+                entry['values_file'] = f"{i}.values.npy"
+                # Plain chunks of a promoted column join the dictionary first,
+                # so its final size is known before the codes are merged
+                parts = [self._encode_part(i, part) if part[0] == 'plain' else part for part in parts]
+                self._merge(parts, entry['file'], _codes_dtype(len(self._dictionaries[i])), lambda values: values)
+                tags, texts = zip(*self._dictionaries[i]) if self._dictionaries[i] else ((), ())
+                np.save(os.path.join(self.version_dir, entry['values_file']), np.array(texts, dtype=str))
+                # Columns of text alone (the usual case) need no types file
+                if any(tag != 'str' for tag in tags):
+                    entry['types_file'] = f"{i}.types.npy"
+                    np.save(os.path.join(self.version_dir, entry['types_file']), np.array(tags, dtype=str))
+            columns.append(entry)
+
+        manifest = {'version': self.version, 'rows': self.rows, 'columns': columns}
+        tmp_path = f"{self.manifest_path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        self.committed = True
+
+        _remove_old_versions(self.root, self.version)
+
+    def abort(self):
+        """Discard the files written so far"""
+        shutil.rmtree(self.version_dir, ignore_errors=True)
+
+    def _encode(self, i, values):
+        # Factorize the chunk, then map its few distinct values onto the
+        # column-wide dictionary; missing values get code -1
+        dictionary = self._dictionaries[i]
+        if pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty'):
+            groups = [None]
+        else:
+            # factorize treats 1, 1.0 and True as one value, so each Python
+            # type is factorized on its own
+            type_codes, types = pd.factorize(np.frompyfunc(type, 1, 1)(values))
+            groups = [type_codes == k for k in range(len(types))]
+
+        codes = np.full(len(values), -1, dtype=np.int32)
+        for mask in groups:
+            group_codes, uniques = pd.factorize(values if mask is None else values[mask])
+            mapping = np.array(
+                [dictionary.setdefault(_dictionary_key(value), len(dictionary)) for value in uniques] + [-1],
+                dtype=np.int32,
+            )
+            if mask is None:
+                codes = mapping[group_codes]
+            else:
+                codes[mask] = mapping[group_codes]
+        return codes
+
+    def _encode_part(self, i, part):
+        """Rewrite a plain chunk file as dictionary codes"""
+        _, part_name, _, rows = part
+        part_path = os.path.join(self.version_dir, part_name)
+        codes = self._encode(i, pd.Series(np.load(part_path)).to_numpy(dtype=object))
+        np.save(part_path, codes)
+        return 'text', part_name, codes.dtype, rows
+
+    @staticmethod
+    def _plain_dtype(parts):
+        """Common dtype of a column stored plain, or None if it must be text"""
+        # An empty chunk (e.g. a header-only file) says nothing about the type
+        # unless it is all there is
+        parts = [part for part in parts if part[3]] or parts
+        if not parts or any(part[0] == 'text' for part in parts):
+            return None
+        dtypes = [part[2] for part in parts]
+        kinds = {dtype.kind for dtype in dtypes}
+        if len(kinds) > 1 and (kinds & set('mMb')):
+            return None
+        return np.result_type(*dtypes)
+
+    def _merge(self, parts, file_name, dtype, convert):
+        out = np.lib.format.open_memmap(
+            os.path.join(self.version_dir, file_name), mode='w+', dtype=dtype, shape=(self.rows,)
+        )
+        offset = 0
+        for _, part_name, _, _ in parts:
+            part_path = os.path.join(self.version_dir, part_name)
+            values = convert(np.load(part_path))
+            out[offset:offset + len(values)] = values
+            offset += len(values)
+            os.remove(part_path)
+        out.flush()
+        del out
+
+
+def write_column_store(df, manifest_path):
+    """
+    Write a whole DataFrame as a new column store version and make it current
+
+    Args:
+        df (DataFrame): The dataset
+        manifest_path (str): Path of the store's manifest file
+    """
+    with ColumnStoreWriter(manifest_path) as writer:
+        writer.append(df)
+        writer.commit()
+
+
+def read_column_store(manifest_path):
+    """
+    Load the current version of a column store as a DataFrame
+
+    Plain columns are memory-mapped read-only, so every worker process
+    shares the same physical pages instead of holding its own copy.
+    Dictionary columns become Categoricals over their mapped codes; their
+    values are only materialized by operations that need them. A column
+    whose distinct values compare equal across types (1, 1.0 and True)
+    can't be a Categorical and is decoded to an object array instead.
+
+    Args:
+        manifest_path (str): Path of the store's manifest file
+
+    Returns:
+        DataFrame: The dataset, backed by the mapped column files
+    """
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    version_dir = os.path.join(os.path.dirname(manifest_path), manifest['version'])
+
+    data = {}
+    for entry in manifest['columns']:
+        values = np.load(os.path.join(version_dir, entry['file']), mmap_mode='r')
+        if entry['encoding'] == 'dictionary':
+            uniques = np.load(os.path.join(version_dir, entry['values_file']))
+            # Code -1 marks a missing value; it indexes the trailing None
+            lookup = np.empty(len(uniques) + 1, dtype=object)
+            lookup[:-1] = uniques.astype(object)
+            if 'types_file' in entry:
+                tags = np.load(os.path.join(version_dir, entry['types_file']))
+                for k in np.flatnonzero(tags != 'str'):
+                    lookup[k] = _DECODERS[tags[k]](str(uniques[k]))
+            try:
+                # Codes already in the dtype pandas picks are used without a copy
+                values = pd.Categorical.from_codes(
+                    values, dtype=pd.CategoricalDtype(pd.Index(lookup[:-1], dtype=object))
+                )
+            except ValueError:
+                values = lookup[values]
+        data[entry['name']] = values
+
+    # copy=False keeps each mapped array as its own block instead of
+    # consolidating same-typed columns into a new in-memory array
+    return pd.DataFrame(data, index=pd.RangeIndex(manifest['rows']), copy=False)
+
+
+def _codes_dtype(size):
+    """Smallest dtype for the codes of a dictionary, as pandas sizes Categorical codes"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if size < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _dictionary_key(value):
+    """(type tag, text) a distinct value is stored under"""
+    if isinstance(value, str):
+        return 'str', value
+    for tag, types, encode, _ in VALUE_TYPES:
+        if isinstance(value, types):
+            return tag, encode(value)
+    return 'str', str(value)
+
+
+def _remove_old_versions(root, current):
+    versions = sorted(
+        (entry for entry in os.scandir(root) if entry.is_dir() and entry.name != current),
+        key=lambda entry: entry.stat().st_mtime_ns,
+        reverse=True,
+    )
+    # Workers that already mapped an older version keep their pages after
+    # the unlink; on platforms that refuse to delete mapped files, the
+    # directory is left for the next publish to retry
+    for entry in versions[KEEP_PREVIOUS_VERSIONS:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
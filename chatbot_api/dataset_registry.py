@@ -0,0 +1,113 @@
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .column_store import MANIFEST_NAME, read_column_store
+from .dataset_store import DatasetStore, dataset_store
+from .metrics import dataset_registry_evictions, dataset_registry_loaded, dataset_registry_loads
+from .models import UploadedFile
+
+# Column stores of ingested uploads, one directory per distinct file content
+DATASETS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'datasets')
+
+
+class DatasetNotFound(Exception):
+    """Raised when a query asks for a dataset that doesn't exist or isn't ready yet"""
+
+
+def dataset_manifest(content_hash):
+    """Manifest path of the column store for an upload's content hash"""
+    return os.path.join(DATASETS_DIR, content_hash, MANIFEST_NAME)
+
+
+def parse_dataset_id(value):
+    """
+    Read the optional dataset id sent with a query
+
+    Args:
+        value: Raw value from the request body, or None
+
+    Returns:
+        int or None: The dataset id, or None for the default dataset
+
+    Raises:
+        ValueError: If the value is not an integer id
+    """
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid dataset_id '{value}'")
+
+
+class DatasetRegistry:
+    """
+    Per-worker LRU of loaded upload datasets, looked up by UploadedFile id
+
+    Dataset versions never change once ingested, so an id is resolved to its
+    column store once and the loaded snapshot is reused until it is evicted
+    by more recently used ones. Queries without an id get the default
+    dataset (Sample_data.xlsx).
+    """
+
+    def __init__(self, max_datasets=8):
+        self.max_datasets = max_datasets
+        self._manifests = {}
+        self._stores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id=None):
+        """
+        Return the snapshot of a dataset
+
+        Args:
+            dataset_id (int, optional): UploadedFile id; None for the default dataset
+
+        Returns:
+            DatasetSnapshot: The loaded dataset
+
+        Raises:
+            DatasetNotFound: If no successfully ingested upload has this id
+        """
+        if dataset_id is None:
+            return dataset_store.get()
+
+        manifest_path = self._manifests.get(dataset_id)
+        if manifest_path is None:
+            manifest_path = self._manifests.setdefault(dataset_id, self._resolve(dataset_id))
+
+        # Uploads with identical content share one loaded store
+        with self._lock:
+            store = self._stores.get(manifest_path)
+            if store is not None:
+                self._stores.move_to_end(manifest_path)
+        if store is None:
+            store = self._add(manifest_path, DatasetStore(manifest_path, loader=read_column_store))
+        return store.get()
+
+    def _resolve(self, dataset_id):
+        upload = UploadedFile.objects.filter(pk=dataset_id, status=UploadedFile.STATUS_SUCCEEDED).first()
+        if upload is None or not upload.content_hash:
+            raise DatasetNotFound(f"Dataset {dataset_id} not found or not ingested yet")
+        return dataset_manifest(upload.content_hash)
+
+    def _add(self, manifest_path, store):
+        with self._lock:
+            # Another thread may have added it while we were resolving
+            if manifest_path in self._stores:
+                self._stores.move_to_end(manifest_path)
+                return self._stores[manifest_path]
+            self._stores[manifest_path] = store
+            dataset_registry_loads.inc()
+            while len(self._stores) > self.max_datasets:
+                self._stores.popitem(last=False)
+                dataset_registry_evictions.inc()
+            dataset_registry_loaded.set(len(self._stores))
+            return store
+
+
+# Shared registry used by the query views
+dataset_registry = DatasetRegistry(max_datasets=getattr(settings, 'CHATBOT_MAX_LOADED_DATASETS', 8))
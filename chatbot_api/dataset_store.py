@@ -0,0 +1,206 @@
+import hashlib
+import os
+import threading
+import time
+
+import pandas as pd
+from django.conf import settings
+
+from .area_index import AreaIndex
+from .area_matcher import AreaMatcher
+from .column_store import MANIFEST_NAME, read_column_store
+from .ingest import build_column_store
+from .metrics import dataset_load_duration, dataset_lookups, dataset_rows
+from .schema import detect_schema
+from .timing import stage
+
+# File path for the Excel data
+EXCEL_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Sample_data.xlsx')
+
+# Memory-mapped, one-file-per-column copy of the dataset that queries load;
+# all gunicorn workers map the same files and share their pages
+DATASET_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Sample_data.columns')
+DATASET_MANIFEST = os.path.join(DATASET_DIR, MANIFEST_NAME)
+
+# Engines that can answer per-area lookups; see settings.CHATBOT_QUERY_ENGINE
+QUERY_ENGINES = ('pandas', 'sqlite')
+
+
+def query_engine():
+    """Return the configured query engine, 'pandas' unless settings say otherwise"""
+    engine = getattr(settings, 'CHATBOT_QUERY_ENGINE', 'pandas') if settings.configured else 'pandas'
+    if engine not in QUERY_ENGINES:
+        raise ValueError(f"Unknown CHATBOT_QUERY_ENGINE '{engine}'. Use one of: {', '.join(QUERY_ENGINES)}")
+    return engine
+
+
+class DatasetSnapshot:
+    """A parsed version of the dataset file, shared read-only by all requests"""
+
+    def __init__(self, df, path, mtime_ns, size, load_seconds):
+        self.df = df
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.schema = detect_schema(df)
+
+        with stage('index'):
+            # Area-name automaton used to pull areas out of queries
+            location_column = self.schema.location_column
+            self.area_matcher = AreaMatcher(df[location_column].unique() if location_column else [])
+
+            # Per-area lookups for trend and comparison queries: year-sorted
+            # arrays in memory, or an indexed table in the Django database
+            if query_engine() == 'sqlite' and path is not None:
+                from .sql_index import SQLAreaIndex, version_table
+
+                self.area_index = SQLAreaIndex(df, self.schema, version_table(path, mtime_ns, size))
+            else:
+                self.area_index = AreaIndex(df, self.schema)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build a snapshot for a DataFrame that did not come from a file"""
+        return cls(df, None, 0, 0, 0.0)
+
+    @property
+    def version(self):
+        return (self.mtime_ns, self.size)
+
+    @property
+    def version_hash(self):
+        """Short, stable identifier of this dataset version for cache keys"""
+        return hashlib.sha1(f"{self.path}:{self.mtime_ns}:{self.size}".encode('utf-8')).hexdigest()[:16]
+
+
+class DatasetStore:
+    """
+    Process-wide cache of the parsed dataset file
+
+    The file is parsed once and kept in memory until its mtime or size changes.
+    Only one thread re-parses the file at a time; while it does, other readers
+    keep getting the previous snapshot instead of waiting on the lock.
+
+    If `source` is given, `path` is a derived file: whenever `source` is newer
+    (or `path` is missing), `builder(source, path)` regenerates it first.
+    """
+
+    def __init__(self, path, loader=pd.read_excel, source=None, builder=None):
+        self.path = path
+        self.loader = loader
+        self.source = source
+        self.builder = builder
+        self._snapshot = None
+        self._stale = False
+        self._reload_lock = threading.Lock()
+
+    def get(self):
+        """
+        Return the current dataset snapshot, reloading it if the file changed
+
+        Returns:
+            DatasetSnapshot: The parsed dataset
+
+        Raises:
+            Exception: If the file cannot be read and no previous snapshot exists
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and not self._stale:
+            try:
+                current = not self._source_changed() and snapshot.version == self._file_version()
+            except OSError:
+                # Deleted or being replaced; the reload below serves the previous snapshot
+                current = False
+            if current:
+                self._count('hit')
+                return snapshot
+
+        self._count('miss')
+
+        # Serve the previous snapshot while another thread is reloading
+        if snapshot is not None:
+            if not self._reload_lock.acquire(blocking=False):
+                return snapshot
+        else:
+            self._reload_lock.acquire()
+
+        try:
+            # Another thread may have finished the reload while we waited
+            current = self._snapshot
+            try:
+                if self._source_changed():
+                    self._build()
+                version = self._file_version()
+                if current is not None and not self._stale and current.version == version:
+                    return current
+                return self._load(version)
+            except Exception as e:
+                self._count('reload_error')
+                if current is None:
+                    raise
+                print(f"Error reloading dataset, serving previous version: {str(e)}")
+                return current
+        finally:
+            self._reload_lock.release()
+
+    def _source_changed(self):
+        if self.source is None:
+            return False
+        try:
+            source_mtime = os.stat(self.source).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        try:
+            return source_mtime > os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return True
+
+    def _build(self):
+        start = time.perf_counter()
+        self.builder(self.source, self.path)
+        self._count('build')
+        print(f"Built {os.path.basename(self.path)} from {os.path.basename(self.source)} "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def _file_version(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, version):
+        start = time.perf_counter()
+        with stage('load'):
+            df = self.loader(self.path)
+        elapsed = time.perf_counter() - start
+
+        # Re-check the file in case it was replaced while we were parsing
+        if self._file_version() != version:
+            self._stale = True
+        else:
+            self._stale = False
+
+        snapshot = DatasetSnapshot(df, self.path, version[0], version[1], elapsed)
+        self._snapshot = snapshot
+
+        dataset_load_duration.observe(elapsed)
+        dataset_rows.labels(self._name()).set(len(df))
+        print(f"Loaded dataset {os.path.basename(self.path)} ({len(df)} rows) in {elapsed * 1000:.1f} ms")
+        return snapshot
+
+    def _name(self):
+        # Column stores are named after their directory (content hash or Sample_data.columns)
+        if os.path.basename(self.path) == MANIFEST_NAME:
+            return os.path.basename(os.path.dirname(self.path))
+        return os.path.basename(self.path)
+
+    def _count(self, result):
+        dataset_lookups.labels(self._name(), result).inc()
+
+
+# Default dataset, used by queries that don't name one. It loads the column
+# store, which is rebuilt whenever the workbook is newer
+dataset_store = DatasetStore(
+    DATASET_MANIFEST, loader=read_column_store, source=EXCEL_FILE, builder=build_column_store
+)
+
@@ -0,0 +1,174 @@
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from .column_store import ColumnStoreWriter
+
+# Parquet uploads need pyarrow
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+SUPPORTED_UPLOAD_TYPES = ('.xlsx', '.xls', '.csv', '.parquet')
+
+# Rows parsed and written per chunk; peak memory while ingesting grows with
+# this, not with the size of the file
+DEFAULT_CHUNK_ROWS = 50000
+
+
+def iter_upload_chunks(path, ext, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Parse a dataset file incrementally
+
+    Args:
+        path (str): Where the upload was saved
+        ext (str): Lowercase file extension, one of SUPPORTED_UPLOAD_TYPES
+        chunk_rows (int): Maximum number of rows per chunk
+
+    Yields:
+        DataFrame: Consecutive chunks of rows, all with the file's header
+    """
+    if ext == '.xlsx':
+        yield from _iter_workbook_chunks(path, chunk_rows)
+    elif ext == '.xls':
+        # xlrd has no streaming mode, so legacy workbooks are parsed whole
+        yield pd.read_excel(path)
+    elif ext == '.csv':
+        yield from _iter_csv_chunks(path, chunk_rows)
+    elif ext == '.parquet':
+        if not PARQUET_AVAILABLE:
+            raise ValueError("Parquet uploads require the pyarrow package")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported file type '{ext}'. Upload one of: {', '.join(SUPPORTED_UPLOAD_TYPES)}")
+
+
+def ingest_file(path, ext, manifest_path, chunk_rows=DEFAULT_CHUNK_ROWS, progress=None):
+    """
+    Stream a dataset file into a new column store version and make it current
+
+    Chunks are written as they are parsed. If any chunk fails to parse, the
+    partly written version is discarded and the current one stays in place.
+
+    Args:
+        path (str): Dataset file to read
+        ext (str): Lowercase file extension, one of SUPPORTED_UPLOAD_TYPES
+        manifest_path (str): Manifest of the column store to publish to
+        chunk_rows (int): Maximum number of rows parsed at once
+        progress (callable, optional): Called as progress(rows, chunks) after each chunk
+
+    Returns:
+        dict: Number of rows and chunks ingested
+    """
+    with ColumnStoreWriter(manifest_path) as writer:
+        for chunk in iter_upload_chunks(path, ext, chunk_rows):
+            writer.append(chunk)
+            if progress:
+                progress(writer.rows, writer.chunks)
+        writer.commit()
+    return {'rows': writer.rows, 'chunks': writer.chunks}
+
+
+def build_column_store(source, manifest_path, chunk_rows=None):
+    """
+    Convert a workbook to the memory-mapped column store queries are served from
+
+    chunk_rows defaults to the CHATBOT_INGEST_CHUNK_ROWS setting, like uploads.
+    """
+    if chunk_rows is None:
+        from django.conf import settings
+        chunk_rows = getattr(settings, 'CHATBOT_INGEST_CHUNK_ROWS', DEFAULT_CHUNK_ROWS)
+    ingest_file(source, '.xlsx', manifest_path, chunk_rows)
+
+
+def _csv_value_kind(series):
+    if series.isna().all():
+        return None
+    if series.dtype == bool or pd.api.types.infer_dtype(series, skipna=True) == 'boolean':
+        return 'bool'
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return 'number'
+    return 'text'
+
+
+def _iter_csv_chunks(path, chunk_rows):
+    # pd.read_csv infers each chunk's types on its own, so a column with a
+    # stray text cell would come back as numbers in some chunks and text in
+    # others. A first pass finds the columns pd.read_csv reads as text from
+    # the whole file (any text, or booleans mixed with numbers); the second
+    # reads them as str in every chunk
+    kinds = {}
+    first = None
+    chunks = 0
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        for column in chunk.columns:
+            kinds.setdefault(column, set()).add(_csv_value_kind(chunk[column]))
+        first = chunk if first is None else first
+        chunks += 1
+    if chunks == 1:
+        # A single chunk was already inferred from the whole file
+        yield first
+        return
+
+    text_columns = {
+        column: str for column, seen in kinds.items() if 'text' in seen or {'bool', 'number'} <= seen
+    }
+    yield from pd.read_csv(path, chunksize=chunk_rows, dtype=text_columns or None)
+
+
+def _convert_cell(cell):
+    # Same conversions as pandas' openpyxl reader, so chunks parse exactly
+    # like pd.read_excel would parse the whole sheet
+    if cell.value is None:
+        return ""
+    if cell.data_type == 'e':
+        return float('nan')
+    if cell.data_type == 'n':
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+
+def _iter_workbook_chunks(path, chunk_rows):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+        header = None
+        batch = []
+        blank_rows = 0
+        chunks = 0
+        for row in sheet.rows:
+            values = [_convert_cell(cell) for cell in row]
+            while values and values[-1] == "":
+                values.pop()
+            if header is None:
+                header = values
+                continue
+            # Blank rows only count once data follows them; trailing ones are dropped
+            if not values:
+                blank_rows += 1
+                continue
+            batch.extend([[] for _ in range(blank_rows)])
+            blank_rows = 0
+            if len(values) > len(header):
+                raise ValueError(f"A row has {len(values)} cells but the header only has {len(header)}")
+            batch.append(values)
+            if len(batch) >= chunk_rows:
+                yield _parse_rows(header, batch)
+                batch = []
+                chunks += 1
+        if header is not None and (batch or not chunks):
+            yield _parse_rows(header, batch)
+    finally:
+        workbook.close()
+
+
+def _parse_rows(header, rows):
+    width = len(header)
+    data = [header] + [row + [""] * (width - len(row)) for row in rows]
+    return TextParser(data, header=0, skip_blank_lines=False).read()
@@ -0,0 +1,159 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .column_store import read_column_store
+from .dataset_registry import dataset_manifest
+from .ingest import DEFAULT_CHUNK_ROWS, ingest_file
+from .models import UploadedFile
+from .schema import detect_schema
+from .warmup import submit_warmup
+
+# Uploads are ingested one at a time, in the order they arrived
+_ingest_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest')
+
+# Jobs that can still be waiting in, or running on, an ingestion queue
+PENDING_STATUSES = (UploadedFile.STATUS_QUEUED, UploadedFile.STATUS_RUNNING)
+
+
+def _process_token(pid):
+    """
+    Identify a running process, or return None if it isn't running
+
+    Where /proc exists this is the process start time, so a pid reused by a
+    later process (e.g. after a container restart) doesn't match.
+    """
+    if os.path.isdir('/proc'):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # Field 22 (starttime); the command name before it may contain spaces
+                return f.read().rsplit(')', 1)[1].split()[19]
+        except (OSError, IndexError):
+            return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        pass
+    return 'running'
+
+
+def worker_id():
+    """Identify this process on the uploads whose ingestion it queues"""
+    pid = os.getpid()
+    return f"{pid}:{_process_token(pid)}"
+
+
+def _worker_alive(worker):
+    pid, _, token = worker.partition(':')
+    try:
+        return _process_token(int(pid)) == token
+    except ValueError:
+        return False
+
+
+def submit_ingestion(upload_id):
+    """
+    Queue an UploadedFile for ingestion in the background
+
+    Args:
+        upload_id (int): Primary key of a queued UploadedFile
+
+    Returns:
+        Future: Completes when the job has finished, successfully or not
+    """
+    return _ingest_executor.submit(run_ingestion, upload_id)
+
+
+def recover_ingestion_jobs():
+    """
+    Re-queue uploads whose ingestion was lost with the process that owned it
+
+    Jobs only live in their worker's in-memory queue, so when a worker exits
+    (restart, deploy, max_requests recycling) its queued and running uploads
+    would stay pending forever. Every worker calls this once it has started
+    (gunicorn.conf.py); the conditional update hands each abandoned job to
+    exactly one of them. Owners are checked by pid, so all workers sharing
+    the database are assumed to run on one machine, as with SQLite.
+
+    Returns:
+        list: Ids of the re-queued uploads
+    """
+    me = worker_id()
+    recovered = []
+    pending = UploadedFile.objects.filter(status__in=PENDING_STATUSES).exclude(worker=me)
+    for upload_id, worker in pending.values_list('pk', 'worker'):
+        if _worker_alive(worker):
+            continue
+        claimed = UploadedFile.objects.filter(pk=upload_id, worker=worker, status__in=PENDING_STATUSES).update(
+            status=UploadedFile.STATUS_QUEUED, worker=me, started_at=None, rows=None, chunks=None
+        )
+        if claimed:
+            print(f"Re-queued upload {upload_id}, abandoned by worker {worker or 'unknown'}")
+            submit_ingestion(upload_id)
+            recovered.append(upload_id)
+    return recovered
+
+
+def run_ingestion(upload_id):
+    """
+    Ingest one queued upload into its own dataset and record the outcome
+
+    The column store is keyed by the upload's content hash; if the same
+    bytes were ingested before, that store is reused as-is. Other datasets,
+    including the default one, are never touched.
+
+    Args:
+        upload_id (int): Primary key of a queued UploadedFile
+    """
+    jobs = UploadedFile.objects.filter(pk=upload_id)
+    try:
+        # Claim the job atomically so it is never ingested twice
+        claimed = jobs.filter(status=UploadedFile.STATUS_QUEUED).update(
+            status=UploadedFile.STATUS_RUNNING, started_at=timezone.now()
+        )
+        if not claimed:
+            return
+        upload = jobs.get()
+        name = upload.original_name or os.path.basename(upload.file.name)
+        ext = os.path.splitext(name)[1].lower()
+        manifest_path = dataset_manifest(upload.content_hash)
+
+        def report_progress(rows, chunks):
+            jobs.update(rows=rows, chunks=chunks)
+            print(f"Ingested {rows} rows of {name} ({chunks} chunks)")
+
+        chunk_rows = getattr(settings, 'CHATBOT_INGEST_CHUNK_ROWS', DEFAULT_CHUNK_ROWS)
+        try:
+            if os.path.exists(manifest_path):
+                print(f"Reusing the dataset already ingested for {name}")
+                chunks = None
+            else:
+                chunks = ingest_file(upload.file.path, ext, manifest_path, chunk_rows, progress=report_progress)['chunks']
+            df = read_column_store(manifest_path)
+            schema = detect_schema(df)
+        except Exception as e:
+            # The writer has already removed its own unfinished version; the
+            # content-hash directory stays, as another upload of the same
+            # bytes may be writing its version there right now
+            print(f"Error ingesting {name}: {str(e)}")
+            jobs.update(status=UploadedFile.STATUS_FAILED, error=str(e), finished_at=timezone.now())
+            return
+
+        jobs.update(
+            status=UploadedFile.STATUS_SUCCEEDED,
+            rows=len(df),
+            chunks=chunks,
+            finished_at=timezone.now(),
+            columns=[{"name": col, "type": schema.column_types[col]} for col in df.columns],
+            detected_columns=schema.roles(),
+        )
+        if getattr(settings, 'CHATBOT_WARMUP_ENABLED', False):
+            submit_warmup(upload_id)
+    finally:
+        # Worker threads don't go through the request cycle that closes connections
+        connection.close()
@@ -1,8 +1,13 @@
+import asyncio
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 # Simple version for free tier deployment
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI, OpenAI
     from dotenv import load_dotenv
     # Load environment variables
     load_dotenv()
@@ -11,71 +16,449 @@ try:
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     if OPENAI_API_KEY:
         client = OpenAI(api_key=OPENAI_API_KEY)
+        # Async client for ASGI views, so LLM round-trips don't hold a thread
+        async_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
     else:
         client = None
+        async_client = None
         print("Warning: OPENAI_API_KEY not found. Will use fallback summary generation.")
 except ImportError:
     # If openai or dotenv packages aren't installed, use fallback mode
     client = None
+    async_client = None
     print("OpenAI and/or dotenv packages not installed. Using fallback summary generation.")
 
-def generate_summary(data_context, query):
+# Imported after load_dotenv() so SUMMARY_CACHE_* variables from .env apply
+from .circuit_breaker import CircuitBreaker
+from .metrics import llm_call, llm_duration, llm_summaries
+from .summary_batcher import SummaryBatcher
+from .summary_cache import summary_cache, summary_cache_key
+
+# Completion settings shared by the blocking, async and streaming calls
+COMPLETION_OPTIONS = {
+    'model': "gpt-3.5-turbo",
+    'max_tokens': 150,
+    'temperature': 0.7,
+}
+
+# Defaults for the CHATBOT_LLM_* settings in realestate_project/settings.py
+LLM_DEFAULTS = {
+    'CHATBOT_LLM_TIMEOUT': 8.0,
+    'CHATBOT_LLM_REQUEST_TIMEOUT': 30.0,
+    'CHATBOT_LLM_CACHE_LATE_RESULTS': True,
+    'CHATBOT_LLM_MAX_CONCURRENCY': 16,
+    'CHATBOT_LLM_BREAKER_THRESHOLD': 5,
+    'CHATBOT_LLM_BREAKER_RESET': 30.0,
+    'CHATBOT_LLM_BATCH_SIZE': 1,
+    'CHATBOT_LLM_BATCH_WAIT': 0.02,
+}
+
+def llm_setting(name):
+    """Read a CHATBOT_LLM_* setting, falling back to LLM_DEFAULTS outside Django"""
+    from django.conf import settings
+    if settings.configured:
+        return getattr(settings, name, LLM_DEFAULTS[name])
+    return LLM_DEFAULTS[name]
+
+# Blocking calls run here so the request thread can stop waiting at its deadline
+_llm_executor = ThreadPoolExecutor(max_workers=llm_setting('CHATBOT_LLM_MAX_CONCURRENCY'), thread_name_prefix='llm')
+
+# Skips the LLM entirely after repeated failures or missed deadlines
+llm_breaker = CircuitBreaker(
+    failure_threshold=llm_setting('CHATBOT_LLM_BREAKER_THRESHOLD'),
+    reset_timeout=llm_setting('CHATBOT_LLM_BREAKER_RESET'),
+)
+
+def build_messages(data_context, query):
+    """
+    Build the chat messages sent to the OpenAI model for a summary
+
+    Args:
+        data_context (dict): Dictionary containing real estate data context
+        query (str): User's query
+
+    Returns:
+        list: Messages for client.chat.completions.create
+    """
+    # Extract key information from data context
+    area_info = data_context.get('area_info', 'No specific area')
+    price_info = data_context.get('price_info', 'No price data available')
+    demand_info = data_context.get('demand_info', 'No demand data available')
+    trend_info = data_context.get('trend_info', 'No trend data available')
+    
+    # Create a prompt for the OpenAI model
+    prompt = f"""
+    You are a real estate analysis assistant. Generate a comprehensive and insightful summary
+    based on the following data:
+
+    User Query: {query}
+    Area: {area_info}
+    Price Information: {price_info}
+    Demand Information: {demand_info}
+    Trends: {trend_info}
+
+    Provide a natural-sounding, intelligent analysis that a real estate professional might give.
+    Include insights about pricing trends, demand patterns, and investment potential where relevant.
+    Keep the summary concise (2-3 sentences) but insightful.
+    """
+    
+    return [
+        {"role": "system", "content": "You are a real estate analysis expert providing concise, insightful summaries."},
+        {"role": "user", "content": prompt}
+    ]
+
+def build_batch_messages(items):
+    """
+    Build one set of chat messages asking for several summaries at once
+
+    Args:
+        items (list): (data_context, query, cache_key) tuples
+
+    Returns:
+        list: Messages for client.chat.completions.create; the reply is a
+        JSON object {"summaries": [{"id": ..., "summary": ...}]}
+    """
+    requests = [
+        {
+            'id': str(i),
+            'query': query,
+            'area': data_context.get('area_info', 'No specific area'),
+            'price': data_context.get('price_info', 'No price data available'),
+            'demand': data_context.get('demand_info', 'No demand data available'),
+            'trends': data_context.get('trend_info', 'No trend data available'),
+        }
+        for i, (data_context, query, _) in enumerate(items, 1)
+    ]
+    
+    prompt = f"""
+    You are a real estate analysis assistant. For each request below, generate a comprehensive
+    and insightful summary based only on that request's data.
+
+    Provide a natural-sounding, intelligent analysis that a real estate professional might give.
+    Include insights about pricing trends, demand patterns, and investment potential where relevant.
+    Keep each summary concise (2-3 sentences) but insightful.
+
+    Reply with a JSON object of the form {{"summaries": [{{"id": "<request id>", "summary": "<text>"}}]}}
+    containing one entry for every request.
+
+    Requests:
+    {json.dumps(requests)}
+    """
+    
+    return [
+        {"role": "system", "content": "You are a real estate analysis expert providing concise, insightful summaries."},
+        {"role": "user", "content": prompt}
+    ]
+
+def generate_summary(data_context, query, timeout=None):
     """
     Generate an intelligent summary of real estate data using OpenAI API
     
     Args:
         data_context (dict): Dictionary containing real estate data context
         query (str): User's query
+        timeout (float): Seconds to wait for the LLM, defaults to CHATBOT_LLM_TIMEOUT
     
     Returns:
         str: An intelligent summary of the data
     """
+    return summarize(data_context, query, timeout)[0]
+
+def summarize(data_context, query, timeout=None):
+    """
+    Generate a summary within a latency budget
+    
+    If the LLM misses the deadline the fallback summary is returned straight
+    away; the late completion is still written to the summary cache so the
+    next identical request gets it.
+    
+    Args:
+        data_context (dict): Dictionary containing real estate data context
+        query (str): User's query
+        timeout (float): Seconds to wait for the LLM, defaults to CHATBOT_LLM_TIMEOUT
+    
+    Returns:
+        tuple: (summary, degraded) where degraded is True when an LLM is
+        configured but the fallback had to be used
+    """
     # If OpenAI client isn't initialized, use fallback summary
     if client is None:
-        return generate_fallback_summary(data_context, query)
-        
+        llm_summaries.labels('fallback').inc()
+        return generate_fallback_summary(data_context, query), False
+    
+    # Identical data and intent produce the same summary, so skip the network
+    cache_key = summary_cache_key(data_context, query)
+    cached_summary = summary_cache.get(cache_key)
+    if cached_summary is not None:
+        llm_summaries.labels('cache').inc()
+        return cached_summary, False
+    
+    if not llm_breaker.allow():
+        llm_summaries.labels('degraded').inc()
+        return generate_fallback_summary(data_context, query), True
+    
+    if timeout is None:
+        timeout = llm_setting('CHATBOT_LLM_TIMEOUT')
+    
+    # Batched completions report to the breaker themselves, once per completion
+    batched = llm_setting('CHATBOT_LLM_BATCH_SIZE') > 1
+    if batched:
+        future = summary_batcher.submit(data_context, query, cache_key)
+    else:
+        future = _llm_executor.submit(_complete, data_context, query, cache_key)
+    succeeded = False
     try:
-        # Extract key information from data context
-        area_info = data_context.get('area_info', 'No specific area')
-        price_info = data_context.get('price_info', 'No price data available')
-        demand_info = data_context.get('demand_info', 'No demand data available')
-        trend_info = data_context.get('trend_info', 'No trend data available')
-        
-        # Create a prompt for the OpenAI model
-        prompt = f"""
-        You are a real estate analysis assistant. Generate a comprehensive and insightful summary
-        based on the following data:
-
-        User Query: {query}
-        Area: {area_info}
-        Price Information: {price_info}
-        Demand Information: {demand_info}
-        Trends: {trend_info}
-
-        Provide a natural-sounding, intelligent analysis that a real estate professional might give.
-        Include insights about pricing trends, demand patterns, and investment potential where relevant.
-        Keep the summary concise (2-3 sentences) but insightful.
-        """
-        
-        # Call OpenAI API
+        summary = future.result(timeout=timeout)
+        succeeded = True
+        llm_summaries.labels('llm').inc()
+        return summary, False
+    
+    except FutureTimeoutError:
+        print(f"OpenAI summary missed its {timeout:.1f}s deadline, using fallback")
+        if not llm_setting('CHATBOT_LLM_CACHE_LATE_RESULTS'):
+            future.cancel()
+        llm_summaries.labels('degraded').inc()
+        return generate_fallback_summary(data_context, query), True
+    
+    except Exception as e:
+        print(f"Error generating summary with OpenAI: {str(e)}")
+        llm_summaries.labels('degraded').inc()
+        return generate_fallback_summary(data_context, query), True
+    
+    finally:
+        if not batched:
+            if succeeded:
+                llm_breaker.record_success()
+            else:
+                llm_breaker.record_failure()
+
+def _complete(data_context, query, cache_key):
+    """Run one blocking completion and cache its result, even if it arrives late"""
+    start = time.perf_counter()
+    with llm_call('single'):
+        response = client.chat.completions.create(
+            messages=build_messages(data_context, query),
+            timeout=llm_setting('CHATBOT_LLM_REQUEST_TIMEOUT'),
+            **COMPLETION_OPTIONS
+        )
+    
+    # Get the summary from the response
+    summary = response.choices[0].message.content.strip()
+    summary_cache.set(cache_key, summary, time.perf_counter() - start)
+    return summary
+
+def _complete_batch(items):
+    """
+    Summarize several data contexts with one completion and cache each result
+
+    A batch of one uses the regular single-summary prompt. Requests missing
+    from a batch reply are completed on their own.
+
+    Args:
+        items (list): (data_context, query, cache_key) tuples
+
+    Returns:
+        list: Summaries, in the same order as items
+    """
+    if len(items) == 1:
+        return [_complete(*items[0])]
+    
+    start = time.perf_counter()
+    options = dict(COMPLETION_OPTIONS, max_tokens=COMPLETION_OPTIONS['max_tokens'] * len(items))
+    with llm_call('batch'):
         response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a real estate analysis expert providing concise, insightful summaries."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=150,
-            temperature=0.7
+            messages=build_batch_messages(items),
+            response_format={"type": "json_object"},
+            timeout=llm_setting('CHATBOT_LLM_REQUEST_TIMEOUT'),
+            **options
+        )
+    latency = time.perf_counter() - start
+    
+    try:
+        entries = json.loads(response.choices[0].message.content)['summaries']
+        by_id = {str(entry['id']): str(entry['summary']).strip() for entry in entries}
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Could not parse batched summary reply: {str(e)}")
+        by_id = {}
+    
+    summaries = []
+    for i, (data_context, query, cache_key) in enumerate(items, 1):
+        summary = by_id.get(str(i))
+        if summary:
+            summary_cache.set(cache_key, summary, latency)
+        else:
+            summary = _complete(data_context, query, cache_key)
+        summaries.append(summary)
+    return summaries
+
+# Combines summaries requested within CHATBOT_LLM_BATCH_WAIT seconds of each
+# other into completions of up to CHATBOT_LLM_BATCH_SIZE summaries
+summary_batcher = SummaryBatcher(
+    _complete_batch,
+    _llm_executor,
+    max_batch=llm_setting('CHATBOT_LLM_BATCH_SIZE'),
+    max_wait=llm_setting('CHATBOT_LLM_BATCH_WAIT'),
+    breaker=llm_breaker,
+    slow_after=llm_setting('CHATBOT_LLM_TIMEOUT'),
+)
+
+async def agenerate_summary(data_context, query, timeout=None):
+    """
+    Async version of generate_summary using the async OpenAI client
+    
+    Args:
+        data_context (dict): Dictionary containing real estate data context
+        query (str): User's query
+        timeout (float): Seconds to wait for the LLM, defaults to CHATBOT_LLM_TIMEOUT
+    
+    Returns:
+        str: An intelligent summary of the data
+    """
+    return (await asummarize(data_context, query, timeout))[0]
+
+async def asummarize(data_context, query, timeout=None):
+    """Async version of summarize; returns (summary, degraded)"""
+    if async_client is None:
+        llm_summaries.labels('fallback').inc()
+        return generate_fallback_summary(data_context, query), False
+    
+    cache_key = summary_cache_key(data_context, query)
+    cached_summary = summary_cache.get(cache_key)
+    if cached_summary is not None:
+        llm_summaries.labels('cache').inc()
+        return cached_summary, False
+    
+    if not llm_breaker.allow():
+        llm_summaries.labels('degraded').inc()
+        return generate_fallback_summary(data_context, query), True
+    
+    if timeout is None:
+        timeout = llm_setting('CHATBOT_LLM_TIMEOUT')
+    
+    # Shield the call so a missed deadline doesn't cancel it and the late
+    # result can still be cached
+    task = asyncio.ensure_future(_acomplete(data_context, query, cache_key))
+    succeeded = False
+    try:
+        summary = await asyncio.wait_for(asyncio.shield(task), timeout)
+        succeeded = True
+        llm_summaries.labels('llm').inc()
+        return summary, False
+    
+    except asyncio.TimeoutError:
+        print(f"OpenAI summary missed its {timeout:.1f}s deadline, using fallback")
+        if llm_setting('CHATBOT_LLM_CACHE_LATE_RESULTS'):
+            # Retrieve the late task's exception, if any, so it isn't logged as unhandled
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        else:
+            task.cancel()
+        llm_summaries.labels('degraded').inc()
+        return generate_fallback_summary(data_context, query), True
+    
+    except Exception as e:
+        print(f"Error generating summary with OpenAI: {str(e)}")
+        llm_summaries.labels('degraded').inc()
+        return generate_fallback_summary(data_context, query), True
+    
+    finally:
+        # Also reached when the request is cancelled mid-call; an abandoned
+        # call counts as a failure so a half-open breaker gets its outcome
+        if succeeded:
+            llm_breaker.record_success()
+        else:
+            llm_breaker.record_failure()
+
+async def _acomplete(data_context, query, cache_key):
+    start = time.perf_counter()
+    with llm_call('async'):
+        response = await async_client.chat.completions.create(
+            messages=build_messages(data_context, query),
+            timeout=llm_setting('CHATBOT_LLM_REQUEST_TIMEOUT'),
+            **COMPLETION_OPTIONS
+        )
+    
+    summary = response.choices[0].message.content.strip()
+    summary_cache.set(cache_key, summary, time.perf_counter() - start)
+    return summary
+
+def stream_summary(data_context, query, timeout=None):
+    """
+    Stream an intelligent summary from the OpenAI API as it is generated
+    
+    Args:
+        data_context (dict): Dictionary containing real estate data context
+        query (str): User's query
+        timeout (float): Seconds to wait for each chunk, defaults to CHATBOT_LLM_TIMEOUT
+    
+    Yields:
+        tuple: ('delta', text) for each chunk of the completion, then
+        ('summary', full summary). When the API is unavailable or fails,
+        only a final ('summary', text) or ('fallback', text) is produced;
+        'fallback' means an LLM is configured but could not be used.
+    """
+    if client is None:
+        llm_summaries.labels('fallback').inc()
+        yield 'summary', generate_fallback_summary(data_context, query)
+        return
+    
+    cache_key = summary_cache_key(data_context, query)
+    cached_summary = summary_cache.get(cache_key)
+    if cached_summary is not None:
+        llm_summaries.labels('cache').inc()
+        yield 'summary', cached_summary
+        return
+    
+    if not llm_breaker.allow():
+        llm_summaries.labels('degraded').inc()
+        yield 'fallback', generate_fallback_summary(data_context, query)
+        return
+    
+    if timeout is None:
+        timeout = llm_setting('CHATBOT_LLM_TIMEOUT')
+    
+    start = time.perf_counter()
+    succeeded = False
+    try:
+        # The HTTP timeout bounds the wait for the first and each next chunk
+        stream = client.chat.completions.create(
+            messages=build_messages(data_context, query),
+            stream=True,
+            timeout=timeout,
+            **COMPLETION_OPTIONS
         )
         
-        # Get the summary from the response
-        summary = response.choices[0].message.content.strip()
+        parts = []
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield 'delta', delta
         
-        return summary
+        summary = "".join(parts).strip()
+        summary_cache.set(cache_key, summary, time.perf_counter() - start)
+        succeeded = True
+        llm_summaries.labels('llm').inc()
+        llm_duration.labels('stream', 'ok').observe(time.perf_counter() - start)
     
     except Exception as e:
-        print(f"Error generating summary with OpenAI: {str(e)}")
-        return generate_fallback_summary(data_context, query)
+        print(f"Error streaming summary with OpenAI: {str(e)}")
+        llm_summaries.labels('degraded').inc()
+        llm_duration.labels('stream', 'error').observe(time.perf_counter() - start)
+        yield 'fallback', generate_fallback_summary(data_context, query)
+        return
+    
+    finally:
+        # Also reached when the client disconnects and the generator is
+        # closed mid-stream; an abandoned call counts as a failure so a
+        # half-open breaker gets its outcome
+        if succeeded:
+            llm_breaker.record_success()
+        else:
+            llm_breaker.record_failure()
+    
+    yield 'summary', summary
 
 def generate_fallback_summary(data_context, query):
     """
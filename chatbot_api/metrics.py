@@ -0,0 +1,158 @@
+import os
+import time
+from contextlib import contextmanager
+
+from django.http import HttpResponse
+
+# Worker processes write their samples to files in this directory and
+# /metrics sums them, so counts are correct across gunicorn workers. It must
+# be set before prometheus_client is imported; run.sh sets and clears it.
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+# prometheus_client is optional; without it the metrics below are no-ops
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    Counter = Gauge = Histogram = None
+    PROMETHEUS_AVAILABLE = False
+
+from .timing import HISTOGRAM_BUCKETS
+
+# Response body sizes, in bytes
+PAYLOAD_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class _NoopMetric:
+    """Stands in for a metric when prometheus_client isn't installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, value):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def _metric(metric_class, name, documentation, labelnames=(), **kwargs):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoopMetric()
+    return metric_class(name, documentation, labelnames, **kwargs)
+
+
+http_requests = _metric(
+    Counter, 'chatbot_http_requests_total', 'HTTP responses by route and status code', ['route', 'status'],
+)
+response_size = _metric(
+    Histogram, 'chatbot_response_size_bytes', 'Size of non-streaming response bodies', ['route'],
+    buckets=PAYLOAD_BUCKETS,
+)
+stage_duration = _metric(
+    Histogram, 'chatbot_stage_duration_seconds', 'Time spent in each request stage', ['route', 'stage'],
+    buckets=HISTOGRAM_BUCKETS,
+)
+query_duration = _metric(
+    Histogram, 'chatbot_query_duration_seconds', 'End-to-end query latency by intent', ['intent', 'cache'],
+    buckets=HISTOGRAM_BUCKETS,
+)
+llm_duration = _metric(
+    Histogram, 'chatbot_llm_request_duration_seconds', 'Latency of OpenAI completion calls', ['kind', 'outcome'],
+    buckets=HISTOGRAM_BUCKETS,
+)
+llm_summaries = _metric(
+    Counter, 'chatbot_llm_summaries_total',
+    'Summaries by source: llm, cache, fallback (no LLM configured) or degraded (timeout, error, breaker open)',
+    ['source'],
+)
+llm_batch_size = _metric(
+    Histogram, 'chatbot_llm_batch_size', 'Summary requests combined into each batched completion',
+    buckets=(1, 2, 4, 8, 16, 32),
+)
+response_cache_lookups = _metric(
+    Counter, 'chatbot_response_cache_lookups_total', 'Response cache lookups by result (hit or miss)', ['result'],
+)
+summary_cache_lookups = _metric(
+    Counter, 'chatbot_summary_cache_lookups_total', 'Summary cache lookups by result (hit or miss)', ['result'],
+)
+summary_cache_saved = _metric(
+    Counter, 'chatbot_summary_cache_saved_seconds_total',
+    'LLM latency avoided by summary cache hits, as measured when each summary was generated',
+)
+summary_cache_entries = _metric(
+    Gauge, 'chatbot_summary_cache_entries', 'Summaries held in memory by the summary cache',
+    multiprocess_mode='livesum',
+)
+dataset_lookups = _metric(
+    Counter, 'chatbot_dataset_lookups_total',
+    'Dataset snapshot lookups: hit (current version in memory), miss, reload_error (previous version served) '
+    'or build (column store rebuilt from its workbook)',
+    ['dataset', 'result'],
+)
+dataset_registry_loads = _metric(
+    Counter, 'chatbot_dataset_registry_loads_total', 'Upload datasets added to a worker\'s dataset registry',
+)
+dataset_registry_evictions = _metric(
+    Counter, 'chatbot_dataset_registry_evictions_total',
+    'Upload datasets dropped from a worker\'s dataset registry to stay within CHATBOT_MAX_LOADED_DATASETS',
+)
+dataset_registry_loaded = _metric(
+    Gauge, 'chatbot_dataset_registry_loaded', 'Upload datasets currently held by dataset registries',
+    multiprocess_mode='livesum',
+)
+dataset_load_duration = _metric(
+    Histogram, 'chatbot_dataset_load_seconds', 'Time to load a dataset version', buckets=HISTOGRAM_BUCKETS,
+)
+dataset_rows = _metric(
+    Gauge, 'chatbot_dataset_rows', 'Rows in the most recently loaded version of a dataset', ['dataset'],
+    multiprocess_mode='mostrecent',
+)
+
+
+def observe_request(route, status_code, timings, payload_size=None):
+    """
+    Record one finished request
+
+    Args:
+        route (str): URL name of the view
+        status_code (int): HTTP status of the response
+        timings (dict): Stage name -> seconds, as collected by ServerTimingMiddleware
+        payload_size (int, optional): Body size in bytes; None for streaming responses
+    """
+    http_requests.labels(route, str(status_code)).inc()
+    for name, seconds in timings.items():
+        stage_duration.labels(route, name).observe(seconds)
+    if payload_size is not None:
+        response_size.labels(route).observe(payload_size)
+
+
+@contextmanager
+def llm_call(kind):
+    """Time an OpenAI completion call, labelled 'ok' or 'error' by how it ended"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        llm_duration.labels(kind, 'error').observe(time.perf_counter() - start)
+        raise
+    llm_duration.labels(kind, 'ok').observe(time.perf_counter() - start)
+
+
+def metrics_view(request):
+    """Serve all metrics in the Prometheus text format"""
+    if not PROMETHEUS_AVAILABLE:
+        return HttpResponse("prometheus_client is not installed\n", status=503, content_type='text/plain')
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,109 @@
+import json
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .metrics import observe_request
+from .timing import finish_request, server_timing_header, start_request
+
+
+class AsyncWhiteNoiseMiddleware:
+    """
+    WhiteNoise wrapper that lets async views stay async
+
+    WhiteNoiseMiddleware is sync-only, so under ASGI Django would run every
+    request through it on a single shared thread, serializing the async query
+    view. This wrapper only hands static-file requests to WhiteNoise and
+    awaits everything else directly.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.whitenoise = WhiteNoiseMiddleware(get_response)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.whitenoise(request)
+
+    async def __acall__(self, request):
+        if request.path_info.startswith(self.whitenoise.static_prefix):
+            response = await sync_to_async(self.whitenoise.process_request, thread_sensitive=False)(request)
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+
+class ServerTimingMiddleware:
+    """
+    Reports where each request spent its time
+
+    Stages recorded by the instrumented code (dataset load, schema detection,
+    analysis, LLM summary, NaN cleanup, rendering, ...) are sent back in a
+    Server-Timing header, added to the per-route Prometheus histograms served
+    at /metrics and, with CHATBOT_TIMING_LOG, printed as one JSON line per
+    request.
+    Streaming responses only report the stages that ran before the first byte.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.log = getattr(settings, 'CHATBOT_TIMING_LOG', False)
+        self.allow_origin = getattr(settings, 'CHATBOT_TIMING_ALLOW_ORIGIN', '*')
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings, token = start_request()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.report(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings, token = start_request()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.report(request, response, timings, time.perf_counter() - start)
+
+    def report(self, request, response, timings, total):
+        timings['total'] = total
+        response['Server-Timing'] = server_timing_header(timings)
+        if self.allow_origin:
+            # Lets browser JS on other origins read the Server-Timing entries
+            response['Timing-Allow-Origin'] = self.allow_origin
+
+        match = request.resolver_match
+        route = match.url_name if match is not None and match.url_name else 'unmatched'
+        payload_size = None if response.streaming else len(response.content)
+        observe_request(route, response.status_code, timings, payload_size)
+
+        if self.log and len(timings) > 1:
+            print(json.dumps({
+                'event': 'request_timing',
+                'method': request.method,
+                'path': request.path,
+                'route': route,
+                'status': response.status_code,
+                'stages_ms': {name: round(seconds * 1000, 2) for name, seconds in timings.items()},
+            }))
+        return response
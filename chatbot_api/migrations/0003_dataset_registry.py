@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-17 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chatbot_api", "0002_upload_job_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadedfile",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="uploadedfile",
+            name="name",
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+    ]
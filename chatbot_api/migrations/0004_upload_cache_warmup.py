@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-17 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chatbot_api", "0003_dataset_registry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadedfile",
+            name="warmup_done",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="uploadedfile",
+            name="warmup_status",
+            field=models.CharField(blank=True, choices=[("queued", "Queued"), ("running", "Running"), ("succeeded", "Succeeded"), ("failed", "Failed"), ("cancelled", "Cancelled")], max_length=16),
+        ),
+        migrations.AddField(
+            model_name="uploadedfile",
+            name="warmup_total",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
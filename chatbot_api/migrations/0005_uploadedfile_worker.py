@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chatbot_api", "0004_upload_cache_warmup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadedfile",
+            name="worker",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -2,5 +2,53 @@ from django.db import models
 
 # Create your models here.
 class UploadedFile(models.Model):
+    """
+    An uploaded dataset file and the background job that ingests it
+
+    Each successfully ingested upload is an immutable dataset version that
+    queries can select by id. Its column store is addressed by the file's
+    content hash, so re-uploading identical bytes reuses it.
+    """
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    # Cache warmup runs after ingestion and can also be cancelled
+    STATUS_CANCELLED = 'cancelled'
+    WARMUP_STATUS_CHOICES = STATUS_CHOICES + [(STATUS_CANCELLED, 'Cancelled')]
+
     file = models.FileField(upload_to='uploads/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    original_name = models.CharField(max_length=255, blank=True)
+    name = models.CharField(max_length=255, blank=True, db_index=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    rows = models.PositiveIntegerField(null=True, blank=True)
+    chunks = models.PositiveIntegerField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    columns = models.JSONField(null=True, blank=True)
+    detected_columns = models.JSONField(null=True, blank=True)
+    warmup_status = models.CharField(max_length=16, choices=WARMUP_STATUS_CHOICES, blank=True)
+    warmup_total = models.PositiveIntegerField(null=True, blank=True)
+    warmup_done = models.PositiveIntegerField(null=True, blank=True)
+    # Process whose in-memory queue holds the ingestion job (see jobs.worker_id)
+    worker = models.CharField(max_length=64, blank=True)
+
+    @property
+    def duration_seconds(self):
+        """Seconds spent ingesting so far, or None if the job hasn't started"""
+        if self.started_at is None:
+            return None
+        if self.finished_at is None:
+            from django.utils import timezone
+            return (timezone.now() - self.started_at).total_seconds()
+        return (self.finished_at - self.started_at).total_seconds()
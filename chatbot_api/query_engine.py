@@ -0,0 +1,539 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from .llm_service import asummarize, llm_setting, stream_summary, summarize
+from .summary_cache import summary_cache_key
+from .timing import timed_stage
+
+# Resolves the summaries of a batch side by side; the threads mostly wait on
+# the LLM, so this is sized like the LLM executor
+_summary_executor = ThreadPoolExecutor(
+    max_workers=llm_setting('CHATBOT_LLM_MAX_CONCURRENCY'), thread_name_prefix='summary'
+)
+
+
+class PendingSummary:
+    """Data context of a response whose LLM summary has not been generated yet"""
+
+    def __init__(self, data_context, query, fallback_summary, error_label=""):
+        self.data_context = data_context
+        self.query = query
+        self.fallback_summary = fallback_summary
+        self.error_label = error_label
+        # Set once resolved: True if the LLM was configured but not used in
+        # time, so callers can avoid caching the degraded response
+        self.degraded = False
+
+
+@timed_stage('summary')
+def resolve_summary(pending):
+    """Generate the summary for a pending response, falling back on errors"""
+    try:
+        summary, pending.degraded = summarize(pending.data_context, pending.query)
+        return summary
+    except Exception as e:
+        print(f"Error using LLM service{pending.error_label}: {str(e)}")
+        pending.degraded = True
+        return pending.fallback_summary
+
+
+@timed_stage('summary')
+def resolve_summaries(pendings):
+    """
+    Generate the summaries of several pending responses concurrently
+
+    Pending responses with the same data context and intent share one LLM
+    call.
+
+    Args:
+        pendings (list): PendingSummary objects
+
+    Returns:
+        list: Summaries, in the same order as pendings
+    """
+    groups = {}
+    for pending in pendings:
+        groups.setdefault(summary_cache_key(pending.data_context, pending.query), []).append(pending)
+    futures = {key: _summary_executor.submit(resolve_summary, group[0]) for key, group in groups.items()}
+
+    summaries = {}
+    for key, group in groups.items():
+        summaries[key] = futures[key].result()
+        for pending in group[1:]:
+            pending.degraded = group[0].degraded
+    return [summaries[summary_cache_key(pending.data_context, pending.query)] for pending in pendings]
+
+
+@timed_stage('summary')
+async def aresolve_summary(pending):
+    """Async version of resolve_summary, for use from ASGI views"""
+    try:
+        summary, pending.degraded = await asummarize(pending.data_context, pending.query)
+        return summary
+    except Exception as e:
+        print(f"Error using LLM service{pending.error_label}: {str(e)}")
+        pending.degraded = True
+        return pending.fallback_summary
+
+
+def stream_resolve_summary(pending):
+    """
+    Streaming version of resolve_summary
+
+    Yields:
+        tuple: ('delta', text) chunks as the model produces them, then
+        ('summary', full summary)
+    """
+    try:
+        for event, text in stream_summary(pending.data_context, pending.query):
+            if event == 'fallback':
+                pending.degraded = True
+                event = 'summary'
+            yield event, text
+    except Exception as e:
+        print(f"Error using LLM service{pending.error_label}: {str(e)}")
+        pending.degraded = True
+        yield 'summary', pending.fallback_summary
+
+
+def process_query(query, snapshot):
+    """Answer a query end to end, blocking on the LLM summary if one is needed"""
+    response, pending_summary = analyze_query(query, snapshot)
+    if pending_summary is not None:
+        response['summary'] = resolve_summary(pending_summary)
+    return response
+
+
+def query_intent(query, snapshot):
+    """
+    Classify a query the way analyze_query branches on it, for metrics
+
+    Args:
+        query (str): Normalized user query
+        snapshot (DatasetSnapshot): Dataset the query runs against
+
+    Returns:
+        str: 'top_areas', 'single_area', 'price_trend', 'demand_trend',
+        'comparison' or 'unknown'
+    """
+    areas = snapshot.area_matcher.find(query)
+    if not areas:
+        return 'top_areas' if 'top' in query or 'best' in query else 'unknown'
+    if len(areas) > 1:
+        return 'comparison'
+    if 'price' in query and snapshot.schema.price_column:
+        return 'price_trend'
+    if 'demand' in query and snapshot.schema.demand_column:
+        return 'demand_trend'
+    return 'single_area'
+
+
+@timed_stage('analyze')
+def analyze_query(query, snapshot):
+    """
+    Run the data part of a query: area extraction, filtering and charting
+
+    Args:
+        query (str): Normalized user query
+        snapshot (DatasetSnapshot): Dataset to answer from
+
+    Returns:
+        tuple: (response dict, PendingSummary or None). When a PendingSummary
+        is returned the response's 'summary' is None until it is resolved.
+        Table and chart values are left as DataFrames/arrays; pass the
+        response through handle_nan_values to get JSON-ready data.
+    """
+    # Column roles, the area matcher and the per-area index are built once
+    # per dataset version by the store, so nothing here re-scans the frame
+    df = snapshot.df
+    schema = snapshot.schema
+    index = snapshot.area_index
+    location_column = schema.location_column
+    year_column = schema.year_column
+    price_column = schema.price_column
+    demand_column = schema.demand_column
+
+    # Extract area names from the query
+    areas = snapshot.area_matcher.find(query)
+    pending_summary = None
+
+    # If no specific areas mentioned, try to determine intent
+    if not areas:
+        if 'top' in query or 'best' in query:
+            if year_column and location_column and demand_column:
+                recent_year = index.max_year
+                top_areas = df.iloc[index.top_positions[:3]]
+
+                chart_data = {
+                    'type': 'bar',
+                    'labels': top_areas[location_column].to_numpy(),
+                    'datasets': [{
+                        'label': f'{demand_column}',
+                        'data': top_areas[demand_column].to_numpy()
+                    }]
+                }
+
+                return {
+                    'summary': f"Here are the top areas by demand for {recent_year}",
+                    'chart_data': chart_data,
+                    'table_data': top_areas
+                }, None
+            else:
+                # Fallback if columns not found
+                return {
+                    'summary': "Could not analyze data due to missing required columns.",
+                    'chart_data': None,
+                    'table_data': None
+                }, None
+
+        # Default response if intent is unclear
+        return {
+            'summary': "I'm not sure what you're looking for. Please try specifying an area like 'Analyze Wakad' or 'Compare Aundh and Baner'.",
+            'chart_data': None,
+            'table_data': None
+        }, None
+
+    # Single area analysis
+    if len(areas) == 1:
+        area = areas[0]
+        area_series = index.get(area)
+
+        # Check for specific time frame
+        if 'last 3 years' in query or 'last three years' in query:
+            if year_column:
+                max_year = index.max_year
+                year_filter = [max_year - 2, max_year - 1, max_year]
+                area_series = area_series.in_years(year_filter)
+
+        # The table and chart list rows in the frame's order; first/last and
+        # growth come from the index's year-sorted series
+        shown = area_series.in_frame_order()
+        area_data = df.iloc[shown.positions]
+        years = shown.years if year_column else []
+
+        # Check if query is about price or demand specifically
+        if 'price' in query and price_column:
+            chart_data = {
+                'type': 'line',
+                'labels': years,
+                'datasets': [{
+                    'label': price_column,
+                    'data': shown.price.raw
+                }]
+            }
+            summary = f"Price trend analysis for {area}: "
+
+            # Calculate price growth
+            if len(area_series) > 1 and price_column:
+                first_price = area_series.price.first
+                last_price = area_series.price.last
+
+                # Growth is None when either end is NaN or the first price isn't positive
+                growth = area_series.price.growth
+                if growth is None:
+                    growth = 0
+
+                # Use safe values for display
+                first_price = 0 if pd.isna(first_price) else first_price
+                last_price = 0 if pd.isna(last_price) else last_price
+
+                summary += f"Prices have {'increased' if growth > 0 else 'decreased'} by {abs(growth):.1f}% "
+                summary += f"from {first_price:.2f} to {last_price:.2f}."
+
+        elif 'demand' in query and demand_column:
+            chart_data = {
+                'type': 'line',
+                'labels': years,
+                'datasets': [{
+                    'label': demand_column,
+                    'data': shown.demand.raw
+                }]
+            }
+            summary = f"Demand trend analysis for {area}: "
+
+            if len(area_series) > 1 and demand_column:
+                first_demand = area_series.demand.first
+                last_demand = area_series.demand.last
+
+                # Change is None when either end is NaN
+                change = area_series.demand.change
+                if change is None:
+                    change = 0
+
+                # Use safe values for display
+                first_demand = 0 if pd.isna(first_demand) else first_demand
+                last_demand = 0 if pd.isna(last_demand) else last_demand
+
+                summary += f"Demand has {'increased' if change > 0 else 'decreased'} by {abs(change)} units "
+                summary += f"from {first_demand} to {last_demand} units sold."
+
+        # Default to a general analysis
+        else:
+            # Initialize datasets for chart
+            datasets = []
+
+            # Add price data if available
+            if price_column:
+                datasets.append({
+                    'label': price_column,
+                    'data': shown.price.raw,
+                    'yAxisID': 'y-price'
+                })
+
+            # Add demand data if available
+            if demand_column:
+                datasets.append({
+                    'label': demand_column,
+                    'data': shown.demand.raw,
+                    'yAxisID': 'y-demand'
+                })
+
+            chart_data = {
+                'type': 'line',
+                'labels': years,
+                'datasets': datasets,
+                'options': {
+                    'scales': {
+                        'y-price': {
+                            'position': 'left',
+                            'title': 'Price'
+                        },
+                        'y-demand': {
+                            'position': 'right',
+                            'title': 'Demand'
+                        }
+                    }
+                }
+            }
+
+            # Calculate averages for summary
+            base_summary = f"Analysis of {area}: "
+            price_info = "No price data available"
+            demand_info = "No demand data available"
+            trend_info = "No trend data available"
+
+            if price_column:
+                avg_price = area_series.price.mean
+                if not pd.isna(avg_price):
+                    price_info = f"Average price is ₹{avg_price:.2f}"
+
+            if demand_column:
+                avg_demand = area_series.demand.mean
+                if not pd.isna(avg_demand):
+                    demand_info = f"Average of {avg_demand:.1f} units sold"
+
+            # Add trend analysis if multiple data points
+            if len(area_series) > 1:
+                trend_parts = []
+
+                if price_column:
+                    price_change = area_series.price.growth
+
+                    if price_change is not None:
+                        trend_parts.append(f"prices have {'increased' if price_change > 0 else 'decreased'} by {abs(price_change):.1f}%")
+
+                if demand_column:
+                    demand_change = area_series.demand.change
+
+                    if demand_change is not None:
+                        trend_parts.append(f"units sold have {'increased' if demand_change > 0 else 'decreased'} by {abs(demand_change):.1f} units")
+
+                if trend_parts:
+                    trend_info = "Over time, " + " and ".join(trend_parts)
+
+            # Prepare data context for LLM service
+            data_context = {
+                'area_info': area,
+                'price_info': price_info,
+                'demand_info': demand_info,
+                'trend_info': trend_info
+            }
+
+            # Basic summary used if the LLM service fails
+            fallback_summary = base_summary
+            if price_info != "No price data available":
+                fallback_summary += f"{price_info} "
+            if demand_info != "No demand data available":
+                fallback_summary += f"with {demand_info}. "
+            if trend_info != "No trend data available":
+                fallback_summary += f"{trend_info}."
+
+            # The intelligent summary is generated by the caller (sync or async)
+            summary = None
+            pending_summary = PendingSummary(data_context, query, fallback_summary, "")
+
+        return {
+            'summary': summary,
+            'chart_data': chart_data,
+            'table_data': area_data
+        }, pending_summary
+
+    # Comparison between multiple areas
+    elif len(areas) > 1:
+        filtered_data = df.iloc[index.positions(areas)]
+
+        if 'demand' in query and demand_column and year_column:
+            # Compare demand trends
+            pivot_years, pivot_data = index.pivot(areas, 'demand')
+            chart_datasets = []
+
+            for area in areas:
+                if area in pivot_data:
+                    chart_datasets.append({
+                        'label': area,
+                        'data': pivot_data[area]
+                    })
+                else:
+                    chart_datasets.append({
+                        'label': area,
+                        'data': []
+                    })
+
+            chart_data = {
+                'type': 'line',
+                'labels': pivot_years,
+                'datasets': chart_datasets
+            }
+
+            # Generate summary comparing latest demand scores
+            latest_year = pivot_years[-1] if pivot_years else None
+            base_summary = f"Comparing demand trends between {', '.join(areas)}. "
+
+            area_info = ', '.join(areas)
+            demand_info = "No demand data available"
+            price_info = "No price data available"
+            trend_info = "No trend data available"
+
+            if latest_year:
+                summary_parts = []
+                for area in areas:
+                    area_demand = index.get(area).value_in_year('demand', latest_year)
+                    if area_demand is not None and not pd.isna(area_demand):
+                        summary_parts.append(f"{area}: {area_demand} units")
+
+                if summary_parts:
+                    demand_info = f"Latest demand figures ({latest_year}): {', '.join(summary_parts)}"
+
+            # Calculate trends for each area
+            if len(areas) > 1 and year_column and len(filtered_data) > 0:
+                trend_parts = []
+
+                for area in areas:
+                    area_series = index.get(area)
+                    if len(area_series) > 1:
+                        first_demand = area_series.demand.first
+                        demand_change = area_series.demand.change
+
+                        if demand_change is not None:
+                            change_pct = (demand_change / first_demand * 100) if first_demand > 0 else 0
+                            trend_parts.append(f"{area} has {'increased' if demand_change > 0 else 'decreased'} by {abs(change_pct):.1f}%")
+
+                if trend_parts:
+                    trend_info = "Demand trends: " + ", ".join(trend_parts)
+
+            # Prepare data context for LLM service
+            data_context = {
+                'area_info': area_info,
+                'price_info': price_info,
+                'demand_info': demand_info,
+                'trend_info': trend_info
+            }
+
+            # Basic summary used if the LLM service fails
+            fallback_summary = base_summary
+            if demand_info != "No demand data available":
+                fallback_summary += f"{demand_info}. "
+            if trend_info != "No trend data available":
+                fallback_summary += f"{trend_info}."
+
+            # The intelligent summary is generated by the caller (sync or async)
+            summary = None
+            pending_summary = PendingSummary(data_context, query, fallback_summary, " for comparison")
+
+        elif price_column and year_column:
+            # Default to price comparison
+            pivot_years, pivot_data = index.pivot(areas, 'price')
+            chart_datasets = []
+
+            for area in areas:
+                if area in pivot_data:
+                    chart_datasets.append({
+                        'label': area,
+                        'data': pivot_data[area]
+                    })
+                else:
+                    chart_datasets.append({
+                        'label': area,
+                        'data': []
+                    })
+
+            chart_data = {
+                'type': 'line',
+                'labels': pivot_years,
+                'datasets': chart_datasets
+            }
+
+            # Generate summary comparing latest prices
+            latest_year = pivot_years[-1] if pivot_years else None
+            base_summary = f"Comparing {', '.join(areas)}. "
+
+            area_info = ', '.join(areas)
+            price_info = "No price data available"
+            demand_info = "No demand data available"
+            trend_info = "No trend data available"
+
+            if latest_year:
+                summary_parts = []
+                for area in areas:
+                    area_price = index.get(area).value_in_year('price', latest_year)
+                    if area_price is not None and not pd.isna(area_price):
+                        summary_parts.append(f"{area}: ₹{area_price:.2f}")
+
+                if summary_parts:
+                    price_info = f"Latest prices ({latest_year}): {', '.join(summary_parts)}"
+
+            # Calculate trends for each area
+            if len(areas) > 1 and year_column and len(filtered_data) > 0:
+                trend_parts = []
+
+                for area in areas:
+                    area_series = index.get(area)
+                    if len(area_series) > 1:
+                        price_change = area_series.price.growth
+
+                        if price_change is not None:
+                            trend_parts.append(f"{area} has {'increased' if price_change > 0 else 'decreased'} by {abs(price_change):.1f}%")
+
+                if trend_parts:
+                    trend_info = "Price trends: " + ", ".join(trend_parts)
+
+            # Prepare data context for LLM service
+            data_context = {
+                'area_info': area_info,
+                'price_info': price_info,
+                'demand_info': demand_info,
+                'trend_info': trend_info
+            }
+
+            # Basic summary used if the LLM service fails
+            fallback_summary = base_summary
+            if price_info != "No price data available":
+                fallback_summary += f"{price_info}. "
+            if trend_info != "No trend data available":
+                fallback_summary += f"{trend_info}."
+
+            # The intelligent summary is generated by the caller (sync or async)
+            summary = None
+            pending_summary = PendingSummary(data_context, query, fallback_summary, " for comparison")
+        else:
+            chart_data = None
+            summary = f"Comparing {', '.join(areas)}, but could not find suitable data for comparison."
+
+        return {
+            'summary': summary,
+            'chart_data': chart_data,
+            'table_data': filtered_data
+        }, pending_summary
+
+
@@ -0,0 +1,120 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .metrics import response_cache_lookups
+
+DEFAULT_RESPONSE_CACHE = {
+    'BACKEND': 'chatbot_api.response_cache.LocMemResponseCache',
+    'OPTIONS': {
+        'max_entries': 512,
+        'timeout': 300,
+    },
+}
+
+
+def normalize_query(query):
+    """Lowercase a query and collapse runs of whitespace"""
+    return " ".join(query.lower().split())
+
+
+def make_cache_key(query, snapshot):
+    """
+    Build the response cache key for a normalized query
+
+    Area mentions are replaced with a placeholder and the matched areas are
+    listed in dataset order, so "Compare Baner and Aundh" and "Compare Aundh
+    and Baner" share an entry. The dataset version is part of the key, so an
+    upload makes every earlier entry unreachable in all workers.
+
+    Args:
+        query (str): Normalized user query
+        snapshot (DatasetSnapshot): Dataset the response is computed from
+
+    Returns:
+        str: A fixed-length cache key
+    """
+    template, areas = snapshot.area_matcher.canonicalize(query)
+    digest = hashlib.sha1("\x1f".join([template] + areas).encode('utf-8')).hexdigest()
+    return f"chatbot:response:{snapshot.version_hash}:{digest}"
+
+
+class LocMemResponseCache:
+    """In-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_entries=512, timeout=300):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                value = None
+            else:
+                self._entries.move_to_end(key)
+                value = entry[1]
+        response_cache_lookups.labels('miss' if value is None else 'hit').inc()
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoResponseCache:
+    """
+    Response cache on top of a Django cache alias
+
+    Point the alias at a shared backend (Redis, Memcached, database) so that
+    all gunicorn workers see each other's entries. Give the response cache an
+    alias of its own: clear() empties the whole alias.
+    """
+
+    def __init__(self, alias='default', timeout=300):
+        from django.core.cache import caches
+
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        value = self.cache.get(key)
+        response_cache_lookups.labels('miss' if value is None else 'hit').inc()
+        return value
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache configured in settings"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                config = getattr(settings, 'CHATBOT_RESPONSE_CACHE', DEFAULT_RESPONSE_CACHE)
+                backend = import_string(config['BACKEND'])
+                _response_cache = backend(**config.get('OPTIONS', {}))
+    return _response_cache
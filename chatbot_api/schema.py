@@ -0,0 +1,89 @@
+import pandas as pd
+
+from .timing import timed_stage
+
+# Common names for the location column, in order of preference
+LOCATION_COLUMN_NAMES = ['final location', 'area', 'location', 'locality', 'region', 'zone']
+
+PRICE_KEYWORDS = ('price', 'rate')
+DEMAND_KEYWORDS = ('sold', 'sales', 'demand', 'units')
+
+
+class SchemaProfile:
+    """Column roles detected for one version of the dataset"""
+
+    def __init__(self, location_column, year_column, price_column, demand_column, column_types):
+        self.location_column = location_column
+        self.year_column = year_column
+        self.price_column = price_column
+        self.demand_column = demand_column
+        self.column_types = column_types
+
+    def roles(self):
+        """Return the detected column roles as a JSON-friendly dict"""
+        return {
+            'location': self.location_column,
+            'year': self.year_column,
+            'price': self.price_column,
+            'demand': self.demand_column,
+        }
+
+
+@timed_stage('schema')
+def detect_schema(df):
+    """
+    Work out which columns hold the location, year, price and demand values
+
+    Args:
+        df (DataFrame): The loaded dataset
+
+    Returns:
+        SchemaProfile: The detected column roles and per-column types
+    """
+    column_types = {
+        col: "numeric" if pd.api.types.is_numeric_dtype(df[col]) else "text"
+        for col in df.columns
+    }
+
+    # Look for common location column names in the DataFrame
+    location_column = None
+    for col in LOCATION_COLUMN_NAMES:
+        if col in df.columns:
+            location_column = col
+            break
+
+    # If none found, use the first string column as a fallback
+    if not location_column:
+        for col in df.columns:
+            is_text = df[col].dtype == 'object' or isinstance(df[col].dtype, pd.CategoricalDtype)
+            if is_text and df[col].nunique() > 5:
+                location_column = col
+                break
+
+    # Dynamically determine year column
+    year_column = None
+    for col in df.columns:
+        if col.lower() in ['year', 'yr']:
+            year_column = col
+            break
+
+    # If no year column found, look for date-like columns
+    if not year_column:
+        for col in df.columns:
+            if 'year' in col.lower() or 'date' in col.lower():
+                year_column = col
+                break
+
+    # Find price and demand columns dynamically
+    price_column = None
+    demand_column = None
+
+    for col in df.columns:
+        col_lower = col.lower()
+        is_numeric = column_types[col] == "numeric"
+        if not price_column and any(k in col_lower for k in PRICE_KEYWORDS) and is_numeric:
+            price_column = col
+        if not demand_column and any(k in col_lower for k in DEMAND_KEYWORDS) and is_numeric:
+            demand_column = col
+
+    return SchemaProfile(location_column, year_column, price_column, demand_column, column_types)
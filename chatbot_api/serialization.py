@@ -0,0 +1,280 @@
+import json
+
+import numpy as np
+import pandas as pd
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .timing import timed_stage
+
+# orjson is optional; without it responses go through DRF's JSONRenderer
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# MessagePack and Arrow IPC responses are only offered when their packages are installed
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+def clean_array(values):
+    """
+    Convert a 1-D array to a list with NaN, NaT and +/-Inf replaced by None
+
+    The missing-value mask is computed on the whole array at once, so only
+    the (usually few) masked positions are touched in Python.
+
+    Args:
+        values (ndarray or Series): Column values
+
+    Returns:
+        list: JSON-ready Python values
+    """
+    if isinstance(values, pd.Series):
+        dtype = values.dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in 'iufb':
+            values = values.to_numpy()
+        else:
+            # Extension and datetime columns: keep Timestamps, NA -> None below
+            values = values.to_numpy(dtype=object)
+    else:
+        values = np.asarray(values)
+        if values.dtype.kind in 'mM':
+            values = pd.Series(values).to_numpy(dtype=object)
+
+    kind = values.dtype.kind
+    if kind in 'iub':
+        return values.tolist()
+    if kind == 'f':
+        mask = ~np.isfinite(values)
+    else:
+        values = values.astype(object, copy=False)
+        mask = pd.isna(values) | (values == np.inf) | (values == -np.inf)
+
+    result = values.tolist()
+    for i in np.flatnonzero(mask):
+        result[i] = None
+    return result
+
+
+def frame_records(df):
+    """
+    Equivalent of handle_nan_values(df.to_dict('records')), built column-wise
+
+    Args:
+        df (DataFrame): Rows to serialize
+
+    Returns:
+        list: One dict per row, with missing values as None
+    """
+    columns = [clean_array(df.iloc[:, i]) for i in range(df.shape[1])]
+    names = list(df.columns)
+    if not columns:
+        return [{} for _ in range(len(df))]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def column_array(values):
+    """
+    One column for a columnar response
+
+    Numeric and boolean columns stay NumPy arrays, so the renderers encode
+    them directly (NaN and +/-Inf become null); other columns are cleaned to
+    lists with clean_array.
+
+    Args:
+        values (ndarray or Series): Column values
+
+    Returns:
+        ndarray or list: The column, ready for a columnar renderer
+    """
+    if isinstance(values, pd.Series):
+        if not (isinstance(values.dtype, np.dtype) and values.dtype.kind in 'iufb'):
+            return clean_array(values)
+        values = values.to_numpy()
+    else:
+        values = np.asarray(values)
+    if values.dtype.kind in 'iufb':
+        return np.ascontiguousarray(values)
+    return clean_array(values)
+
+
+def frame_columns(df):
+    """
+    Column-oriented form of a frame: names once, then one array per column
+
+    Args:
+        df (DataFrame): Rows to serialize
+
+    Returns:
+        dict: {'columns': [names], 'data': [column, ...]}
+    """
+    return {
+        'columns': list(df.columns),
+        'data': [column_array(df.iloc[:, i]) for i in range(df.shape[1])],
+    }
+
+
+def columnar_values(data):
+    """
+    Counterpart of api.handle_nan_values for the columnar renderers
+
+    DataFrames become frame_columns() and 1-D arrays stay NumPy arrays where
+    they are numeric; scalars are cleaned the same way as for JSON records.
+    """
+    if isinstance(data, dict):
+        return {k: columnar_values(v) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [columnar_values(item) for item in data]
+    elif isinstance(data, pd.DataFrame):
+        return frame_columns(data)
+    elif isinstance(data, pd.Series):
+        return dict(zip(data.index, clean_array(data)))
+    elif isinstance(data, np.ndarray):
+        if data.ndim == 1:
+            return column_array(data)
+        return columnar_values(data.tolist())
+    elif isinstance(data, np.number):
+        return None if np.isnan(data) or np.isinf(data) else float(data)
+    elif pd.isna(data) or (isinstance(data, float) and (np.isnan(data) or np.isinf(data))):
+        return None
+    return data
+
+
+def plain_values(data):
+    """Replace the NumPy arrays left by columnar_values with JSON-ready lists"""
+    if isinstance(data, dict):
+        return {k: plain_values(v) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [plain_values(item) for item in data]
+    elif isinstance(data, np.ndarray):
+        return clean_array(data)
+    return data
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that serializes with orjson when it is installed"""
+
+    @timed_stage('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            # Pretty-printed output (browsable API, ?indent=) stays on the stdlib path
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Types orjson doesn't know (Decimal, lazy strings, ...) use DRF's encoder
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """
+    JSON with tables as {'columns': [...], 'data': [[...], ...]}, one list per
+    column, for 'Accept: application/vnd.chatbot.columnar+json' or
+    '?format=columnar'
+    """
+
+    media_type = 'application/vnd.chatbot.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # orjson writes the NumPy columns itself; DRF's encoder needs lists
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            data = plain_values(data)
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, np.ndarray):
+        return clean_array(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Timestamp, pd.Timedelta)):
+        return obj.isoformat()
+    return str(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Columnar response packed with MessagePack ('Accept: application/msgpack')"""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    @timed_stage('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+
+
+class LegacyMessagePackRenderer(MessagePackRenderer):
+    """The same response for clients that still ask for 'application/x-msgpack'"""
+
+    media_type = 'application/x-msgpack'
+
+
+def _arrow_array(values):
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind == 'f':
+            # NaN and +/-Inf are null, as in the JSON and MessagePack encodings
+            return pa.array(values, mask=~np.isfinite(values))
+        return pa.array(values, from_pandas=True)
+    try:
+        return pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed-type text columns go out as strings
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+
+class ArrowStreamRenderer(BaseRenderer):
+    """
+    Columnar response as an Arrow IPC stream ('Accept: application/vnd.apache.arrow.stream')
+
+    table_data is the stream's record batch; the rest of the response
+    (summary, chart_data, table_page, errors) is JSON in the schema metadata
+    under the 'chatbot' key.
+    """
+
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    @timed_stage('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        data = dict(data or {})
+        table = data.pop('table_data', None)
+        if isinstance(table, dict) and 'columns' in table:
+            batch = pa.RecordBatch.from_arrays(
+                [_arrow_array(values) for values in table['data']], names=[str(name) for name in table['columns']]
+            )
+        else:
+            batch = pa.RecordBatch.from_arrays([], names=[])
+        metadata = json.dumps(plain_values(data), default=str)
+        schema = batch.schema.with_metadata({'chatbot': metadata})
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+
+# Opt-in columnar encodings of the query API, negotiated through Accept
+COLUMNAR_RENDERERS = [ColumnarJSONRenderer]
+if msgpack is not None:
+    COLUMNAR_RENDERERS += [MessagePackRenderer, LegacyMessagePackRenderer]
+if pa is not None:
+    COLUMNAR_RENDERERS.append(ArrowStreamRenderer)
+COLUMNAR_FORMATS = tuple(dict.fromkeys(renderer.format for renderer in COLUMNAR_RENDERERS))
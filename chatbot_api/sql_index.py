@@ -0,0 +1,215 @@
+import hashlib
+from functools import cached_property
+
+import numpy as np
+from django.db import DatabaseError, connections, transaction
+
+from .area_index import AreaSeries, pivot_series
+from .serialization import clean_array
+
+# Rows inserted per executemany() call while loading a dataset
+INSERT_BATCH_ROWS = 10000
+
+# Tables are named per dataset file and version (see version_table). Besides
+# the current version, this many older versions of the same file are kept so
+# workers still on the previous snapshot can finish their queries
+TABLE_PREFIX = 'chatbot_dataset_'
+KEEP_PREVIOUS_VERSIONS = 1
+
+
+def version_table(path, mtime_ns, size):
+    """
+    Table name of one dataset version
+
+    Args:
+        path (str): Dataset file the version was loaded from
+        mtime_ns (int): Its modification time
+        size (int): Its size in bytes
+
+    Returns:
+        str: 'chatbot_dataset_<path hash>_<mtime>_<size>', so the versions
+        of one file can be found and ordered by age
+    """
+    dataset = hashlib.sha1(str(path).encode('utf-8')).hexdigest()[:12]
+    return f"{TABLE_PREFIX}{dataset}_{mtime_ns:x}_{size:x}"
+
+
+class SQLAreaIndex:
+    """
+    AreaIndex backed by an indexed table in the Django database
+
+    The location, year, price and demand columns of one dataset version are
+    loaded once into a table with an (area, year) index, shared by every
+    worker using the same database. Lookups then run as indexed SQL instead
+    of holding per-area arrays in each worker's memory. Values are cast back
+    to the DataFrame's column types, so responses match AreaIndex exactly.
+    The worker that creates a version's table drops the same file's older
+    versions beyond KEEP_PREVIOUS_VERSIONS.
+
+    Args:
+        df (DataFrame): The dataset version
+        schema (SchemaProfile): Its detected column roles
+        table (str): Table name from version_table()
+        alias (str): Django database alias to use
+    """
+
+    def __init__(self, df, schema, table, alias='default'):
+        self.schema = schema
+        self.table = table
+        self.alias = alias
+        # Categorical (dictionary-encoded) columns come back as objects
+        self._dtypes = {
+            role: (df[column].dtype if isinstance(df[column].dtype, np.dtype) else np.dtype(object)) if column else None
+            for role, column in (('year', schema.year_column), ('price', schema.price_column),
+                                 ('demand', schema.demand_column))
+        }
+        if schema.location_column:
+            self._ensure_table(df)
+
+        self.max_year = None
+        if schema.location_column and schema.year_column and len(df):
+            self.max_year = self._cast('year', [self._fetch_value("SELECT MAX(year) FROM {table}")])[0]
+
+    @cached_property
+    def top_positions(self):
+        """Rows of the most recent year, ranked by demand for 'top areas' queries"""
+        if self.max_year is None or not self.schema.demand_column:
+            return np.array([], dtype=np.intp)
+        rows = self._fetch(
+            "SELECT pos FROM {table} WHERE year = %s ORDER BY demand IS NULL, demand DESC, pos",
+            [self.max_year.item() if hasattr(self.max_year, 'item') else self.max_year],
+        )
+        return np.array([row[0] for row in rows], dtype=np.intp)
+
+    def __contains__(self, area):
+        if not self.schema.location_column:
+            return False
+        return self._fetch_value("SELECT 1 FROM {table} WHERE area = %s LIMIT 1", [area]) is not None
+
+    def get(self, area):
+        # NULL years sort last, as in AreaIndex's stable year sort
+        rows = self._fetch(
+            "SELECT pos, year, price, demand FROM {table} WHERE area = %s ORDER BY year IS NULL, year, pos",
+            [area],
+        )
+        if not rows:
+            raise KeyError(area)
+        positions, years, prices, demands = zip(*rows)
+        return AreaSeries(
+            np.array(positions, dtype=np.intp),
+            self._cast('year', years),
+            self._cast('price', prices),
+            self._cast('demand', demands),
+        )
+
+    def positions(self, areas):
+        """Row positions of all given areas, in the frame's original order"""
+        if not areas or not self.schema.location_column:
+            return np.array([], dtype=np.intp)
+        placeholders = ", ".join(["%s"] * len(areas))
+        rows = self._fetch(f"SELECT pos FROM {{table}} WHERE area IN ({placeholders}) ORDER BY pos", list(areas))
+        return np.array([row[0] for row in rows], dtype=np.intp)
+
+    def pivot(self, areas, role):
+        """
+        Align the price or demand series of several areas on a shared year axis
+
+        Args:
+            areas (list): Area names to include
+            role (str): 'price' or 'demand'
+
+        Returns:
+            tuple: (sorted list of years, dict of area -> array of values with NaN gaps)
+        """
+        series = {}
+        for area in areas:
+            try:
+                series[area] = self.get(area)
+            except KeyError:
+                pass
+        return pivot_series(series, role)
+
+    def _cast(self, role, values):
+        dtype = self._dtypes[role]
+        if dtype is None:
+            return None
+        if dtype.kind == 'f':
+            values = [np.nan if value is None else value for value in values]
+        return np.array(values, dtype=dtype)
+
+    def _fetch(self, sql, params=()):
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(sql.format(table=self._quoted()), params)
+            return cursor.fetchall()
+
+    def _fetch_value(self, sql, params=()):
+        rows = self._fetch(sql, params)
+        return rows[0][0] if rows else None
+
+    def _quoted(self):
+        return connections[self.alias].ops.quote_name(self.table)
+
+    def _exists(self):
+        connection = connections[self.alias]
+        with connection.cursor() as cursor:
+            return self.table in connection.introspection.table_names(cursor)
+
+    def _ensure_table(self, df):
+        if self._exists():
+            return
+        try:
+            with transaction.atomic(using=self.alias):
+                self._create_table(df)
+        except DatabaseError:
+            # Another worker loading the same version got there first
+            if not self._exists():
+                raise
+            return
+        self._drop_old_versions()
+
+    def _drop_old_versions(self):
+        """Drop this dataset file's tables older than the kept previous versions"""
+        connection = connections[self.alias]
+        dataset = self.table[len(TABLE_PREFIX):].split('_')[0]
+        with connection.cursor() as cursor:
+            names = connection.introspection.table_names(cursor)
+
+        versions = []
+        for name in names:
+            if not name.startswith(TABLE_PREFIX) or name == self.table:
+                continue
+            parts = name[len(TABLE_PREFIX):].split('_')
+            if len(parts) == 3 and parts[0] == dataset:
+                try:
+                    versions.append((int(parts[1], 16), name))
+                except ValueError:
+                    continue
+        versions.sort(reverse=True)
+        stale = [name for _, name in versions[KEEP_PREVIOUS_VERSIONS:]]
+
+        with connection.cursor() as cursor:
+            for name in stale:
+                cursor.execute(f"DROP TABLE IF EXISTS {connection.ops.quote_name(name)}")
+        if stale:
+            print(f"Dropped {len(stale)} old dataset table(s): {', '.join(stale)}")
+
+    def _create_table(self, df):
+        schema = self.schema
+        table = self._quoted()
+        index_name = connections[self.alias].ops.quote_name(f"{self.table}_area_year")
+        columns = [schema.location_column, schema.year_column, schema.price_column, schema.demand_column]
+        with connections[self.alias].cursor() as cursor:
+            # Untyped value columns keep ints, floats and text exactly as inserted
+            cursor.execute(f"CREATE TABLE {table} (pos INTEGER PRIMARY KEY, area TEXT, year, price, demand)")
+            for start in range(0, len(df), INSERT_BATCH_ROWS):
+                end = min(start + INSERT_BATCH_ROWS, len(df))
+                values = [
+                    clean_array(df[column].iloc[start:end]) if column else [None] * (end - start)
+                    for column in columns
+                ]
+                cursor.executemany(
+                    f"INSERT INTO {table} (pos, area, year, price, demand) VALUES (%s, %s, %s, %s, %s)",
+                    zip(range(start, end), *values),
+                )
+            cursor.execute(f"CREATE INDEX {index_name} ON {table} (area, year)")
+        print(f"Loaded {len(df)} rows into {self.table}")
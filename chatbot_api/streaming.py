@@ -0,0 +1,58 @@
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+# Renderer formats that make the query API stream its answer
+STREAM_FORMATS = ('sse', 'ndjson')
+
+
+def encode_event(stream_format, event, data):
+    """
+    Encode one event as a Server-Sent Event or an NDJSON line
+
+    Args:
+        stream_format (str): 'sse' or 'ndjson'
+        event (str): Event name, e.g. 'data', 'summary_delta' or 'summary'
+        data (dict): JSON-serializable payload
+
+    Returns:
+        bytes: The encoded event
+    """
+    if stream_format == 'sse':
+        payload = json.dumps(data, ensure_ascii=False)
+        return f"event: {event}\ndata: {payload}\n\n".encode('utf-8')
+    payload = json.dumps({'event': event, **data}, ensure_ascii=False)
+    return f"{payload}\n".encode('utf-8')
+
+
+def stream_response(events, stream_format):
+    """Wrap an iterator of encoded events in an unbuffered streaming response"""
+    content_type = EventStreamRenderer.media_type if stream_format == 'sse' else NDJSONRenderer.media_type
+    response = StreamingHttpResponse(events, content_type=content_type)
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets clients ask for Server-Sent Events with 'Accept: text/event-stream'
+    or '?format=sse'. Streaming views return their own response; this only
+    renders non-streamed replies such as errors, as a single event.
+    """
+
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return encode_event(self.format, 'error' if 'error' in (data or {}) else 'result', data or {})
+
+
+class NDJSONRenderer(EventStreamRenderer):
+    """Newline-delimited JSON counterpart of EventStreamRenderer"""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
@@ -0,0 +1,100 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .metrics import llm_batch_size
+
+
+class SummaryBatcher:
+    """
+    Groups summary requests that arrive close together into shared completions
+
+    submit() returns a Future right away. A dispatcher thread collects
+    requests until `max_batch` are waiting or `max_wait` seconds have passed
+    since the first one, then hands the whole group to `complete_batch` on
+    `executor`. Several batches can be in flight at once.
+
+    Each completion reports to `breaker` once, however many callers share
+    it, so one failed upstream call isn't counted as a failure per summary.
+    Batch sizes are exported on /metrics (chatbot_llm_batch_size).
+
+    Args:
+        complete_batch (callable): Takes a list of (data_context, query, cache_key)
+            tuples and returns a list of summaries in the same order
+        executor (Executor): Runs complete_batch calls
+        max_batch (int): Most requests combined into one completion
+        max_wait (float): Seconds the first request of a batch waits for company
+        breaker (CircuitBreaker, optional): Told the outcome of every completion
+        slow_after (float, optional): A completion slower than this counts as a
+            breaker failure, like a caller's missed deadline
+    """
+
+    def __init__(self, complete_batch, executor, max_batch=8, max_wait=0.02, breaker=None, slow_after=None):
+        self.complete_batch = complete_batch
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.breaker = breaker
+        self.slow_after = slow_after
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._dispatcher = None
+
+    def submit(self, data_context, query, cache_key):
+        """
+        Queue one summary request
+
+        Returns:
+            Future: Resolves to the summary, or to the exception that stopped it
+        """
+        future = Future()
+        self._ensure_dispatcher()
+        self._queue.put((future, (data_context, query, cache_key)))
+        return future
+
+    def _ensure_dispatcher(self):
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch, name='summary-batcher', daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Requests whose caller gave up and cancelled them are dropped
+            batch = [(future, item) for future, item in batch if future.set_running_or_notify_cancel()]
+            if batch:
+                llm_batch_size.observe(len(batch))
+                self.executor.submit(self._run, batch)
+
+    def _run(self, batch):
+        start = time.monotonic()
+        try:
+            summaries = self.complete_batch([item for _, item in batch])
+        except Exception as e:
+            self._record(False)
+            for future, _ in batch:
+                future.set_exception(e)
+            return
+        self._record(self.slow_after is None or time.monotonic() - start <= self.slow_after)
+        for (future, _), summary in zip(batch, summaries):
+            future.set_result(summary)
+
+    def _record(self, succeeded):
+        if self.breaker is None:
+            return
+        if succeeded:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
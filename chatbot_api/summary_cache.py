@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .metrics import summary_cache_entries, summary_cache_lookups, summary_cache_saved
+
+# Query words that change what the summary should focus on; everything else
+# in the query (area names, filler words) is already captured by data_context
+INTENT_KEYWORDS = ('compare', 'price', 'demand', 'trend', 'invest', 'growth', 'last 3 years', 'last three years')
+
+
+def normalize_intent(query):
+    """Reduce a query to the intent keywords it contains"""
+    query = query.lower()
+    keywords = [keyword for keyword in INTENT_KEYWORDS if keyword in query]
+    return ",".join(keywords) or "general"
+
+
+def summary_cache_key(data_context, query):
+    """
+    Build a stable key for a summary request
+
+    Args:
+        data_context (dict): Dictionary containing real estate data context
+        query (str): User's query
+
+    Returns:
+        str: Hex digest of the data context and normalized intent
+    """
+    payload = json.dumps(
+        {'context': data_context, 'intent': normalize_intent(query)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SummaryCache:
+    """
+    Size-bounded LRU of generated summaries with optional SQLite persistence
+
+    Each entry remembers how long the LLM call that produced it took, so a
+    hit can report how much latency it saved. Hits, misses and the saved
+    latency are exported on /metrics (chatbot_summary_cache_*).
+    """
+
+    def __init__(self, max_entries=1024, db_path=None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if db_path:
+            self._init_db()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.db_path:
+            entry = self._db_get(key)
+            if entry is not None:
+                self._remember(key, entry)
+
+        if entry is None:
+            summary_cache_lookups.labels('miss').inc()
+            return None
+        summary_cache_lookups.labels('hit').inc()
+        summary_cache_saved.inc(entry[1])
+        return entry[0]
+
+    def set(self, key, summary, latency):
+        entry = (summary, latency)
+        self._remember(key, entry)
+        if self.db_path:
+            self._db_set(key, entry)
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            summary_cache_entries.set(len(self._entries))
+
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across threads
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summary_cache ("
+                "key TEXT PRIMARY KEY, summary TEXT NOT NULL, "
+                "latency REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+
+    def _db_get(self, key):
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT summary, latency FROM summary_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE summary_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            return tuple(row) if row is not None else None
+        except sqlite3.Error as e:
+            print(f"Error reading summary cache: {str(e)}")
+            return None
+
+    def _db_set(self, key, entry):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO summary_cache (key, summary, latency, last_used) VALUES (?, ?, ?, ?)",
+                    (key, entry[0], entry[1], time.time()),
+                )
+                # Keep the table bounded by dropping the least recently used rows
+                conn.execute(
+                    "DELETE FROM summary_cache WHERE key NOT IN ("
+                    "SELECT key FROM summary_cache ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            print(f"Error writing summary cache: {str(e)}")
+
+
+# Shared cache used by generate_summary
+summary_cache = SummaryCache(
+    max_entries=int(os.getenv('SUMMARY_CACHE_SIZE', '1024')),
+    db_path=os.getenv('SUMMARY_CACHE_DB') or None,
+)
@@ -0,0 +1,135 @@
+import base64
+import binascii
+import json
+
+import numpy as np
+from django.conf import settings
+
+from .serialization import frame_columns, frame_records
+
+# Parameters that switch a query response from the full table to one page
+TABLE_PARAMS = ('limit', 'offset', 'cursor', 'columns')
+
+
+class TableRequest:
+    """The rows and columns of a query's table_data a client asked for"""
+
+    def __init__(self, offset, limit, columns):
+        self.offset = offset
+        self.limit = limit
+        self.columns = columns
+
+
+def _int_param(params, name, default, minimum=0):
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be an integer")
+    if value < minimum:
+        raise ValueError(f"'{name}' must be at least {minimum}")
+    return value
+
+
+def encode_cursor(offset):
+    """Opaque cursor pointing at a row offset"""
+    return base64.urlsafe_b64encode(json.dumps({'offset': offset}).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))['offset']
+    except (ValueError, KeyError, TypeError, binascii.Error, UnicodeEncodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def parse_table_request(params, snapshot):
+    """
+    Read the paging and projection parameters of a request
+
+    Args:
+        params: Request body or query parameters. 'columns' may be a list or a
+            comma-separated string; 'cursor' (from a previous page) replaces
+            'offset'.
+        snapshot (DatasetSnapshot): Dataset whose columns can be requested
+
+    Returns:
+        TableRequest or None: None when no table parameter was given, so the
+        full table is returned as before
+
+    Raises:
+        ValueError: If a parameter is malformed or names an unknown column
+    """
+    if not any(params.get(name) not in (None, '') for name in TABLE_PARAMS):
+        return None
+
+    max_limit = getattr(settings, 'CHATBOT_TABLE_MAX_LIMIT', 1000)
+    limit = _int_param(params, 'limit', getattr(settings, 'CHATBOT_TABLE_DEFAULT_LIMIT', 100), minimum=1)
+    if limit > max_limit:
+        raise ValueError(f"'limit' can be at most {max_limit}")
+
+    cursor = params.get('cursor')
+    offset = decode_cursor(cursor) if cursor else _int_param(params, 'offset', 0)
+
+    columns = params.get('columns')
+    if isinstance(columns, str):
+        columns = [name.strip() for name in columns.split(',') if name.strip()]
+    elif columns is not None and not (isinstance(columns, list) and all(isinstance(name, str) for name in columns)):
+        raise ValueError("'columns' must be a list of column names")
+    if columns:
+        unknown = [name for name in columns if name not in snapshot.df.columns]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    else:
+        columns = list(snapshot.df.columns)
+    return TableRequest(offset, limit, columns)
+
+
+def table_positions(table, snapshot):
+    """
+    Row positions in the snapshot frame of a query's table_data
+
+    Args:
+        table (DataFrame or None): table_data as returned by analyze_query
+        snapshot (DatasetSnapshot): Dataset the table was taken from
+
+    Returns:
+        list: Row positions, in table order (empty when there is no table)
+    """
+    if table is None:
+        return []
+    return snapshot.df.index.get_indexer(table.index).tolist()
+
+
+def table_page(snapshot, positions, request, columnar=False):
+    """
+    Serialize one page of a table, touching only the requested rows and columns
+
+    Args:
+        snapshot (DatasetSnapshot): Dataset the table was taken from
+        positions (list): Row positions of the whole table
+        request (TableRequest): Requested page
+        columnar (bool): Return the page as frame_columns() instead of records
+
+    Returns:
+        tuple: (row dicts or columns, page description for the response)
+    """
+    df = snapshot.df
+    page_positions = np.asarray(positions[request.offset:request.offset + request.limit], dtype=np.intp)
+    page_frame = df.iloc[page_positions, df.columns.get_indexer(request.columns)]
+    rows = frame_columns(page_frame) if columnar else frame_records(page_frame)
+
+    end = request.offset + len(page_positions)
+    page = {
+        'offset': request.offset,
+        'limit': request.limit,
+        'total_rows': len(positions),
+        'columns': request.columns,
+        'next_cursor': encode_cursor(end) if end < len(positions) else None,
+    }
+    return rows, page
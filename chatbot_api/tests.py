@@ -1,3 +1,865 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+import numpy as np
+import pandas as pd
+
+from . import dataset_registry as registry_module
+from . import llm_service
+from .api import handle_nan_values
+from .area_matcher import AreaMatcher
+from .circuit_breaker import CircuitBreaker
+from .column_store import read_column_store, write_column_store
+from .dataset_store import EXCEL_FILE, DatasetSnapshot, DatasetStore, dataset_store
+from .ingest import build_column_store, ingest_file
+from .jobs import _ingest_executor, _process_token, recover_ingestion_jobs, run_ingestion
+from .metrics import PROMETHEUS_AVAILABLE
+from .models import UploadedFile
+from .query_engine import analyze_query, resolve_summary
+from .response_cache import get_response_cache, make_cache_key
+from .serialization import (
+    ArrowStreamRenderer, ColumnarJSONRenderer, clean_array, columnar_values, frame_records, msgpack, pa,
+)
+from .sql_index import SQLAreaIndex, version_table
+from .summary_batcher import SummaryBatcher
+from .summary_cache import summary_cache_key
+from .table_pages import decode_cursor, encode_cursor, parse_table_request, table_page
+from .warmup import _should_stop
+
+SAMPLE_CSV = b"final location,year,flat - weighted average rate,total sold - igr\nWakad,2021,7000,120\nWakad,2022,7600,135\n"
+
+# Responses of the original ChatbotQueryView to Sample_data.xlsx, without an LLM
+BASELINE_RESPONSES = os.path.join(os.path.dirname(__file__), 'testdata', 'baseline_responses.json')
+
+
+class TemporaryStorageMixin:
+    """Run against throwaway media and dataset directories"""
+
+    def setUp(self):
+        super().setUp()
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=os.path.join(workdir, 'media'))
+        media.enable()
+        self.addCleanup(media.disable)
+        datasets = mock.patch.object(registry_module, 'DATASETS_DIR', os.path.join(workdir, 'datasets'))
+        datasets.start()
+        self.addCleanup(datasets.stop)
+
+    def wait_for_job(self, upload_id, timeout=10):
+        # Jobs run one at a time in submission order, so they are all done
+        # once a no-op queued after them has run. Polling the row instead
+        # races the job's writes on the shared in-memory test database
+        _ingest_executor.submit(lambda: None).result(timeout=timeout)
+        return UploadedFile.objects.get(pk=upload_id)
+
+
+def temporary_dir(test):
+    workdir = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+    return workdir
+
+
+def materialized(df):
+    """In-memory copy of a column store frame, with text columns as objects like pandas reads them"""
+    return df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+def sample_snapshot():
+    return DatasetSnapshot.from_frame(pd.read_csv(io.BytesIO(SAMPLE_CSV)))
+
+
+def open_breaker(reset_timeout=0.05):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    return breaker
+
+
+def stream_chunks(*texts):
+    return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))]) for text in texts])
+
+
+class AreaMatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.matcher = AreaMatcher(['Nagar', 'Viman Nagar', 'Baner', 'Aundh', 'Baner Road'])
+
+    def test_longest_name_wins(self):
+        self.assertEqual(self.matcher.find("price trend in viman nagar"), ['Viman Nagar'])
+        self.assertEqual(self.matcher.find("compare nagar and baner road"), ['Nagar', 'Baner Road'])
+
+    def test_matches_stop_at_word_boundaries(self):
+        self.assertEqual(self.matcher.find("bannered aundhkar listings"), [])
+        self.assertEqual(self.matcher.find("Aundh's demand, vs. BANER?"), ['Baner', 'Aundh'])
+
+    def test_results_follow_dataset_order(self):
+        self.assertEqual(self.matcher.find("aundh, baner and viman nagar"), ['Viman Nagar', 'Baner', 'Aundh'])
+
+
+class CleanArrayTests(SimpleTestCase):
+    def test_nan_and_inf_become_none(self):
+        self.assertEqual(clean_array(np.array([1.5, np.nan, np.inf, -np.inf, 0.0])), [1.5, None, None, None, 0.0])
+        self.assertEqual(clean_array(pd.Series([np.nan, 2.0, np.inf])), [None, 2.0, None])
+        mixed = np.array(['x', None, np.nan, np.inf, 3], dtype=object)
+        self.assertEqual(clean_array(mixed), ['x', None, None, None, 3])
+
+    def test_integers_and_booleans_pass_through(self):
+        self.assertEqual(clean_array(np.array([1, 2, 3])), [1, 2, 3])
+        self.assertEqual(clean_array(pd.Series([True, False])), [True, False])
+        self.assertEqual([type(value) for value in clean_array(np.array([1, 2]))], [int, int])
+
+    def test_missing_datetimes_and_categories_become_none(self):
+        self.assertEqual(clean_array(pd.Series(pd.to_datetime(['2021-01-01', None]))),
+                         [pd.Timestamp('2021-01-01'), None])
+        self.assertEqual(clean_array(pd.Series(['Wakad', None, 'Aundh'], dtype='category')), ['Wakad', None, 'Aundh'])
+
+    def test_matches_handle_nan_values(self):
+        df = pd.DataFrame({'area': ['Wakad', None], 'rate': [7000.0, np.nan], 'sold': [120, 135]})
+        self.assertEqual(frame_records(df), handle_nan_values(df.to_dict('records')))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_half_open_trial_closes_or_reopens(self):
+        breaker = open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        # Only one trial at a time
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+        breaker = open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_unreported_trial_is_retried_after_reset_timeout(self):
+        breaker = open_breaker()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+
+
+class BreakerAbandonmentTests(SimpleTestCase):
+    def setUp(self):
+        self.breaker = open_breaker()
+        time.sleep(0.06)
+        cache_miss = mock.patch.object(llm_service.summary_cache, 'get', return_value=None)
+        cache_miss.start()
+        self.addCleanup(cache_miss.stop)
+        patcher = mock.patch.object(llm_service, 'llm_breaker', self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_closed_stream_counts_as_failed_trial(self):
+        fake_client = mock.Mock()
+        fake_client.chat.completions.create.return_value = stream_chunks("Wakad ", "is ", "growing")
+        with mock.patch.object(llm_service, 'client', fake_client):
+            events = llm_service.stream_summary({'area_info': 'Wakad'}, "analyze wakad")
+            self.assertEqual(next(events), ('delta', "Wakad "))
+            self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+            # Client disconnect
+            events.close()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_finished_stream_closes_breaker(self):
+        fake_client = mock.Mock()
+        fake_client.chat.completions.create.return_value = stream_chunks("Wakad ", "is ", "growing")
+        with mock.patch.object(llm_service, 'client', fake_client), \
+                mock.patch.object(llm_service.summary_cache, 'set'):
+            events = list(llm_service.stream_summary({'area_info': 'Wakad'}, "analyze wakad"))
+        self.assertEqual(events[-1], ('summary', "Wakad is growing"))
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_cancelled_async_summary_counts_as_failed_trial(self):
+        async def slow_complete(*args):
+            await asyncio.sleep(10)
+
+        async def cancel_midway():
+            task = asyncio.ensure_future(llm_service.asummarize({'area_info': 'Wakad'}, "analyze wakad", timeout=5))
+            await asyncio.sleep(0.01)
+            self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with mock.patch.object(llm_service, 'async_client', mock.Mock()), \
+                mock.patch.object(llm_service, '_acomplete', slow_complete):
+            asyncio.run(cancel_midway())
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+
+class SummaryBatcherBreakerTests(SimpleTestCase):
+    def run_batch(self, complete_batch, count=5):
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+        batcher = SummaryBatcher(complete_batch, ThreadPoolExecutor(max_workers=1), max_batch=count, max_wait=1.0,
+                                 breaker=breaker)
+        futures = [batcher.submit({'area_info': str(i)}, "analyze", str(i)) for i in range(count)]
+        wait(futures, timeout=5)
+        return breaker, futures
+
+    def test_failed_batch_is_one_breaker_failure(self):
+        def fail(items):
+            raise RuntimeError("upstream error")
+
+        breaker, futures = self.run_batch(fail)
+        self.assertTrue(all(isinstance(f.exception(), RuntimeError) for f in futures))
+        self.assertEqual(breaker.failures, 1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_successful_batch_resolves_every_caller(self):
+        breaker, futures = self.run_batch(lambda items: [context['area_info'] for context, _, _ in items])
+        self.assertEqual([f.result() for f in futures], ['0', '1', '2', '3', '4'])
+        self.assertEqual(breaker.failures, 0)
+
+    @skipUnless(PROMETHEUS_AVAILABLE, "prometheus_client is not installed")
+    def test_batch_sizes_are_exported(self):
+        from prometheus_client import REGISTRY
+
+        def sample(name):
+            return REGISTRY.get_sample_value(name) or 0.0
+
+        before = sample('chatbot_llm_batch_size_count'), sample('chatbot_llm_batch_size_sum')
+        self.run_batch(lambda items: [None] * len(items), count=3)
+        self.assertEqual(sample('chatbot_llm_batch_size_count') - before[0], 1)
+        self.assertEqual(sample('chatbot_llm_batch_size_sum') - before[1], 3)
+
+
+class ColumnStoreTypeTests(SimpleTestCase):
+    def assert_same_values(self, stored, expected):
+        pd.testing.assert_frame_equal(materialized(stored), expected)
+        for column in expected:
+            self.assertEqual([type(value) for value in stored[column].dropna()],
+                             [type(value) for value in expected[column].dropna()])
+
+    def test_mixed_column_keeps_python_types(self):
+        workdir = temporary_dir(self)
+        path = os.path.join(workdir, 'mixed.xlsx')
+        pd.DataFrame({'area': ['Wakad', 'Aundh', 'Baner', 'Hinjewadi'],
+                      'year': [2021, 2022, 'n/a', 2023],
+                      'rate': [7000, 'x', 'y', True],
+                      'note': [1.5, 'a', 2, 'b']}).to_excel(path, index=False)
+        manifest = os.path.join(workdir, 'store', 'manifest.json')
+        os.makedirs(os.path.dirname(manifest))
+        # Chunks of two rows, so 'year' starts out numeric and is promoted
+        ingest_file(path, '.xlsx', manifest, chunk_rows=2)
+
+        self.assert_same_values(read_column_store(manifest), pd.read_excel(path))
+
+    def test_values_equal_across_types_stay_distinct(self):
+        manifest = os.path.join(temporary_dir(self), 'store', 'manifest.json')
+        os.makedirs(os.path.dirname(manifest))
+        # 1, 1.0 and True can't all be categories, so this column is decoded to objects
+        write_column_store(pd.DataFrame({'flag': [1, True, 1.0, 'c', None]}, dtype=object), manifest)
+        self.assertEqual([(type(value), value) for value in read_column_store(manifest)['flag']],
+                         [(int, 1), (bool, True), (float, 1.0), (str, 'c'), (type(None), None)])
+
+    def test_chunked_csv_reads_mixed_columns_like_read_csv(self):
+        workdir = temporary_dir(self)
+        path = os.path.join(workdir, 'mixed.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("code,flag,rate\n1,true,7000\n2,,7600\n3,false,\nx,true,7900.5\n5,5,8100\n6,false,8300\n")
+        expected = pd.read_csv(path)
+        for chunk_rows in (1, 2, 4, 100):
+            with self.subTest(chunk_rows=chunk_rows):
+                manifest = os.path.join(workdir, str(chunk_rows), 'manifest.json')
+                os.makedirs(os.path.dirname(manifest))
+                ingest_file(path, '.csv', manifest, chunk_rows=chunk_rows)
+                self.assert_same_values(read_column_store(manifest), expected)
+
+
+class IngestionRecoveryTests(TemporaryStorageMixin, TransactionTestCase):
+    def pending_upload(self, worker, status=UploadedFile.STATUS_RUNNING):
+        return UploadedFile.objects.create(
+            file=SimpleUploadedFile('sample.csv', SAMPLE_CSV), original_name='sample.csv', name='sample',
+            content_hash=f"recovery-{worker}", status=status, worker=worker,
+        )
+
+    def test_abandoned_jobs_are_requeued_once(self):
+        # A pid that can't exist, and the parent (test runner) process, which does
+        abandoned = self.pending_upload('4194305:0')
+        queued = self.pending_upload('', status=UploadedFile.STATUS_QUEUED)
+        parent = os.getppid()
+        alive = self.pending_upload(f"{parent}:{_process_token(parent)}")
+
+        self.assertEqual(sorted(recover_ingestion_jobs()), sorted([abandoned.pk, queued.pk]))
+        self.assertEqual(recover_ingestion_jobs(), [])
+        self.assertEqual(self.wait_for_job(abandoned.pk).status, UploadedFile.STATUS_SUCCEEDED)
+        self.assertEqual(self.wait_for_job(queued.pk).rows, 2)
+        self.assertEqual(UploadedFile.objects.get(pk=alive.pk).status, UploadedFile.STATUS_RUNNING)
+
+
+class FailedIngestionTests(TemporaryStorageMixin, TestCase):
+    def test_failure_leaves_other_versions_of_the_same_content(self):
+        upload = UploadedFile.objects.create(
+            file=SimpleUploadedFile('broken.parquet', b"not parquet"), original_name='broken.parquet',
+            name='broken', content_hash='shared',
+        )
+        # Another upload of the same bytes, still writing its version
+        other_version = os.path.join(os.path.dirname(registry_module.dataset_manifest('shared')), 'other-version')
+        os.makedirs(other_version)
+
+        run_ingestion(upload.pk)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, UploadedFile.STATUS_FAILED)
+        self.assertEqual(os.listdir(os.path.dirname(other_version)), ['other-version'])
+
+
+class WarmupCancellationTests(TestCase):
+    def upload(self, name):
+        return UploadedFile.objects.create(file='uploads/sample.csv', name=name, status=UploadedFile.STATUS_SUCCEEDED)
+
+    def test_only_newer_uploads_of_the_same_dataset_stop_a_warmup(self):
+        warming = self.upload('pune')
+        jobs = UploadedFile.objects.filter(pk=warming.pk)
+        self.upload('mumbai')
+        self.assertFalse(_should_stop(jobs, warming.pk, 'pune'))
+        self.upload('pune')
+        self.assertTrue(_should_stop(jobs, warming.pk, 'pune'))
+        with override_settings(CHATBOT_WARMUP_CANCEL_ON_NEW_UPLOAD=False):
+            self.assertFalse(_should_stop(jobs, warming.pk, 'pune'))
+
+
+class SQLIndexVersionTests(TestCase):
+    def test_superseded_versions_are_dropped(self):
+        from .schema import detect_schema
+
+        df = pd.DataFrame({'final location': ['Wakad', 'Aundh'], 'year': [2022, 2022],
+                           'flat - weighted average rate': [7000.0, 8000.0], 'total sold - igr': [120, 90]})
+        schema = detect_schema(df)
+        other = SQLAreaIndex(df, schema, version_table('/data/other.xlsx', 1, 10))
+        tables = [SQLAreaIndex(df, schema, version_table('/data/pune.xlsx', mtime, 10)).table for mtime in (1, 2, 3)]
+
+        with connection.cursor() as cursor:
+            names = set(connection.introspection.table_names(cursor))
+        # The current and one previous version of the file; other files are untouched
+        self.assertNotIn(tables[0], names)
+        self.assertTrue({tables[1], tables[2], other.table} <= names)
+        self.assertIn('Wakad', SQLAreaIndex(df, schema, tables[2]))
+
+
+@skipUnless(PROMETHEUS_AVAILABLE, "prometheus_client is not installed")
+class SummaryCacheMetricsTests(SimpleTestCase):
+    def test_hits_misses_and_saved_latency_are_exported(self):
+        from prometheus_client import REGISTRY
+        from .summary_cache import SummaryCache
+
+        def sample(name, labels=None):
+            return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+        before = (sample('chatbot_summary_cache_lookups_total', {'result': 'hit'}),
+                  sample('chatbot_summary_cache_lookups_total', {'result': 'miss'}),
+                  sample('chatbot_summary_cache_saved_seconds_total'))
+        cache = SummaryCache(max_entries=4)
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', "Wakad is growing", 1.5)
+        self.assertEqual(cache.get('key'), "Wakad is growing")
+
+        self.assertEqual(sample('chatbot_summary_cache_lookups_total', {'result': 'hit'}) - before[0], 1)
+        self.assertEqual(sample('chatbot_summary_cache_lookups_total', {'result': 'miss'}) - before[1], 1)
+        self.assertEqual(sample('chatbot_summary_cache_saved_seconds_total') - before[2], 1.5)
+
+
+class ResponseCacheBackendTests(SimpleTestCase):
+    def test_backends_count_lookups_and_clear(self):
+        from .response_cache import DjangoResponseCache, LocMemResponseCache
+
+        def sample(result):
+            if not PROMETHEUS_AVAILABLE:
+                return 0.0
+            from prometheus_client import REGISTRY
+            return REGISTRY.get_sample_value('chatbot_response_cache_lookups_total', {'result': result}) or 0.0
+
+        for cache in (LocMemResponseCache(max_entries=4), DjangoResponseCache()):
+            with self.subTest(backend=type(cache).__name__):
+                before = sample('hit'), sample('miss')
+                self.assertIsNone(cache.get('chatbot:response:test'))
+                cache.set('chatbot:response:test', {'summary': "Wakad"})
+                self.assertEqual(cache.get('chatbot:response:test'), {'summary': "Wakad"})
+                cache.clear()
+                self.assertIsNone(cache.get('chatbot:response:test'))
+                if PROMETHEUS_AVAILABLE:
+                    self.assertEqual(sample('hit') - before[0], 1)
+                    self.assertEqual(sample('miss') - before[1], 2)
+
+
+class DatasetStoreTests(SimpleTestCase):
+    def test_missing_file_serves_previous_snapshot(self):
+        path = os.path.join(temporary_dir(self), 'sample.csv')
+        with open(path, 'wb') as f:
+            f.write(SAMPLE_CSV)
+        store = DatasetStore(path, loader=pd.read_csv)
+        snapshot = store.get()
+
+        os.remove(path)
+        self.assertIs(store.get(), snapshot)
+        with open(path, 'wb') as f:
+            f.write(SAMPLE_CSV + b"Aundh,2022,8100,90\n")
+        self.assertEqual(len(store.get().df), 3)
+
+
+@skipUnless(PROMETHEUS_AVAILABLE, "prometheus_client is not installed")
+class DatasetStoreMetricsTests(SimpleTestCase):
+    def test_hits_and_misses_are_exported(self):
+        from prometheus_client import REGISTRY
+
+        def sample(result):
+            return REGISTRY.get_sample_value('chatbot_dataset_lookups_total',
+                                             {'dataset': 'sample.csv', 'result': result}) or 0.0
+
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        path = os.path.join(workdir, 'sample.csv')
+        with open(path, 'wb') as f:
+            f.write(SAMPLE_CSV)
+
+        before = sample('hit'), sample('miss')
+        store = DatasetStore(path, loader=pd.read_csv)
+        self.assertIs(store.get(), store.get())
+        self.assertEqual(sample('hit') - before[0], 1)
+        self.assertEqual(sample('miss') - before[1], 1)
+
+
+@skipUnless(PROMETHEUS_AVAILABLE, "prometheus_client is not installed")
+class DatasetRegistryMetricsTests(SimpleTestCase):
+    def test_loads_and_evictions_are_exported(self):
+        from prometheus_client import REGISTRY
+
+        def sample(name):
+            return REGISTRY.get_sample_value(name) or 0.0
+
+        before = sample('chatbot_dataset_registry_loads_total'), sample('chatbot_dataset_registry_evictions_total')
+        registry = registry_module.DatasetRegistry(max_datasets=2)
+        for name in ('a', 'b', 'c', 'a'):
+            registry._add(f"/datasets/{name}/manifest.json", object())
+
+        self.assertEqual(sample('chatbot_dataset_registry_loads_total') - before[0], 4)
+        self.assertEqual(sample('chatbot_dataset_registry_evictions_total') - before[1], 2)
+        self.assertEqual(sample('chatbot_dataset_registry_loaded'), 2)
+
+
+class ServerTimingTests(TestCase):
+    def test_response_carries_server_timing(self):
+        response = self.client.get('/api/datasets/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'(^|, )total;dur=\d+\.\d{2}$')
+
+
+@skipUnless(msgpack is not None, "msgpack is not installed")
+class MessagePackNegotiationTests(TestCase):
+    def test_both_media_types_are_accepted(self):
+        for media_type in ('application/msgpack', 'application/x-msgpack'):
+            with self.subTest(media_type=media_type):
+                response = self.client.post('/api/query/', {'query': "analyze wakad"}, content_type='application/json',
+                                            HTTP_ACCEPT=media_type)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], media_type)
+                body = msgpack.unpackb(response.content)
+                self.assertEqual(set(body['table_data']), {'columns', 'data'})
+
+
+class AsyncQueryViewTests(TestCase):
+    def post(self, client, body, **extra):
+        if client is self.async_client:
+            return async_to_sync(client.post)('/api/query/async/', body, content_type='application/json', **extra)
+        return client.post('/api/query/', body, content_type='application/json', **extra)
+
+    def test_answers_like_the_sync_view(self):
+        with mock.patch.object(llm_service, 'client', None), mock.patch.object(llm_service, 'async_client', None):
+            for query in ("analyze wakad", "compare wakad and aundh", "show top areas by demand"):
+                with self.subTest(query=query):
+                    # Both views share the response cache; each computes its own answer here
+                    get_response_cache().clear()
+                    expected = self.post(self.client, {'query': query})
+                    get_response_cache().clear()
+                    response = self.post(self.async_client, {'query': query})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+    def test_bad_requests_are_rejected(self):
+        self.assertEqual(self.post(self.async_client, "{not json").status_code, 400)
+        self.assertEqual(self.post(self.async_client, {'query': "analyze wakad", 'dataset_id': "x"}).status_code, 400)
+        self.assertEqual(self.post(self.async_client, {'query': "analyze wakad", 'dataset_id': 999}).status_code, 404)
+
+
+class BatchQueryViewTests(TestCase):
+    def setUp(self):
+        get_response_cache().clear()
+        patcher = mock.patch.object(llm_service, 'client', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, body):
+        return self.client.post('/api/query/batch/', body, content_type='application/json')
+
+    def test_results_follow_query_order(self):
+        queries = ["analyze wakad", "compare aundh and akurdi", "show top areas", "aundh demand"]
+        expected = []
+        for query in queries:
+            get_response_cache().clear()
+            response = self.client.post('/api/query/', {'query': query}, content_type='application/json')
+            expected.append(json.loads(response.content))
+        get_response_cache().clear()
+        response = self.post({'queries': queries})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['results'], expected)
+
+    def test_equivalent_queries_are_answered_once(self):
+        queries = ["Analyze  Wakad", "compare aundh and akurdi", "analyze wakad", "compare akurdi and aundh"]
+        with mock.patch('chatbot_api.api.analyze_query', wraps=analyze_query) as analyze:
+            results = json.loads(self.post({'queries': queries}).content)['results']
+        self.assertEqual(analyze.call_count, 2)
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(results[1], results[3])
+        self.assertNotEqual(results[0], results[1])
+
+    @override_settings(CHATBOT_BATCH_MAX_QUERIES=2)
+    def test_invalid_batches_are_rejected(self):
+        self.assertEqual(self.post({'queries': "analyze wakad"}).status_code, 400)
+        self.assertEqual(self.post({'queries': ["analyze wakad", 3]}).status_code, 400)
+        self.assertEqual(self.post({'queries': ["analyze wakad"] * 3}).status_code, 400)
+
+
+class StreamingQueryTests(TestCase):
+    def setUp(self):
+        get_response_cache().clear()
+        for patcher in (mock.patch.object(llm_service, 'llm_breaker', CircuitBreaker()),
+                        mock.patch.object(llm_service.summary_cache, 'get', return_value=None),
+                        mock.patch.object(llm_service.summary_cache, 'set'),
+                        mock.patch.object(llm_service, 'generate_fallback_summary', return_value="Fallback")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def stream(self, stream_format, chunks):
+        fake_client = mock.Mock()
+        fake_client.chat.completions.create.return_value = chunks
+        with mock.patch.object(llm_service, 'client', fake_client):
+            response = self.client.post(f'/api/query/?format={stream_format}', {'query': "analyze wakad"},
+                                        content_type='application/json')
+            body = b"".join(response.streaming_content).decode('utf-8')
+        if stream_format == 'sse':
+            events = [block.split("\n") for block in body.split("\n\n") if block]
+            return [(event[len("event: "):], json.loads(data[len("data: "):])) for event, data in events]
+        return [(line.pop('event'), line) for line in map(json.loads, body.splitlines())]
+
+    def test_data_then_deltas_then_summary(self):
+        for stream_format in ('sse', 'ndjson'):
+            with self.subTest(stream_format=stream_format):
+                get_response_cache().clear()
+                events = self.stream(stream_format, stream_chunks("Wakad ", "is growing"))
+                self.assertEqual([name for name, _ in events], ['data', 'summary_delta', 'summary_delta', 'summary'])
+                self.assertEqual(set(events[0][1]), {'chart_data', 'table_data'})
+                self.assertEqual([data['delta'] for _, data in events[1:3]], ["Wakad ", "is growing"])
+                self.assertEqual(events[-1][1], {'summary': "Wakad is growing"})
+
+                # The finished answer is cached and replayed without deltas
+                events = self.stream(stream_format, stream_chunks("not ", "used"))
+                self.assertEqual([name for name, _ in events], ['data', 'summary'])
+                self.assertEqual(events[-1][1], {'summary': "Wakad is growing"})
+
+    def test_missed_deadline_ends_with_uncached_fallback(self):
+        def timed_out_stream():
+            yield from stream_chunks("Wakad ")
+            # The client's per-chunk timeout expiring mid-stream
+            raise TimeoutError("Request timed out")
+
+        for stream_format in ('sse', 'ndjson'):
+            with self.subTest(stream_format=stream_format):
+                events = self.stream(stream_format, timed_out_stream())
+                self.assertEqual([name for name, _ in events], ['data', 'summary_delta', 'summary'])
+                self.assertEqual(events[-1][1], {'summary': "Fallback"})
+                self.assertIsNone(get_response_cache().get(make_cache_key("analyze wakad", dataset_store.get())))
+
+
+class ColumnarRendererTests(TestCase):
+    def setUp(self):
+        get_response_cache().clear()
+        patcher = mock.patch.object(llm_service, 'client', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def columnar_data(self):
+        df = pd.DataFrame({'area': ['Wakad', None, 'Aundh'], 'rate': [7000.5, np.nan, np.inf], 'sold': [120, 135, 90],
+                           'mixed': [1, 'x', None]})
+        return columnar_values({'summary': "Rates", 'chart_data': {'labels': np.array([2021, 2022])},
+                                'table_data': df})
+
+    def test_columnar_json_with_and_without_orjson(self):
+        expected = {
+            'summary': "Rates",
+            'chart_data': {'labels': [2021, 2022]},
+            'table_data': {'columns': ['area', 'rate', 'sold', 'mixed'],
+                           'data': [['Wakad', None, 'Aundh'], [7000.5, None, None], [120, 135, 90], [1, 'x', None]]},
+        }
+        renderer = ColumnarJSONRenderer()
+        self.assertEqual(json.loads(renderer.render(self.columnar_data())), expected)
+        with mock.patch('chatbot_api.serialization.orjson', None):
+            self.assertEqual(json.loads(renderer.render(self.columnar_data())), expected)
+
+    @skipUnless(pa is not None, "pyarrow is not installed")
+    def test_arrow_stream_carries_table_and_metadata(self):
+        body = ArrowStreamRenderer().render(self.columnar_data())
+        table = pa.ipc.open_stream(body).read_all()
+        self.assertEqual(table.column_names, ['area', 'rate', 'sold', 'mixed'])
+        self.assertEqual(table.column('area').to_pylist(), ['Wakad', None, 'Aundh'])
+        self.assertEqual(table.column('rate').to_pylist(), [7000.5, None, None])
+        self.assertEqual(table.column('sold').to_pylist(), [120, 135, 90])
+        # Mixed-type text columns go out as strings
+        self.assertEqual(table.column('mixed').to_pylist(), ['1', 'x', None])
+        metadata = json.loads(table.schema.metadata[b'chatbot'])
+        self.assertEqual(metadata, {'summary': "Rates", 'chart_data': {'labels': [2021, 2022]}})
+
+    def test_columnar_response_matches_records(self):
+        body = {'query': "analyze wakad"}
+        records = json.loads(self.client.post('/api/query/', body, content_type='application/json').content)
+        response = self.client.post('/api/query/', body, content_type='application/json',
+                                    HTTP_ACCEPT=ColumnarJSONRenderer.media_type)
+        self.assertEqual(response['Content-Type'], ColumnarJSONRenderer.media_type)
+        columnar = json.loads(response.content)
+        table = columnar.pop('table_data')
+        self.assertEqual([dict(zip(table['columns'], row)) for row in zip(*table['data'])],
+                         records.pop('table_data'))
+        self.assertEqual(columnar, records)
+
+
+class BaselineResponseTests(SimpleTestCase):
+    def assert_matches_baseline(self, snapshot):
+        with open(BASELINE_RESPONSES, encoding='utf-8') as f:
+            baseline = json.load(f)
+        with mock.patch.object(llm_service, 'client', None), \
+                mock.patch.object(llm_service.summary_cache, 'get', return_value=None), \
+                mock.patch.object(llm_service.summary_cache, 'set'):
+            for query, expected in baseline.items():
+                with self.subTest(query=query):
+                    response, pending_summary = analyze_query(query.lower(), snapshot)
+                    if pending_summary is not None:
+                        response['summary'] = resolve_summary(pending_summary)
+                    self.assertEqual(json.loads(json.dumps(handle_nan_values(response))), expected)
+
+    def test_column_store_answers_like_the_original_view(self):
+        self.assert_matches_baseline(dataset_store.get())
+
+    def test_workbook_frame_answers_like_the_original_view(self):
+        self.assert_matches_baseline(DatasetSnapshot.from_frame(pd.read_excel(EXCEL_FILE)))
+
+
+class SQLiteBaselineResponseTests(BaselineResponseTests, TestCase):
+    def test_column_store_answers_like_the_original_view(self):
+        df = pd.read_excel(EXCEL_FILE)
+        with override_settings(CHATBOT_QUERY_ENGINE='sqlite'):
+            snapshot = DatasetSnapshot(df, EXCEL_FILE, 1, 1, 0.0)
+        self.assertIsInstance(snapshot.area_index, SQLAreaIndex)
+        self.assert_matches_baseline(snapshot)
+
+
+class SingleAreaOrderTests(TestCase):
+    def snapshot(self, engine):
+        # Years out of order, and another area's row in between
+        df = pd.DataFrame({'final location': ['Wakad', 'Aundh', 'Wakad', 'Wakad'], 'year': [2022, 2022, 2020, 2021],
+                           'flat - weighted average rate': [8000, 9000, 6000, 7000],
+                           'total sold - igr': [150, 90, 110, 130]})
+        with override_settings(CHATBOT_QUERY_ENGINE=engine):
+            return DatasetSnapshot(df, f"/data/shuffled-{engine}.csv", 1, 1, 0.0)
+
+    def test_rows_keep_frame_order_and_trends_use_year_order(self):
+        for engine in ('pandas', 'sqlite'):
+            with self.subTest(engine=engine):
+                response, _ = analyze_query("wakad price", self.snapshot(engine))
+                self.assertEqual(response['table_data']['year'].tolist(), [2022, 2020, 2021])
+                self.assertEqual(list(response['chart_data']['labels']), [2022, 2020, 2021])
+                self.assertEqual(list(response['chart_data']['datasets'][0]['data']), [8000, 6000, 7000])
+                self.assertIn("increased by 33.3% from 6000.00 to 8000.00", response['summary'])
+
+
+class CacheKeyTests(SimpleTestCase):
+    def keys(self, store, query="analyze wakad"):
+        snapshot = store.get()
+        _, pending_summary = analyze_query(query, snapshot)
+        return make_cache_key(query, snapshot), summary_cache_key(pending_summary.data_context, query)
+
+    def test_new_dataset_version_changes_both_keys(self):
+        path = os.path.join(temporary_dir(self), 'sample.csv')
+        with open(path, 'wb') as f:
+            f.write(SAMPLE_CSV)
+        store = DatasetStore(path, loader=pd.read_csv)
+        first = self.keys(store)
+        self.assertEqual(self.keys(store), first)
+
+        with open(path, 'wb') as f:
+            f.write(SAMPLE_CSV.replace(b"7600", b"7900"))
+        # Make sure the version differs even on filesystems with coarse mtimes
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        second = self.keys(store)
+        self.assertNotEqual(second[0], first[0])
+        self.assertNotEqual(second[1], first[1])
+
+
+    def test_area_order_and_case_share_a_key(self):
+        rows = SAMPLE_CSV + b"Aundh,2022,9000,90\nBaner,2022,8800,60\n"
+        snapshot = DatasetSnapshot.from_frame(pd.read_csv(io.BytesIO(rows)))
+        key = make_cache_key("compare aundh and baner", snapshot)
+        self.assertEqual(make_cache_key("compare baner and aundh", snapshot), key)
+        self.assertEqual(make_cache_key("Compare Baner and Aundh".lower(), snapshot), key)
+        self.assertNotEqual(make_cache_key("compare aundh and wakad", snapshot), key)
+        self.assertNotEqual(make_cache_key("compare aundh with baner", snapshot), key)
+
+
+class TableRequestTests(SimpleTestCase):
+    def setUp(self):
+        self.snapshot = sample_snapshot()
+
+    def test_no_table_params_means_whole_table(self):
+        self.assertIsNone(parse_table_request({'query': "analyze wakad"}, self.snapshot))
+
+    @override_settings(CHATBOT_TABLE_DEFAULT_LIMIT=5, CHATBOT_TABLE_MAX_LIMIT=10)
+    def test_malformed_params_are_rejected(self):
+        for params, message in [
+            ({'limit': 'ten'}, "'limit' must be an integer"),
+            ({'limit': 0}, "'limit' must be at least 1"),
+            ({'limit': 11}, "'limit' can be at most 10"),
+            ({'offset': -1}, "'offset' must be at least 0"),
+            ({'cursor': 'not-a-cursor'}, "Invalid cursor"),
+            ({'cursor': encode_cursor(-5)}, "Invalid cursor"),
+            ({'columns': [1, 2]}, "'columns' must be a list of column names"),
+            ({'columns': 'year,price'}, "Unknown columns: price"),
+        ]:
+            with self.subTest(params=params):
+                with self.assertRaisesMessage(ValueError, message):
+                    parse_table_request(params, self.snapshot)
+
+    def test_cursor_walks_every_page(self):
+        self.assertEqual(decode_cursor(encode_cursor(42)), 42)
+        positions = list(range(len(self.snapshot.df)))
+        request = parse_table_request({'limit': 1, 'columns': 'year, flat - weighted average rate'}, self.snapshot)
+
+        rows, page = table_page(self.snapshot, positions, request)
+        self.assertEqual(rows, [{'year': 2021, 'flat - weighted average rate': 7000}])
+        self.assertEqual(page['total_rows'], 2)
+
+        request = parse_table_request({'limit': 1, 'cursor': page['next_cursor'], 'columns': ['year']}, self.snapshot)
+        self.assertEqual(request.offset, 1)
+        rows, page = table_page(self.snapshot, positions, request)
+        self.assertEqual(rows, [{'year': 2022}])
+        self.assertIsNone(page['next_cursor'])
+
+
+class TableQueryViewTests(TestCase):
+    def setUp(self):
+        get_response_cache().clear()
+        patcher = mock.patch.object(llm_service, 'client', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def query(self, body):
+        return json.loads(self.client.post('/api/query/', body, content_type='application/json').content)
+
+    def test_pages_add_up_to_the_whole_table(self):
+        query = "analyze wakad"
+        table = self.query({'query': query})['table_data']
+        self.assertGreater(len(table), 2)
+
+        first = self.query({'query': query, 'limit': 2})
+        self.assertEqual(first['table_page']['total_rows'], len(table))
+        rows = first['table_data']
+        cursor = first['table_page']['next_cursor']
+        while cursor:
+            # Later pages come from the row positions cached by the paged query
+            with mock.patch('chatbot_api.api.analyze_query') as analyze:
+                response = self.client.get('/api/query/table/', {'query': query, 'limit': 2, 'cursor': cursor})
+            page = json.loads(response.content)
+            analyze.assert_not_called()
+            self.assertNotIn('summary', page)
+            rows += page['table_data']
+            cursor = page['table_page']['next_cursor']
+        self.assertEqual(rows, table)
+
+    def test_columns_and_columnar_format(self):
+        params = {'query': "analyze wakad", 'limit': 3, 'offset': 1, 'columns': "year", 'format': 'columnar'}
+        response = self.client.get('/api/query/table/', params)
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(response.content)
+        self.assertEqual(body['table_data']['columns'], ['year'])
+        self.assertEqual(len(body['table_data']['data'][0]), 3)
+        self.assertEqual(body['table_page']['offset'], 1)
+
+    def test_bad_params_are_rejected(self):
+        response = self.client.get('/api/query/table/', {'query': "analyze wakad", 'limit': 'ten'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {'error': "'limit' must be an integer"})
+
+
+class ColumnStoreRoundTripTests(SimpleTestCase):
+    def manifest(self):
+        manifest = os.path.join(temporary_dir(self), 'store', 'manifest.json')
+        os.makedirs(os.path.dirname(manifest))
+        return manifest
+
+    def test_workbook_reads_back_like_read_excel(self):
+        manifest = self.manifest()
+        build_column_store(EXCEL_FILE, manifest, chunk_rows=7)
+        pd.testing.assert_frame_equal(materialized(read_column_store(manifest)), pd.read_excel(EXCEL_FILE))
+
+    def test_text_columns_keep_mapped_codes(self):
+        manifest = self.manifest()
+        build_column_store(EXCEL_FILE, manifest)
+        df = read_column_store(manifest)
+        text_columns = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+        self.assertTrue(text_columns)
+        for col in text_columns:
+            # A decoded copy would be writeable; the mapped codes are not
+            self.assertFalse(df[col].array.codes.flags.writeable)
+
+    def test_csv_reads_back_like_read_csv(self):
+        path = os.path.join(temporary_dir(self), 'sample.csv')
+        with open(path, 'wb') as f:
+            f.write(SAMPLE_CSV + b"Aundh,2021,,90\nAundh,2022,8100.5,\nBaner,,8800,60\n")
+        manifest = self.manifest()
+        ingest_file(path, '.csv', manifest, chunk_rows=2)
+        pd.testing.assert_frame_equal(materialized(read_column_store(manifest)), pd.read_csv(path))
+
+
+class UploadFlowTests(TemporaryStorageMixin, TransactionTestCase):
+    def test_uploaded_dataset_can_be_queried_by_id(self):
+        response = self.client.post('/api/upload/', {'file': SimpleUploadedFile('pune.csv', SAMPLE_CSV)})
+        self.assertEqual(response.status_code, 202)
+        dataset_id = response.json()['dataset_id']
+        self.wait_for_job(dataset_id)
+
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual(status['status'], UploadedFile.STATUS_SUCCEEDED)
+        self.assertEqual(status['rows'], 2)
+
+        with mock.patch.object(llm_service, 'client', None):
+            answer = self.client.post('/api/query/', {'query': "analyze wakad", 'dataset_id': dataset_id},
+                                      content_type='application/json')
+        self.assertEqual(answer.status_code, 200)
+        self.assertEqual([row['flat - weighted average rate'] for row in answer.json()['table_data']], [7000, 7600])
+
+        missing = self.client.post('/api/query/', {'query': "analyze wakad", 'dataset_id': dataset_id + 1},
+                                   content_type='application/json')
+        self.assertEqual(missing.status_code, 404)
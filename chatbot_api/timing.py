@@ -0,0 +1,79 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds of the stage latency histogram buckets, in seconds (see metrics.py)
+HISTOGRAM_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stage timings of the request being handled in this thread or task; None
+# outside a request, so instrumented code costs almost nothing there
+_request_timings = ContextVar('request_timings', default=None)
+
+
+def start_request():
+    """
+    Begin collecting stage timings for the current request
+
+    Returns:
+        tuple: (timings dict, token for finish_request)
+    """
+    timings = {}
+    return timings, _request_timings.set(timings)
+
+
+def finish_request(token):
+    _request_timings.reset(token)
+
+
+def record(stage, seconds):
+    """Add time spent in a stage to the current request, if there is one"""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def stage(name):
+    """
+    Time the enclosed block as a stage of the current request
+
+    Repeated stages within one request (e.g. several dataset loads) add up.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed_stage(name):
+    """Decorator that times every call of a function (sync or async) as a stage"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def server_timing_header(timings):
+    """
+    Format stage timings as a Server-Timing header value
+
+    Args:
+        timings (dict): Stage name -> seconds
+
+    Returns:
+        str: e.g. 'analyze;dur=1.84, summary;dur=612.03'
+    """
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
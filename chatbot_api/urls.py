@@ -1,5 +1,7 @@
 from django.urls import path
 from .views import home
+from .api import AsyncChatbotQueryView, BatchQueryView, DatasetListView, TableQueryView, UploadStatusView, WarmupCancelView
+from .metrics import metrics_view
 import os
 
 # Check if running on Render (via environment variable)
@@ -22,5 +24,12 @@ else:
 urlpatterns = [
     path('', home, name='home'),
     path('api/query/', QueryView.as_view(), name='chatbot-query'),
+    path('api/query/async/', AsyncChatbotQueryView.as_view(), name='chatbot-query-async'),
+    path('api/query/batch/', BatchQueryView.as_view(), name='chatbot-query-batch'),
+    path('api/query/table/', TableQueryView.as_view(), name='chatbot-query-table'),
     path('api/upload/', FileUploadView.as_view(), name='file-upload'),
+    path('api/upload/<int:upload_id>/status/', UploadStatusView.as_view(), name='file-upload-status'),
+    path('api/upload/<int:upload_id>/warmup/cancel/', WarmupCancelView.as_view(), name='file-upload-warmup-cancel'),
+    path('api/datasets/', DatasetListView.as_view(), name='dataset-list'),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+from django.conf import settings
+from django.db import connection
+
+from .models import UploadedFile
+
+# One warmup at a time, separate from ingestion so it never delays the next upload
+_warmup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='warmup')
+
+
+def warmup_queries(snapshot, top_n=5):
+    """
+    List the queries a warmup answers ahead of time
+
+    Args:
+        snapshot (DatasetSnapshot): Dataset to warm up
+        top_n (int): Number of top areas by demand whose pairwise comparisons are included
+
+    Returns:
+        list: Query strings
+    """
+    location_column = snapshot.schema.location_column
+    if not location_column:
+        return []
+    areas = [str(area) for area in snapshot.df[location_column].dropna().unique()]
+    queries = ["top areas"] + [f"analyze {area}" for area in areas]
+
+    # Comparisons between the areas users look at most
+    top_areas = []
+    for area in snapshot.df[location_column].iloc[snapshot.area_index.top_positions]:
+        if len(top_areas) >= top_n:
+            break
+        if isinstance(area, str) and area not in top_areas:
+            top_areas.append(area)
+    queries += [f"compare {first} and {second}" for first, second in combinations(top_areas, 2)]
+    return queries
+
+
+def submit_warmup(upload_id):
+    """
+    Queue a cache warmup for a successfully ingested upload
+
+    Args:
+        upload_id (int): Primary key of the UploadedFile
+
+    Returns:
+        Future: Completes when the warmup has finished, stopped or failed
+    """
+    UploadedFile.objects.filter(pk=upload_id).update(
+        warmup_status=UploadedFile.STATUS_QUEUED, warmup_total=None, warmup_done=None
+    )
+    return _warmup_executor.submit(run_warmup, upload_id)
+
+
+def cancel_warmup(upload_id):
+    """
+    Stop an upload's warmup if it is queued or running
+
+    Returns:
+        bool: True if a warmup was cancelled
+    """
+    return bool(UploadedFile.objects.filter(
+        pk=upload_id, warmup_status__in=[UploadedFile.STATUS_QUEUED, UploadedFile.STATUS_RUNNING]
+    ).update(warmup_status=UploadedFile.STATUS_CANCELLED))
+
+
+def _should_stop(jobs, upload_id, name):
+    # Cancelled through the API, or superseded by a newer upload of the same dataset
+    if jobs.filter(warmup_status=UploadedFile.STATUS_CANCELLED).exists():
+        return True
+    if getattr(settings, 'CHATBOT_WARMUP_CANCEL_ON_NEW_UPLOAD', True):
+        return UploadedFile.objects.filter(pk__gt=upload_id, name=name).exists()
+    return False
+
+
+def run_warmup(upload_id):
+    """
+    Answer the common queries for an upload's dataset and cache the results
+
+    Every area's single-area analysis, the top areas and the comparisons of
+    the CHATBOT_WARMUP_TOP_N busiest areas are answered in groups of
+    CHATBOT_WARMUP_CONCURRENCY, whose summaries are generated together. This
+    fills the summary cache, which serves any phrasing of the same question,
+    and the response cache for these exact queries. Between groups the
+    warmup records its progress and stops if it was cancelled or a newer
+    upload with the same dataset name arrived.
+
+    Only the worker process running the warmup is warmed: the summary cache
+    is in-process, and so is the response cache unless
+    CHATBOT_RESPONSE_CACHE uses a shared backend (DjangoResponseCache with
+    e.g. Redis). Other workers start cold.
+
+    Args:
+        upload_id (int): Primary key of a successfully ingested UploadedFile
+    """
+    # Imported here because api.py imports this module
+    from .api import answer_queries
+    from .dataset_registry import dataset_registry
+
+    jobs = UploadedFile.objects.filter(pk=upload_id)
+    try:
+        claimed = jobs.filter(warmup_status=UploadedFile.STATUS_QUEUED).update(
+            warmup_status=UploadedFile.STATUS_RUNNING
+        )
+        if not claimed:
+            return
+        name = jobs.values_list('name', flat=True).get()
+        try:
+            snapshot = dataset_registry.get(upload_id)
+            queries = warmup_queries(snapshot, getattr(settings, 'CHATBOT_WARMUP_TOP_N', 5))
+            jobs.update(warmup_total=len(queries), warmup_done=0)
+
+            group_size = getattr(settings, 'CHATBOT_WARMUP_CONCURRENCY', 8)
+            for start in range(0, len(queries), group_size):
+                if _should_stop(jobs, upload_id, name):
+                    jobs.exclude(warmup_status=UploadedFile.STATUS_CANCELLED).update(
+                        warmup_status=UploadedFile.STATUS_CANCELLED
+                    )
+                    print(f"Warmup of dataset {upload_id} cancelled after {start} of {len(queries)} queries")
+                    return
+                answer_queries(queries[start:start + group_size], snapshot)
+                jobs.update(warmup_done=min(start + group_size, len(queries)))
+        except Exception as e:
+            print(f"Error warming up dataset {upload_id}: {str(e)}")
+            jobs.update(warmup_status=UploadedFile.STATUS_FAILED)
+            return
+
+        jobs.filter(warmup_status=UploadedFile.STATUS_RUNNING).update(warmup_status=UploadedFile.STATUS_SUCCEEDED)
+        print(f"Warmed up {len(queries)} queries for dataset {upload_id}")
+    finally:
+        connection.close()
@@ -1,61 +1,159 @@
-import pandas as pd
-import numpy as np
-from datetime import datetime
+"""
+Generate synthetic real estate data for development and benchmarking
+
+Produces N areas x M years with per-area price and demand trends, optional
+missing values, and one of several column naming styles so that column
+detection is exercised the way real uploads exercise it.
+
+Usage:
+    python generate_sample_data.py                      # real_estate_data.xlsx, 13 areas x 4 years
+    python generate_sample_data.py --areas 5000 --years 10 --nan-density 0.05 \\
+        --variant igr --format csv parquet --output data/pune_5000
+"""
+import argparse
 import os
 
+import numpy as np
+import pandas as pd
+
 # Define areas
 areas = [
-    "Wakad", "Aundh", "Baner", "Hinjewadi", "Kharadi", 
-    "Viman Nagar", "Koregaon Park", "Magarpatta", "Hadapsar", 
+    "Wakad", "Aundh", "Baner", "Hinjewadi", "Kharadi",
+    "Viman Nagar", "Koregaon Park", "Magarpatta", "Hadapsar",
     "Akurdi", "Pimpri", "Chinchwad", "Ambegaon Budruk"
 ]
 
-# Generate data for years 2020 to 2023
-years = list(range(2020, 2024))
-
-# Create empty lists for data
-data = []
-
-# Generate random data with some trends
-for area in areas:
-    base_price = np.random.randint(5000, 10000)  # Base price per sqft in 2020
-    base_demand = np.random.randint(70, 95)  # Base demand score in 2020
-    
-    for year in years:
-        # Price increases each year (with some randomness)
-        year_factor = (year - 2020) * 0.08  # 8% average yearly growth
-        price_growth = base_price * (1 + year_factor + np.random.uniform(-0.02, 0.04))
-        price_per_sqft = round(price_growth, 2)
-        
-        # Demand changes each year (with some randomness)
-        if area in ["Wakad", "Baner", "Hinjewadi"]:  # High growth areas
-            demand_growth = base_demand * (1 + 0.05 * (year - 2020) + np.random.uniform(-0.02, 0.04))
-        elif area in ["Akurdi", "Ambegaon Budruk"]:  # Emerging areas with faster growth
-            demand_growth = base_demand * (1 + 0.07 * (year - 2020) + np.random.uniform(-0.02, 0.04))
-        else:  # Stable areas
-            demand_growth = base_demand * (1 + 0.03 * (year - 2020) + np.random.uniform(-0.03, 0.03))
-        
-        demand_score = min(round(demand_growth), 100)  # Cap at 100
-        
-        # Average property size
-        avg_size = round(np.random.uniform(800, 1500), 0)
-        
-        # Add to data
-        data.append({
-            'Year': year,
-            'Area': area,
-            'Price_Per_SqFt': price_per_sqft,
-            'Demand_Score': demand_score,
-            'Avg_Property_Size_SqFt': avg_size,
-            'Units_Sold': round(demand_score * 10 * np.random.uniform(0.8, 1.2)),
-            'New_Constructions': round(demand_score * 2 * np.random.uniform(0.7, 1.3))
-        })
-
-# Create DataFrame
-df = pd.DataFrame(data)
-
-# Save to Excel
-excel_path = 'real_estate_data.xlsx'
-df.to_excel(excel_path, index=False)
-
-print(f"Sample data saved to {excel_path}")
+# Demand growth profiles of the named areas; the rest are stable
+HIGH_GROWTH_AREAS = ["Wakad", "Baner", "Hinjewadi"]
+EMERGING_AREAS = ["Akurdi", "Ambegaon Budruk"]
+
+# Column names per naming style. Each maps the generated measures to the
+# names a real file might use:
+#   legacy   - the original generator's columns ('Area' is found by the text-column fallback)
+#   igr      - the IGR export layout of Sample_data.xlsx
+#   locality - 'locality' and a 'fiscal_year' column found by the year-substring fallback
+COLUMN_VARIANTS = {
+    'legacy': {
+        'year': 'Year', 'area': 'Area', 'price': 'Price_Per_SqFt', 'demand': 'Demand_Score',
+        'size': 'Avg_Property_Size_SqFt', 'units': 'Units_Sold', 'new': 'New_Constructions',
+    },
+    'igr': {
+        'area': 'final location', 'year': 'year', 'city': 'city', 'sales': 'total_sales - igr',
+        'units': 'total sold - igr', 'price': 'flat - weighted average rate',
+        'office_price': 'office - weighted average rate', 'range': 'flat - most prevailing rate - range',
+        'supply': 'total units',
+    },
+    'locality': {
+        'area': 'locality', 'year': 'fiscal_year', 'price': 'Avg Rate (INR/sqft)', 'units': 'Units Sold',
+        'size': 'Avg Size', 'new': 'New Launches',
+    },
+}
+FORMATS = ('xlsx', 'csv', 'parquet')
+
+
+def area_names(count):
+    """The named Pune areas first, then numbered sectors"""
+    names = areas[:count]
+    names += [f"Sector {i}" for i in range(1, count - len(names) + 1)]
+    return names
+
+
+def generate_frame(n_areas=13, n_years=4, start_year=2020, nan_density=0.0, variant='legacy', seed=None):
+    """
+    Build one row per area and year with trending prices and demand
+
+    Args:
+        n_areas (int): Number of areas
+        n_years (int): Number of consecutive years
+        start_year (int): First year
+        nan_density (float): Fraction of measure cells (not area or year) left empty
+        variant (str): Column naming style, a key of COLUMN_VARIANTS
+        seed (int, optional): Random seed for reproducible output
+
+    Returns:
+        DataFrame: The generated dataset
+    """
+    rng = np.random.default_rng(seed)
+    names = area_names(n_areas)
+    rows = n_areas * n_years
+    area = np.repeat(np.array(names, dtype=object), n_years)
+    offset = np.tile(np.arange(n_years), n_areas)
+
+    # Price increases each year (with some randomness)
+    base_price = np.repeat(rng.integers(5000, 10000, n_areas), n_years)
+    price = np.round(base_price * (1 + offset * 0.08 + rng.uniform(-0.02, 0.04, rows)), 2)
+
+    # Demand grows faster in high growth and emerging areas
+    growth = np.where(np.isin(area, HIGH_GROWTH_AREAS), 0.05, np.where(np.isin(area, EMERGING_AREAS), 0.07, 0.03))
+    base_demand = np.repeat(rng.integers(70, 95, n_areas), n_years)
+    demand = np.minimum(np.round(base_demand * (1 + growth * offset + rng.uniform(-0.02, 0.04, rows))), 100)
+    units = np.round(demand * 10 * rng.uniform(0.8, 1.2, rows))
+
+    measures = {
+        'year': start_year + offset,
+        'area': area,
+        'price': price,
+        'demand': demand,
+        'size': np.round(rng.uniform(800, 1500, rows), 0),
+        'units': units,
+        'new': np.round(demand * 2 * rng.uniform(0.7, 1.3, rows)),
+        'city': np.full(rows, 'Pune', dtype=object),
+        'sales': np.round(units * price * rng.uniform(700, 1100, rows), 2),
+        'office_price': np.round(price * rng.uniform(1.2, 1.6, rows), 2),
+        'range': (pd.Series(price // 1000 * 1000, dtype=int).astype(str) + '-'
+                  + pd.Series(price // 1000 * 1000 + 1000, dtype=int).astype(str)).to_numpy(dtype=object),
+        'supply': np.round(units * rng.uniform(1.0, 1.5, rows)),
+    }
+    columns = COLUMN_VARIANTS[variant]
+    df = pd.DataFrame({name: measures[key] for key, name in columns.items()})
+
+    # Blank out measure cells, leaving the area and year intact
+    if nan_density > 0:
+        for key, name in columns.items():
+            if key in ('area', 'year'):
+                continue
+            df.loc[rng.random(rows) < nan_density, name] = np.nan
+    return df
+
+
+def write_frame(df, base_path, formats):
+    """
+    Save a generated frame in each requested format
+
+    Returns:
+        list: Paths written
+    """
+    paths = []
+    for fmt in formats:
+        path = f"{base_path}.{fmt}"
+        if fmt == 'xlsx':
+            df.to_excel(path, index=False)
+        elif fmt == 'csv':
+            df.to_csv(path, index=False)
+        else:
+            df.to_parquet(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--areas", type=int, default=len(areas))
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--start-year", type=int, default=2020)
+    parser.add_argument("--nan-density", type=float, default=0.0)
+    parser.add_argument("--variant", choices=sorted(COLUMN_VARIANTS), default='legacy')
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=['xlsx'])
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default='real_estate_data', help="output path without extension")
+    args = parser.parse_args()
+
+    df = generate_frame(args.areas, args.years, args.start_year, args.nan_density, args.variant, args.seed)
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    for path in write_frame(df, args.output, args.format):
+        print(f"Sample data saved to {path} ({len(df)} rows)")
+
+
+if __name__ == "__main__":
+    main()
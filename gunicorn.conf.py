@@ -0,0 +1,23 @@
+# Picked up automatically by gunicorn when started from the project root (run.sh)
+import os
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges from the shared /metrics files
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    # Take over uploads whose ingestion died with an earlier worker
+    try:
+        from chatbot_api.jobs import recover_ingestion_jobs
+
+        recover_ingestion_jobs()
+    except Exception as e:
+        print(f"Could not recover pending uploads: {str(e)}")
@@ -51,8 +51,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "chatbot_api.middleware.ServerTimingMiddleware",  # Server-Timing headers and per-stage latency histograms
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",  # Add whitenoise for static files
+    "chatbot_api.middleware.AsyncWhiteNoiseMiddleware",  # Whitenoise for static files, async-capable
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -62,6 +63,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "chatbot_api.serialization.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
 ROOT_URLCONF = "realestate_project.urls"
 
 TEMPLATES = [
@@ -142,6 +150,74 @@ if 'collectstatic' in sys.argv and os.environ.get('RENDER', '') == 'true':
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Chatbot response cache for repeated queries. Use
+# chatbot_api.response_cache.DjangoResponseCache with a shared CACHES alias
+# (e.g. Redis) to let all gunicorn workers share hits; give it an alias of
+# its own, as clearing the response cache clears the whole alias.
+CHATBOT_RESPONSE_CACHE = {
+    "BACKEND": os.environ.get("CHATBOT_RESPONSE_CACHE_BACKEND", "chatbot_api.response_cache.LocMemResponseCache"),
+    "OPTIONS": {
+        "timeout": int(os.environ.get("CHATBOT_RESPONSE_CACHE_TIMEOUT", "300")),
+    },
+}
+
+# LLM latency budget. If the summary misses CHATBOT_LLM_TIMEOUT seconds the
+# response goes out with the fallback summary; the late completion is still
+# cached for the next identical request. After CHATBOT_LLM_BREAKER_THRESHOLD
+# consecutive failures the LLM is skipped for CHATBOT_LLM_BREAKER_RESET seconds.
+CHATBOT_LLM_TIMEOUT = float(os.environ.get("CHATBOT_LLM_TIMEOUT", "8"))
+CHATBOT_LLM_REQUEST_TIMEOUT = float(os.environ.get("CHATBOT_LLM_REQUEST_TIMEOUT", "30"))
+CHATBOT_LLM_CACHE_LATE_RESULTS = os.environ.get("CHATBOT_LLM_CACHE_LATE_RESULTS", "True") == "True"
+CHATBOT_LLM_MAX_CONCURRENCY = int(os.environ.get("CHATBOT_LLM_MAX_CONCURRENCY", "16"))
+CHATBOT_LLM_BREAKER_THRESHOLD = int(os.environ.get("CHATBOT_LLM_BREAKER_THRESHOLD", "5"))
+CHATBOT_LLM_BREAKER_RESET = float(os.environ.get("CHATBOT_LLM_BREAKER_RESET", "30"))
+
+# Summaries requested within CHATBOT_LLM_BATCH_WAIT seconds of each other
+# (batch queries, cache warmup, concurrent requests) share one completion of
+# up to CHATBOT_LLM_BATCH_SIZE summaries. Batching is opt-in: the default
+# size of 1 sends each summary on its own, without the CHATBOT_LLM_BATCH_WAIT delay.
+CHATBOT_LLM_BATCH_SIZE = int(os.environ.get("CHATBOT_LLM_BATCH_SIZE", "1"))
+CHATBOT_LLM_BATCH_WAIT = float(os.environ.get("CHATBOT_LLM_BATCH_WAIT", "0.02"))
+
+# Uploads are parsed and written to the column store this many rows at a
+# time, which bounds memory use while ingesting large files
+CHATBOT_INGEST_CHUNK_ROWS = int(os.environ.get("CHATBOT_INGEST_CHUNK_ROWS", "50000"))
+
+# Uploaded datasets each worker keeps loaded for queries that pass a
+# dataset_id; the least recently used one is dropped beyond this
+CHATBOT_MAX_LOADED_DATASETS = int(os.environ.get("CHATBOT_MAX_LOADED_DATASETS", "8"))
+
+# How per-area lookups are answered: "pandas" keeps year-sorted arrays in
+# each worker, "sqlite" loads each dataset version once into an indexed
+# table in the default database and queries it with SQL
+CHATBOT_QUERY_ENGINE = os.environ.get("CHATBOT_QUERY_ENGINE", "pandas")
+
+# Optional cache warmup after an upload is ingested: every area's analysis,
+# the top areas and comparisons between the CHATBOT_WARMUP_TOP_N busiest
+# areas are answered ahead of time, CHATBOT_WARMUP_CONCURRENCY at a time.
+# A newer upload of the same dataset (same name) stops a running warmup
+# unless CANCEL_ON_NEW_UPLOAD is off. Only the worker that ran the ingestion
+# is warmed unless CHATBOT_RESPONSE_CACHE uses a shared backend.
+CHATBOT_WARMUP_ENABLED = os.environ.get("CHATBOT_WARMUP_ENABLED", "False") == "True"
+CHATBOT_WARMUP_TOP_N = int(os.environ.get("CHATBOT_WARMUP_TOP_N", "5"))
+CHATBOT_WARMUP_CONCURRENCY = int(os.environ.get("CHATBOT_WARMUP_CONCURRENCY", "8"))
+CHATBOT_WARMUP_CANCEL_ON_NEW_UPLOAD = os.environ.get("CHATBOT_WARMUP_CANCEL_ON_NEW_UPLOAD", "True") == "True"
+
+# Per-request stage timings are always sent as a Server-Timing header;
+# CHATBOT_TIMING_LOG=True also prints them as one JSON line per request
+# (off by default: a line per request is too much for production logs).
+# Timing-Allow-Origin lets the cross-origin frontend read them.
+CHATBOT_TIMING_LOG = os.environ.get("CHATBOT_TIMING_LOG", "False") == "True"
+CHATBOT_TIMING_ALLOW_ORIGIN = os.environ.get("CHATBOT_TIMING_ALLOW_ORIGIN", "*")
+
+# Largest number of queries accepted by /api/query/batch/ in one request
+CHATBOT_BATCH_MAX_QUERIES = int(os.environ.get("CHATBOT_BATCH_MAX_QUERIES", "50"))
+
+# Rows per page of table_data when a query asks for paging without a limit,
+# and the largest limit a client may ask for
+CHATBOT_TABLE_DEFAULT_LIMIT = int(os.environ.get("CHATBOT_TABLE_DEFAULT_LIMIT", "100"))
+CHATBOT_TABLE_MAX_LIMIT = int(os.environ.get("CHATBOT_TABLE_MAX_LIMIT", "1000"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -7,8 +7,18 @@ python manage.py migrate
 # If we need to create a temporary uploads directory
 mkdir -p media/uploads
 
+# Workers write Prometheus samples here so /metrics can sum them; start empty
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/chatbot-metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Get the PORT environment variable that Render sets
 PORT=${PORT:-8000}
 
-# Start the application with specific host and port
+# Start the application with specific host and port.
+# Set ASGI=true to serve through uvicorn workers, so /api/query/async/
+# can keep many LLM calls in flight per process.
+if [ "${ASGI:-false}" = "true" ]; then
+    exec gunicorn realestate_project.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT
+fi
 exec gunicorn realestate_project.wsgi:application --bind 0.0.0.0:$PORT